@@ -4,9 +4,16 @@ Data agents for various external services and APIs
 """
 
 from agents.base_agent import BaseAgent
-from agents.google_analytics_agent import GoogleAnalyticsAgent
 
 __all__ = [
     'BaseAgent',
     'GoogleAnalyticsAgent'
 ]
+
+
+def __getattr__(name):
+    # Deferred so importing agents.ga4_fact_store does not load the GA4 agent
+    if name == 'GoogleAnalyticsAgent':
+        from agents.google_analytics_agent import GoogleAnalyticsAgent
+        return GoogleAnalyticsAgent
+    raise AttributeError(f"module 'agents' has no attribute {name!r}")
@@ -20,6 +20,7 @@ class BaseAgent(ABC):
         self.agent_description = agent_description
         self.is_initialized = False
         self.last_error = None
+        self.credentials = None  # google-auth credentials, kept fresh by the warm-up stage
         
         # Initialize the agent
         try:
@@ -43,6 +44,13 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Prepare clients ahead of the first real request (channels, tokens)
+        Agents without remote clients have nothing to do
+        """
+        return {"status": "skipped"}
+    
     def get_status(self) -> Dict[str, Any]:
         """Get the current status of the agent"""
         return {
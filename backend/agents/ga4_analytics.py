@@ -0,0 +1,217 @@
+"""
+Time-series analytics over GA4 report data
+Recent report results are kept under short-lived handles; daily series are analyzed with NumPy
+(deltas, period-over-period change, rolling means, trend, seasonality-adjusted baselines and
+z-score anomalies) so the model gets computed figures instead of doing arithmetic over raw rows
+"""
+
+import math
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.ga4_fact_store import ADDITIVE_METRICS
+from lazy_imports import LazyModule
+
+np = LazyModule("numpy")
+
+MAX_ANOMALIES = 5
+
+
+class ReportStore:
+    """
+    Recent get_ga4_report results by handle, so an analysis tool can refer to
+    a report without its rows passing through the model again. Bounded by
+    count (least recently used first) and age.
+    """
+
+    def __init__(self, max_reports: int = 200, ttl: float = 3600.0):
+        self.max_reports = max_reports
+        self.ttl = ttl
+        self._reports: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, report: Dict[str, Any]) -> str:
+        handle = f"rpt_{secrets.token_hex(8)}"
+        self._reports[handle] = (time.monotonic() + self.ttl, report)
+        while len(self._reports) > self.max_reports:
+            self._reports.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[Dict[str, Any]]:
+        entry = self._reports.get(handle)
+        if entry is None or entry[0] <= time.monotonic():
+            self._reports.pop(handle, None)
+            self.misses += 1
+            return None
+        self._reports.move_to_end(handle)
+        self.hits += 1
+        return entry[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"reports": len(self._reports), "hits": self.hits, "misses": self.misses}
+
+
+def daily_matrix(rows: List[Dict[str, Any]], metric: str, group_dims: List[str]):
+    """
+    (groups, days, matrix) for one metric: a row per breakdown value, a column per day from
+    the first to the last date in the rows; days without a row are 0 (GA4 omits empty days).
+    """
+    parsed = [datetime.strptime(row["date"], "%Y%m%d").date() for row in rows]
+    start, end = min(parsed), max(parsed)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    group_index: Dict[tuple, int] = {}
+    group_ids = [group_index.setdefault(tuple(row[d] for d in group_dims), len(group_index)) for row in rows]
+    values = [row.get(metric) if isinstance(row.get(metric), (int, float)) else 0 for row in rows]
+
+    matrix = np.zeros((len(group_index), len(days)))
+    np.add.at(matrix, (np.asarray(group_ids), np.asarray([(d - start).days for d in parsed])),
+              np.asarray(values, dtype=float))
+    return list(group_index), days, matrix
+
+
+def _pct(current, previous):
+    """Percent change per row; NaN where the previous value is 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous != 0, (current - previous) / np.abs(previous) * 100, np.nan)
+
+
+def analyze_matrix(matrix, window: int = 7, season_length: int = 7, z_threshold: float = 3.0) -> Dict[str, Any]:
+    """
+    Vectorized statistics for every row (series) of a groups x days matrix at once.
+    Returns arrays (one value per row) plus the per-day expected values and z-scores.
+    """
+    groups, n = matrix.shape
+    x = np.arange(n, dtype=float)
+    mean = matrix.mean(axis=1)
+    stats: Dict[str, Any] = {"mean": mean, "total": matrix.sum(axis=1), "last": matrix[:, -1]}
+
+    if n >= 2:
+        stats["dod_delta"] = matrix[:, -1] - matrix[:, -2]
+        stats["dod_pct"] = _pct(matrix[:, -1], matrix[:, -2])
+        half = n // 2
+        stats["current_avg"] = matrix[:, n - half:].mean(axis=1)
+        stats["previous_avg"] = matrix[:, n - 2 * half:n - half].mean(axis=1)
+        stats["pop_pct"] = _pct(stats["current_avg"], stats["previous_avg"])
+
+    window = max(1, min(window, n))
+    cumulative = np.cumsum(np.pad(matrix, ((0, 0), (1, 0))), axis=1)
+    rolling = (cumulative[:, window:] - cumulative[:, :-window]) / window
+    stats["rolling_first"], stats["rolling_last"] = rolling[:, 0], rolling[:, -1]
+    stats["rolling_pct"] = _pct(rolling[:, -1], rolling[:, 0])
+
+    # Least-squares slope per row
+    centered_x = x - x.mean()
+    denominator = centered_x @ centered_x
+    slope = (matrix - mean[:, None]) @ centered_x / denominator if denominator else np.zeros(groups)
+    stats["slope"] = slope
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stats["slope_pct"] = np.where(mean != 0, slope / mean * 100, np.nan)
+
+    # Seasonality-adjusted baseline: trend line scaled by each position's share of the detrended mean
+    trend = mean[:, None] + slope[:, None] * centered_x
+    factors = np.ones((groups, n))
+    if season_length > 1 and n >= 2 * season_length:
+        detrended = matrix - slope[:, None] * centered_x
+        cycles = math.ceil(n / season_length)
+        padded = np.pad(detrended, ((0, 0), (0, cycles * season_length - n)), constant_values=np.nan)
+        profile = np.nanmean(padded.reshape(groups, cycles, season_length), axis=1)
+        level = detrended.mean(axis=1)[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profile = np.where(level != 0, profile / level, 1.0)
+        factors = profile[:, np.arange(n) % season_length]
+    expected = trend * factors
+    residual = matrix - expected
+    sigma = residual.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(sigma[:, None] > 0, (residual - residual.mean(axis=1)[:, None]) / sigma[:, None], 0.0)
+    stats["expected"], stats["z"] = expected, z
+    stats["anomaly_mask"] = np.abs(z) >= z_threshold if n >= 3 else np.zeros_like(z, dtype=bool)
+    return stats
+
+
+def _round(value, digits: int = 2):
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return int(value) if value.is_integer() else round(value, digits)
+
+
+def analyze_report_series(report: Dict[str, Any], metrics: List[str] = None, window: int = 7,
+                          season_length: int = 7, z_threshold: float = 3.0, max_groups: int = 5) -> Dict[str, Any]:
+    """
+    Compact insights for a date-dimensioned report: per metric and per breakdown value (the
+    report's other dimensions, top max_groups by mean), the series' level, changes, trend and
+    anomalies against a seasonality-adjusted baseline.
+    """
+    rows = report.get("data") or []
+    dimensions = report.get("dimensions") or []
+    if "date" not in dimensions:
+        raise ValueError("Time-series analysis needs a report with the 'date' dimension")
+    metrics = metrics or report.get("metrics") or []
+    unknown = [m for m in metrics if m not in (report.get("metrics") or [])]
+    if unknown:
+        raise ValueError(f"Metric(s) not in the report: {', '.join(unknown)}")
+    if not rows:
+        return {"days": 0, "metrics": {}, "note": "The report has no rows"}
+
+    group_dims = [d for d in dimensions if d != "date"]
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    days: List = []
+    group_count = 0
+    for metric in metrics:
+        groups, days, matrix = daily_matrix(rows, metric, group_dims)
+        group_count = len(groups)
+        order = np.argsort(-matrix.mean(axis=1), kind="stable")[:max_groups]
+        matrix = matrix[order]
+        stats = analyze_matrix(matrix, window, season_length, z_threshold)
+
+        series = []
+        for i, group_position in enumerate(order):
+            entry: Dict[str, Any] = {}
+            if group_dims:
+                entry["group"] = dict(zip(group_dims, groups[group_position]))
+            if metric in ADDITIVE_METRICS:
+                entry["total"] = _round(stats["total"][i])
+            entry["mean"] = _round(stats["mean"][i])
+            entry["last"] = _round(stats["last"][i])
+            if "dod_delta" in stats:
+                entry["day_over_day"] = {"delta": _round(stats["dod_delta"][i]), "pct": _round(stats["dod_pct"][i])}
+                entry["period_over_period"] = {
+                    "current_avg": _round(stats["current_avg"][i]),
+                    "previous_avg": _round(stats["previous_avg"][i]),
+                    "pct": _round(stats["pop_pct"][i]),
+                }
+            entry["rolling_mean"] = {
+                "window": min(window, len(days)),
+                "first": _round(stats["rolling_first"][i]),
+                "last": _round(stats["rolling_last"][i]),
+                "pct": _round(stats["rolling_pct"][i]),
+            }
+            entry["trend"] = {"slope_per_day": _round(stats["slope"][i]), "pct_per_day": _round(stats["slope_pct"][i])}
+
+            flagged = np.flatnonzero(stats["anomaly_mask"][i])
+            flagged = flagged[np.argsort(-np.abs(stats["z"][i][flagged]), kind="stable")][:MAX_ANOMALIES]
+            entry["anomalies"] = [{
+                "date": days[d].isoformat(),
+                "value": _round(matrix[i, d]),
+                "expected": _round(stats["expected"][i, d]),
+                "z": _round(stats["z"][i, d]),
+                "direction": "spike" if stats["z"][i, d] > 0 else "drop",
+            } for d in sorted(flagged)]
+            series.append(entry)
+        results[metric] = series
+
+    return {
+        "date_range": f"{days[0].isoformat()} to {days[-1].isoformat()}",
+        "days": len(days),
+        "groups_analyzed": min(group_count, max_groups),
+        "groups_total": group_count,
+        "season_length": season_length,
+        "z_threshold": z_threshold,
+        "metrics": results,
+    }
@@ -0,0 +1,169 @@
+"""
+Day-partitioned GA4 report cache
+Date-dimensioned report rows cached per (property, dimensions, metrics, day), so overlapping
+ranges only fetch the days they don't share; totals of non-additive metrics over final ranges
+are cached per range, since they cannot be summed from the days
+"""
+
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.ga4_fact_store import contiguous_ranges
+from monitoring.metrics import CACHE_REQUESTS
+
+SeriesKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+# GA4 returns at most this many rows without an explicit limit; a full page may be truncated
+GA4_DEFAULT_ROW_LIMIT = 10000
+
+
+class GA4DayCache:
+    """
+    In-memory report rows per (property, dimensions, metrics, day).
+
+    Final days (older than final_after_days) are kept until evicted; recent
+    days are still being processed by GA4, so they expire after recent_ttl
+    and are fetched again. Empty days are cached too, so a day without
+    traffic is not re-requested. At most max_days day entries are kept,
+    evicting the least recently used series first.
+    """
+
+    def __init__(self, max_days: int = 50000, final_after_days: int = 3, recent_ttl: float = 300.0):
+        self.max_days = max_days
+        self.final_after_days = final_after_days
+        self.recent_ttl = recent_ttl
+        # series key -> {day: (rows, expires_at or None when final)}
+        self._series: "OrderedDict[SeriesKey, Dict[date, tuple]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.days_fetched = 0
+
+    @staticmethod
+    def key(property_id: str, dimensions: List[str], metrics: List[str]) -> SeriesKey:
+        return property_id, tuple(dimensions), tuple(metrics)
+
+    def is_final(self, day: date, today: date = None) -> bool:
+        return day <= (today or date.today()) - timedelta(days=self.final_after_days)
+
+    def lookup(self, key: SeriesKey, start: date, end: date) -> Tuple[Dict[date, list], List[Tuple[date, date]]]:
+        """Cached rows per day in [start, end] and the missing days as contiguous (start, end) runs."""
+        series = self._series.get(key)
+        now = time.monotonic()
+        cached: Dict[date, list] = {}
+        missing: List[date] = []
+        day = start
+        while day <= end:
+            entry = series.get(day) if series else None
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                cached[day] = entry[0]
+            else:
+                missing.append(day)
+            day += timedelta(days=1)
+        if series is not None:
+            self._series.move_to_end(key)
+
+        if not missing:
+            self.hits += 1
+            result = "hit"
+        elif cached:
+            self.partial += 1
+            result = "partial"
+        else:
+            self.misses += 1
+            result = "miss"
+        CACHE_REQUESTS.labels("ga4_day_cache", result).inc()
+        return cached, contiguous_ranges(missing)
+
+    def store(self, key: SeriesKey, start: date, end: date, rows_by_day: Dict[date, list], today: date = None):
+        """Cache every day in [start, end] from one complete response (days absent from it had no rows)."""
+        today = today or date.today()
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {}
+        self._series.move_to_end(key)
+        expires_at = time.monotonic() + self.recent_ttl
+        day = start
+        while day <= end:
+            if day not in series:
+                self._size += 1
+            series[day] = (rows_by_day.get(day, []), None if self.is_final(day, today) else expires_at)
+            day += timedelta(days=1)
+        self.days_fetched += (end - start).days + 1
+        self._evict()
+
+    def _evict(self):
+        while self._size > self.max_days and len(self._series) > 1:
+            _, series = self._series.popitem(last=False)
+            self._size -= len(series)
+
+    def invalidate(self, property_id: str = None):
+        for key in [k for k in self._series if property_id is None or k[0] == property_id]:
+            self._size -= len(self._series.pop(key))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.partial + self.misses
+        return {
+            "series": len(self._series),
+            "days": self._size,
+            "hits": self.hits,
+            "partial": self.partial,
+            "misses": self.misses,
+            "days_fetched": self.days_fetched,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+class GA4RangeTotals:
+    """
+    Totals of non-additive metrics (activeUsers, bounceRate, ...) per (property, start, end, metric).
+
+    Rows from the day cache or the fact store can be summed for additive
+    metrics only; the others need a dimensionless GA4 request per range.
+    Once a range is final (its end is older than final_after_days) the totals
+    no longer change, so they are kept, least recently used evicted first
+    beyond max_ranges.
+    """
+
+    def __init__(self, max_ranges: int = 2000, final_after_days: int = 3):
+        self.max_ranges = max_ranges
+        self.final_after_days = final_after_days
+        self._ranges: "OrderedDict[Tuple[str, date, date], Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, property_id: str, start: Optional[date], end: Optional[date], metrics: List[str]) -> Dict[str, Any]:
+        """The cached totals among metrics (possibly only some of them)."""
+        totals = self._ranges.get((property_id, start, end)) or {}
+        found = {m: totals[m] for m in metrics if m in totals}
+        if totals:
+            self._ranges.move_to_end((property_id, start, end))
+        if len(found) == len(metrics):
+            self.hits += 1
+            CACHE_REQUESTS.labels("ga4_range_totals", "hit").inc()
+        else:
+            self.misses += 1
+            CACHE_REQUESTS.labels("ga4_range_totals", "miss").inc()
+        return found
+
+    def put(self, property_id: str, start: Optional[date], end: Optional[date], totals: Dict[str, Any],
+            today: date = None):
+        """Keep totals for [start, end] if the whole range is final."""
+        if not start or not end or start > end:
+            return
+        if end > (today or date.today()) - timedelta(days=self.final_after_days):
+            return
+        self._ranges.setdefault((property_id, start, end), {}).update(totals)
+        self._ranges.move_to_end((property_id, start, end))
+        while len(self._ranges) > self.max_ranges:
+            self._ranges.popitem(last=False)
+
+    def invalidate(self, property_id: str = None):
+        for key in [k for k in self._ranges if property_id is None or k[0] == property_id]:
+            del self._ranges[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"ranges": len(self._ranges), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,342 @@
+"""
+GA4 Fact Store for Aterges Platform
+Local per-property daily metrics with incremental sync through GoogleAnalyticsAgent
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.ga4_quota import BACKGROUND, QuotaDeferredError
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Common breakdowns kept locally; the empty set holds property-level daily totals
+DIMENSION_SETS: List[Tuple[str, ...]] = [
+    (),
+    ("sessionDefaultChannelGroup",),
+    ("deviceCategory",),
+    ("country",),
+]
+
+# GA4 metric name -> fact table column
+STORE_METRICS: Dict[str, str] = {
+    "sessions": "sessions",
+    "screenPageViews": "screen_page_views",
+    "engagedSessions": "engaged_sessions",
+    "eventCount": "event_count",
+    "newUsers": "new_users",
+    "activeUsers": "active_users",
+}
+
+# Metrics that may be summed across days; the rest are only served per day
+ADDITIVE_METRICS = {"sessions", "screenPageViews", "engagedSessions", "eventCount", "newUsers"}
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS ga4_daily_facts (
+        property_id TEXT NOT NULL,
+        dimension_set TEXT NOT NULL,
+        day DATE NOT NULL,
+        dimension_values TEXT NOT NULL,
+        sessions DOUBLE PRECISION,
+        screen_page_views DOUBLE PRECISION,
+        engaged_sessions DOUBLE PRECISION,
+        event_count DOUBLE PRECISION,
+        new_users DOUBLE PRECISION,
+        active_users DOUBLE PRECISION,
+        PRIMARY KEY (property_id, dimension_set, day, dimension_values)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ga4_fact_sync (
+        property_id TEXT NOT NULL,
+        dimension_set TEXT NOT NULL,
+        day DATE NOT NULL,
+        is_final BOOLEAN NOT NULL,
+        synced_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (property_id, dimension_set, day)
+    )
+    """,
+]
+
+_RELATIVE_DAYS = re.compile(r"^(\d+)daysAgo$")
+
+
+def resolve_date(value: str, today: date = None) -> Optional[date]:
+    """Resolve a GA4 date string (YYYY-MM-DD, today, yesterday, NdaysAgo) to a date."""
+    today = today or date.today()
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - timedelta(days=1)
+    match = _RELATIVE_DAYS.match(value or "")
+    if match:
+        return today - timedelta(days=int(match.group(1)))
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_date(value: Any) -> date:
+    """Normalize a DATE column value (date object from Postgres, ISO text from SQLite)."""
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def contiguous_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted days into (start, end) runs of consecutive dates."""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+class SQLiteFactBackend:
+    """
+    SQLite stand-in exposing the Database execute/fetch_all/execute_many API.
+    Used by tests and local development; both engines accept ":name" params.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+
+    @staticmethod
+    def _params(values: Optional[dict]) -> dict:
+        return {k: v.isoformat() if isinstance(v, (date, datetime)) else v for k, v in (values or {}).items()}
+
+    async def execute(self, query: str, values: dict = None):
+        self.connection.execute(query, self._params(values))
+        self.connection.commit()
+
+    async def execute_many(self, query: str, values):
+        self.connection.executemany(query, (self._params(v) for v in values))
+        self.connection.commit()
+
+    async def fetch_all(self, query: str, values: dict = None):
+        return self.connection.execute(query, self._params(values)).fetchall()
+
+
+class GA4FactStore:
+    """
+    Daily GA4 metrics per (property, dimension set, day, dimension values).
+
+    Days are synced incrementally and marked final once they are older than
+    settings.ga4_fact_final_after_days; only final days are served locally,
+    so recent days always come from the GA4 API.
+    """
+
+    def __init__(self, database, final_after_days: int = None):
+        self.database = database
+        self.final_after_days = final_after_days if final_after_days is not None else settings.ga4_fact_final_after_days
+
+    async def ensure_schema(self):
+        """Create the fact tables if they do not exist (see migration 003)."""
+        for statement in SCHEMA_STATEMENTS:
+            await self.database.execute(statement)
+
+    @staticmethod
+    def dimension_set_key(dimensions: List[str]) -> Optional[str]:
+        """Return the stored dimension set for a request's dimensions, or None if not stored."""
+        breakdown = tuple(sorted(d for d in dimensions if d != "date"))
+        return ",".join(breakdown) if breakdown in DIMENSION_SETS else None
+
+    def can_serve(self, dimensions: List[str], metrics: List[str]) -> bool:
+        """Whether a report shape can be answered from the store at all."""
+        if self.dimension_set_key(dimensions) is None:
+            return False
+        if any(m not in STORE_METRICS for m in metrics):
+            return False
+        # Non-additive metrics are only correct per day
+        return "date" in dimensions or all(m in ADDITIVE_METRICS for m in metrics)
+
+    def _is_final(self, day: date, today: date) -> bool:
+        return day <= today - timedelta(days=self.final_after_days)
+
+    async def final_days(self, property_id: str, dimension_set: str, start: date, end: date) -> set:
+        """Days in [start, end] that have a final sync for this dimension set."""
+        rows = await self.database.fetch_all(
+            """
+            SELECT day FROM ga4_fact_sync
+            WHERE property_id = :property_id AND dimension_set = :dimension_set
+              AND day BETWEEN :start AND :end AND is_final = :is_final
+            """,
+            {"property_id": property_id, "dimension_set": dimension_set, "start": start, "end": end, "is_final": True},
+        )
+        return {_as_date(row["day"]) for row in rows}
+
+    async def covered_until(self, property_id: str, dimensions: List[str], start: date, end: date) -> Optional[date]:
+        """Last day of the final, contiguous run starting at `start`, or None if `start` is not covered."""
+        covered = await self.final_days(property_id, self.dimension_set_key(dimensions), start, end)
+        last = None
+        day = start
+        while day <= end and day in covered:
+            last = day
+            day += timedelta(days=1)
+        return last
+
+    async def query(self, property_id: str, dimensions: List[str], metrics: List[str],
+                    start: date, end: date) -> List[Dict[str, Any]]:
+        """Answer a report from the store, shaped like get_ga4_report rows."""
+        dimension_set = self.dimension_set_key(dimensions)
+        breakdown = dimension_set.split(",") if dimension_set else []
+        by_day = "date" in dimensions
+
+        group_by = "day, dimension_values" if by_day else "dimension_values"
+        sums = ", ".join(f"SUM({STORE_METRICS[m]}) AS {STORE_METRICS[m]}" for m in metrics)
+        rows = await self.database.fetch_all(
+            f"""
+            SELECT {group_by}, {sums} FROM ga4_daily_facts
+            WHERE property_id = :property_id AND dimension_set = :dimension_set
+              AND day BETWEEN :start AND :end
+            GROUP BY {group_by}
+            ORDER BY {group_by}
+            """,
+            {"property_id": property_id, "dimension_set": dimension_set, "start": start, "end": end},
+        )
+
+        result = []
+        for row in rows:
+            values = dict(zip(breakdown, json.loads(row["dimension_values"])))
+            row_data = {}
+            for dim in dimensions:
+                row_data[dim] = _as_date(row["day"]).strftime("%Y%m%d") if dim == "date" else values.get(dim)
+            for metric in metrics:
+                value = float(row[STORE_METRICS[metric]] or 0)
+                row_data[metric] = int(value) if value.is_integer() else value
+            result.append(row_data)
+        return result
+
+    async def sync(self, agent, property_id: str = None, days_back: int = 90,
+                   today: date = None, chunk_days: int = None) -> Dict[str, Any]:
+        """
+        Fetch missing or not-yet-final days for every stored dimension set.
+
+        Args:
+            agent: GoogleAnalyticsAgent used for the remote calls
+            property_id: GA4 property ID (uses the agent default if not provided)
+            days_back: How far back the store should cover
+            today: Override for the current date (tests)
+            chunk_days: Max days per GA4 request (keeps responses under the row limit)
+        """
+        today = today or date.today()
+        property_id = property_id or agent.default_property_id
+        chunk_days = chunk_days or settings.ga4_fact_sync_chunk_days
+        start = today - timedelta(days=days_back)
+        end = today - timedelta(days=1)
+        summary = {"property_id": property_id, "requests": 0, "days_synced": 0, "rows_written": 0, "errors": []}
+
+        for breakdown in DIMENSION_SETS:
+            dimension_set = ",".join(breakdown)
+            final = await self.final_days(property_id, dimension_set, start, end)
+            pending = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+            pending = [day for day in pending if day not in final]
+
+            for run_start, run_end in contiguous_ranges(pending):
+                chunk_start = run_start
+                while chunk_start <= run_end:
+                    chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), run_end)
+                    try:
+                        written = await self._sync_range(agent, property_id, breakdown, chunk_start, chunk_end, today)
+                        summary["rows_written"] += written
+                        summary["days_synced"] += (chunk_end - chunk_start).days + 1
+                    except QuotaDeferredError as e:
+                        # Low on tokens: leave the rest for the next run rather than starve interactive use
+                        logger.warning(f"GA4 fact sync for {property_id} deferred: {e}")
+                        summary["deferred"] = True
+                        break
+                    except Exception as e:
+                        logger.error(f"GA4 fact sync failed for {property_id} [{dimension_set}] "
+                                     f"{chunk_start}..{chunk_end}: {e}")
+                        summary["errors"].append(str(e))
+                    summary["requests"] += 1
+                    chunk_start = chunk_end + timedelta(days=1)
+                if summary.get("deferred"):
+                    break
+            if summary.get("deferred"):
+                break
+
+        logger.info(f"GA4 fact sync for {property_id}: {summary['days_synced']} days, "
+                    f"{summary['rows_written']} rows in {summary['requests']} requests")
+        return summary
+
+    async def _sync_range(self, agent, property_id: str, breakdown: Tuple[str, ...],
+                          start: date, end: date, today: date) -> int:
+        response = await agent.get_ga4_report(
+            start_date=start.isoformat(),
+            end_date=end.isoformat(),
+            dimensions=["date", *breakdown],
+            metrics=list(STORE_METRICS),
+            property_id=property_id,
+            use_fact_store=False,
+            use_day_cache=False,
+            priority=BACKGROUND,
+        )
+        if response.get("deferred"):
+            raise QuotaDeferredError(response.get("message"))
+        if response.get("error"):
+            raise RuntimeError(response.get("message"))
+
+        dimension_set = ",".join(breakdown)
+        facts = []
+        for row in response["data"]["data"]:
+            fact = {
+                "property_id": property_id,
+                "dimension_set": dimension_set,
+                "day": datetime.strptime(row["date"], "%Y%m%d").date(),
+                "dimension_values": json.dumps([row[d] for d in breakdown]),
+            }
+            for metric, column in STORE_METRICS.items():
+                fact[column] = float(row.get(metric) or 0)
+            facts.append(fact)
+
+        columns = ", ".join(STORE_METRICS.values())
+        params = ", ".join(f":{c}" for c in STORE_METRICS.values())
+        updates = ", ".join(f"{c} = excluded.{c}" for c in STORE_METRICS.values())
+
+        # Re-synced (not yet final) days replace their previous rows
+        await self.database.execute(
+            """
+            DELETE FROM ga4_daily_facts
+            WHERE property_id = :property_id AND dimension_set = :dimension_set AND day BETWEEN :start AND :end
+            """,
+            {"property_id": property_id, "dimension_set": dimension_set, "start": start, "end": end},
+        )
+        if facts:
+            await self.database.execute_many(
+                f"""
+                INSERT INTO ga4_daily_facts (property_id, dimension_set, day, dimension_values, {columns})
+                VALUES (:property_id, :dimension_set, :day, :dimension_values, {params})
+                ON CONFLICT (property_id, dimension_set, day, dimension_values) DO UPDATE SET {updates}
+                """,
+                facts,
+            )
+
+        synced_at = datetime.now(timezone.utc)
+        await self.database.execute_many(
+            """
+            INSERT INTO ga4_fact_sync (property_id, dimension_set, day, is_final, synced_at)
+            VALUES (:property_id, :dimension_set, :day, :is_final, :synced_at)
+            ON CONFLICT (property_id, dimension_set, day) DO UPDATE
+            SET is_final = excluded.is_final, synced_at = excluded.synced_at
+            """,
+            [
+                {
+                    "property_id": property_id,
+                    "dimension_set": dimension_set,
+                    "day": start + timedelta(days=i),
+                    "is_final": self._is_final(start + timedelta(days=i), today),
+                    "synced_at": synced_at,
+                }
+                for i in range((end - start).days + 1)
+            ],
+        )
+        return len(facts)
@@ -0,0 +1,201 @@
+"""
+GA4 report filters, ordering and paging
+Turns the simple filter/order specs used in tool calls into RunReportRequest fields, validated
+locally so GA4 only ever sees well-formed requests
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.ga4_metadata import LEGACY_ALIASES, GA4ValidationError
+
+# Tool-facing names -> StringFilter.MatchType
+STRING_MATCH_TYPES = {
+    "exact": "EXACT",
+    "begins_with": "BEGINS_WITH",
+    "ends_with": "ENDS_WITH",
+    "contains": "CONTAINS",
+    "regex": "PARTIAL_REGEXP",
+    "full_regex": "FULL_REGEXP",
+}
+DIMENSION_MATCHES = (*STRING_MATCH_TYPES, "in_list")
+
+# Tool-facing names -> NumericFilter.Operation ("between" uses BetweenFilter)
+NUMERIC_OPERATIONS = {
+    "eq": "EQUAL",
+    "lt": "LESS_THAN",
+    "lte": "LESS_THAN_OR_EQUAL",
+    "gt": "GREATER_THAN",
+    "gte": "GREATER_THAN_OR_EQUAL",
+}
+METRIC_OPERATORS = (*NUMERIC_OPERATIONS, "between")
+
+MAX_LIMIT = 250000  # GA4's maximum rows per report page
+MAX_FILTER_CONDITIONS = 20
+
+
+def requested_name(name: str, requested: List[str]) -> Optional[str]:
+    """Match a field name (or its legacy alias) against the report's own dimensions/metrics."""
+    for candidate in (name, LEGACY_ALIASES.get(name)):
+        if candidate in requested:
+            return candidate
+    lowered = {field.lower(): field for field in requested}
+    return lowered.get(name.lower())
+
+
+def _numeric_value(value: Any, field: str) -> Dict[str, Any]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise GA4ValidationError(f"Metric filter on {field} needs a numeric value, got {value!r}") from None
+    if float(value).is_integer():
+        return {"int64_value": int(value)}
+    return {"double_value": float(value)}
+
+
+def _combine(expressions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not expressions:
+        return None
+    if len(expressions) == 1:
+        return expressions[0]
+    return {"and_group": {"expressions": expressions}}
+
+
+def to_plain(value):
+    # Function-call args arrive as proto map/repeated composites; work on plain dicts and lists
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) or (hasattr(value, "__iter__") and not isinstance(value, (str, bytes))):
+        return [to_plain(item) for item in value]
+    return value
+
+
+def _conditions(spec, label: str) -> List[Dict[str, Any]]:
+    if spec is None:
+        return []
+    spec = to_plain(spec)
+    conditions = [spec] if isinstance(spec, dict) else spec
+    if len(conditions) > MAX_FILTER_CONDITIONS:
+        raise GA4ValidationError(f"At most {MAX_FILTER_CONDITIONS} {label} conditions are supported")
+    for condition in conditions:
+        if not isinstance(condition, dict) or not condition.get("field"):
+            raise GA4ValidationError(f"Each {label} condition needs a 'field'")
+    return conditions
+
+
+def dimension_filter_fields(spec) -> List[str]:
+    """Dimension names referenced by a dimension filter spec, to resolve against the property's catalog."""
+    return list(dict.fromkeys(condition["field"] for condition in _conditions(spec, "dimension filter")))
+
+
+def build_dimension_filter(spec, resolve_dimension: Callable[[str], str]) -> Optional[Dict[str, Any]]:
+    """
+    FilterExpression for a list of dimension conditions (ANDed):
+    {"field", "match" (exact, contains, begins_with, ends_with, regex, full_regex, in_list),
+     "value" or "values", "case_sensitive", "exclude"}
+    """
+    expressions = []
+    for condition in _conditions(spec, "dimension filter"):
+        field = resolve_dimension(condition["field"])
+        match = condition.get("match", "in_list" if "values" in condition else "exact")
+        case_sensitive = bool(condition.get("case_sensitive", False))
+        if match not in DIMENSION_MATCHES:
+            raise GA4ValidationError(
+                f"Unknown match '{match}' for {field}; use one of {', '.join(DIMENSION_MATCHES)}"
+            )
+        if match == "in_list":
+            values = condition.get("values")
+            if not values or not isinstance(values, (list, tuple)):
+                raise GA4ValidationError(f"in_list filter on {field} needs a non-empty 'values' list")
+            clause = {"in_list_filter": {"values": [str(v) for v in values], "case_sensitive": case_sensitive}}
+        else:
+            value = condition.get("value")
+            if value is None or value == "":
+                raise GA4ValidationError(f"{match} filter on {field} needs a 'value'")
+            if match in ("regex", "full_regex"):
+                try:
+                    re.compile(str(value))
+                except re.error as e:
+                    raise GA4ValidationError(f"Invalid regular expression for {field}: {e}") from None
+            clause = {"string_filter": {"match_type": STRING_MATCH_TYPES[match], "value": str(value),
+                                        "case_sensitive": case_sensitive}}
+        expression = {"filter": {"field_name": field, **clause}}
+        expressions.append({"not_expression": expression} if condition.get("exclude") else expression)
+    return _combine(expressions)
+
+
+def build_metric_filter(spec, metrics: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    FilterExpression for a list of metric conditions (ANDed), applied after aggregation:
+    {"field", "operator" (eq, lt, lte, gt, gte, between), "value", "to" (between only)}
+    """
+    expressions = []
+    for condition in _conditions(spec, "metric filter"):
+        field = requested_name(condition["field"], metrics)
+        if field is None:
+            raise GA4ValidationError(
+                f"Metric filter field '{condition['field']}' must be one of the report's metrics: {', '.join(metrics)}"
+            )
+        operator = condition.get("operator", "gt")
+        if operator not in METRIC_OPERATORS:
+            raise GA4ValidationError(
+                f"Unknown operator '{operator}' for {field}; use one of {', '.join(METRIC_OPERATORS)}"
+            )
+        if operator == "between":
+            low, high = condition.get("value"), condition.get("to")
+            low_value, high_value = _numeric_value(low, field), _numeric_value(high, field)
+            if float(low) > float(high):
+                raise GA4ValidationError(f"between filter on {field} has value > to")
+            clause = {"between_filter": {"from_value": low_value, "to_value": high_value}}
+        else:
+            clause = {"numeric_filter": {"operation": NUMERIC_OPERATIONS[operator],
+                                         "value": _numeric_value(condition.get("value"), field)}}
+        expressions.append({"filter": {"field_name": field, **clause}})
+    return _combine(expressions)
+
+
+def build_order_bys(spec, dimensions: List[str], metrics: List[str]) -> List[Dict[str, Any]]:
+    """OrderBy list for [{"field", "desc"}]; fields must be among the report's dimensions or metrics."""
+    order_bys = []
+    for entry in _conditions(spec, "order_by"):
+        desc = bool(entry.get("desc", False))
+        metric = requested_name(entry["field"], metrics)
+        if metric:
+            order_bys.append({"metric": {"metric_name": metric}, "desc": desc})
+            continue
+        dimension = requested_name(entry["field"], dimensions)
+        if dimension:
+            order_bys.append({"dimension": {"dimension_name": dimension}, "desc": desc})
+            continue
+        raise GA4ValidationError(
+            f"Cannot order by '{entry['field']}': it is not one of the report's dimensions or metrics"
+        )
+    return order_bys
+
+
+def build_report_options(dimensions: List[str], metrics: List[str], resolve_dimension: Callable[[str], str],
+                         dimension_filter=None, metric_filter=None, order_bys=None,
+                         limit: int = None, offset: int = None) -> Dict[str, Any]:
+    """RunReportRequest keyword arguments for the given filters, ordering and paging (only those set)."""
+    options: Dict[str, Any] = {}
+    expression = build_dimension_filter(dimension_filter, resolve_dimension)
+    if expression:
+        options["dimension_filter"] = expression
+    expression = build_metric_filter(metric_filter, metrics)
+    if expression:
+        options["metric_filter"] = expression
+    ordering = build_order_bys(order_bys, dimensions, metrics)
+    if ordering:
+        options["order_bys"] = ordering
+    if limit is not None:
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)) or not 1 <= int(limit) <= MAX_LIMIT:
+            raise GA4ValidationError(f"limit must be between 1 and {MAX_LIMIT}")
+        options["limit"] = int(limit)
+    if offset is not None:
+        if isinstance(offset, bool) or not isinstance(offset, (int, float)) or int(offset) < 0:
+            raise GA4ValidationError("offset must be zero or positive")
+        if offset:
+            options["offset"] = int(offset)
+    return options
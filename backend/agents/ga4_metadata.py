@@ -0,0 +1,232 @@
+"""
+GA4 metadata catalog and pre-flight validation
+Caches get_metadata per property and checks report dimensions/metrics locally (legacy aliases,
+unknown names, request limits, incompatible scopes) before any report request is sent
+"""
+
+import asyncio
+import difflib
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from monitoring.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Universal Analytics / colloquial names the model tends to use
+LEGACY_ALIASES = {
+    "pageviews": "screenPageViews",
+    "pageViews": "screenPageViews",
+    "page_views": "screenPageViews",
+    "users": "activeUsers",
+    "new_users": "newUsers",
+    "bounce_rate": "bounceRate",
+    "avgSessionDuration": "averageSessionDuration",
+    "sessionDuration": "averageSessionDuration",
+    "source": "sessionSource",
+    "medium": "sessionMedium",
+    "channelGrouping": "sessionDefaultChannelGroup",
+    "defaultChannelGrouping": "sessionDefaultChannelGroup",
+    "landingPagePath": "landingPage",
+    "transactionRevenue": "purchaseRevenue",
+}
+
+# GA4 Data API limits per report request
+MAX_DIMENSIONS = 9
+MAX_METRICS = 10
+
+
+class GA4ValidationError(ValueError):
+    """A report request that GA4 would reject, caught before sending it."""
+
+    def __init__(self, message: str, invalid: List[str] = None, suggestions: Dict[str, List[str]] = None):
+        super().__init__(message)
+        self.invalid = invalid or []
+        self.suggestions = suggestions or {}
+
+
+_ITEM_SCOPED = re.compile(r"^items?[A-Z]")
+
+
+def _is_item_scoped(name: str) -> bool:
+    # item-scoped fields (itemName, itemRevenue, itemsViewed, ...) only combine with other item-scoped fields
+    return bool(_ITEM_SCOPED.match(name))
+
+
+class GA4MetadataCatalog:
+    """
+    Dimension and metric catalog per property, from get_metadata.
+
+    Each property's catalog (standard plus its custom definitions) is
+    cached for ttl seconds; concurrent first lookups share one request. When
+    the catalog cannot be loaded, validation falls back to alias mapping and
+    request limits only and GA4 remains the final judge. A failed load is
+    remembered for failure_ttl seconds so an outage doesn't put a metadata
+    request in front of every report.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Any]], ttl: float = 86400.0, failure_ttl: float = 60.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._catalogs: Dict[str, Tuple[float, Dict[str, Dict[str, str]]]] = {}
+        self._failures: Dict[str, Tuple[float, Exception]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.rejected = 0
+        self.rewritten = 0
+
+    @staticmethod
+    def _parse(metadata) -> Dict[str, Dict[str, str]]:
+        catalog = {"dimensions": {}, "metrics": {}, "deprecated": {}}
+        for kind, fields in (("dimensions", metadata.dimensions), ("metrics", metadata.metrics)):
+            for field in fields:
+                catalog[kind][field.api_name] = getattr(field, "category", "") or ""
+                for old_name in getattr(field, "deprecated_api_names", None) or []:
+                    catalog["deprecated"][old_name] = field.api_name
+        return catalog
+
+    async def get(self, property_id: str) -> Dict[str, Dict[str, str]]:
+        entry = self._catalogs.get(property_id)
+        if entry and entry[0] > time.monotonic():
+            CACHE_REQUESTS.labels("ga4_metadata", "hit").inc()
+            return entry[1]
+
+        failure = self._failures.get(property_id)
+        if failure and failure[0] > time.monotonic():
+            CACHE_REQUESTS.labels("ga4_metadata", "failure").inc()
+            raise failure[1]
+
+        CACHE_REQUESTS.labels("ga4_metadata", "miss").inc()
+        pending = self._inflight.get(property_id)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[property_id] = future
+        try:
+            catalog = self._parse(await self.fetch(property_id))
+            self._catalogs[property_id] = (time.monotonic() + self.ttl, catalog)
+            self._failures.pop(property_id, None)
+            future.set_result(catalog)
+            return catalog
+        except Exception as e:
+            self._failures[property_id] = (time.monotonic() + self.failure_ttl, e)
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._inflight[property_id]
+
+    def _resolve(self, name: str, known: Dict[str, str], catalog: Optional[Dict]) -> Optional[str]:
+        name = name.strip()
+        if name.startswith("ga:"):
+            name = name[3:]
+        if catalog is None:
+            return LEGACY_ALIASES.get(name, name)
+        if name in known:
+            return name
+        for candidate in (catalog["deprecated"].get(name), LEGACY_ALIASES.get(name)):
+            if candidate in known:
+                return candidate
+        lowered = {api_name.lower(): api_name for api_name in known}
+        return lowered.get(name.lower())
+
+    async def validate(self, property_id: str, dimensions: List[str],
+                       metrics: List[str]) -> Tuple[List[str], List[str], Dict[str, str]]:
+        """
+        Normalized (dimensions, metrics, rewrites) for a report request, where rewrites maps
+        each aliased name to the GA4 name used. Raises GA4ValidationError instead of sending
+        a request GA4 would reject.
+        """
+        try:
+            catalog = await self.get(property_id)
+        except Exception as e:
+            logger.warning(f"GA4 metadata unavailable for {property_id}, validating names by alias only: {e}")
+            catalog = None
+
+        resolved: Dict[str, List[str]] = {"dimensions": [], "metrics": []}
+        rewrites: Dict[str, str] = {}
+        invalid: List[str] = []
+        suggestions: Dict[str, List[str]] = {}
+        for kind, names in (("dimensions", dimensions), ("metrics", metrics)):
+            known = catalog[kind] if catalog else {}
+            for name in names:
+                api_name = self._resolve(name, known, catalog)
+                if api_name is None:
+                    invalid.append(name)
+                    # A metric passed as a dimension (or the reverse) is a common mix-up
+                    other = "metrics" if kind == "dimensions" else "dimensions"
+                    if catalog and self._resolve(name, catalog[other], catalog):
+                        suggestions[name] = [f"'{name}' is a {other[:-1]}, not a {kind[:-1]}"]
+                    else:
+                        suggestions[name] = difflib.get_close_matches(name, list(known), n=3, cutoff=0.6)
+                    continue
+                if api_name != name:
+                    rewrites[name] = api_name
+                if api_name not in resolved[kind]:
+                    resolved[kind].append(api_name)
+
+        problems = []
+        if invalid:
+            problems.append(f"Unknown GA4 field(s): {', '.join(invalid)}")
+        if not resolved["metrics"] and not invalid:
+            problems.append("At least one metric is required")
+        if len(resolved["dimensions"]) > MAX_DIMENSIONS:
+            problems.append(f"GA4 allows at most {MAX_DIMENSIONS} dimensions per report")
+        if len(resolved["metrics"]) > MAX_METRICS:
+            problems.append(f"GA4 allows at most {MAX_METRICS} metrics per report")
+        item_dimensions = [d for d in resolved["dimensions"] if _is_item_scoped(d)]
+        other_metrics = [m for m in resolved["metrics"] if not _is_item_scoped(m)]
+        if item_dimensions and other_metrics:
+            problems.append(
+                f"Item-scoped dimension(s) {', '.join(item_dimensions)} are incompatible with "
+                f"metric(s) {', '.join(other_metrics)}; use item metrics such as itemRevenue or itemsViewed"
+            )
+        if problems:
+            self.rejected += 1
+            raise GA4ValidationError("; ".join(problems), invalid, suggestions)
+
+        if rewrites:
+            self.rewritten += 1
+        return resolved["dimensions"], resolved["metrics"], rewrites
+
+    async def resolve_dimensions(self, property_id: str, names: List[str]) -> Dict[str, str]:
+        """
+        GA4 name for each dimension referenced outside the report's own dimensions
+        (e.g. in a dimension filter). Raises GA4ValidationError for unknown names.
+        """
+        try:
+            catalog = await self.get(property_id)
+        except Exception as e:
+            logger.warning(f"GA4 metadata unavailable for {property_id}, validating names by alias only: {e}")
+            catalog = None
+
+        known = catalog["dimensions"] if catalog else {}
+        resolved: Dict[str, str] = {}
+        suggestions: Dict[str, List[str]] = {}
+        for name in names:
+            api_name = self._resolve(name, known, catalog)
+            if api_name is None:
+                suggestions[name] = difflib.get_close_matches(name, list(known), n=3, cutoff=0.6)
+            else:
+                resolved[name] = api_name
+        if suggestions:
+            self.rejected += 1
+            invalid = list(suggestions)
+            raise GA4ValidationError(f"Unknown GA4 filter dimension(s): {', '.join(invalid)}", invalid, suggestions)
+        return resolved
+
+    def invalidate(self, property_id: str = None):
+        if property_id is None:
+            self._catalogs.clear()
+        else:
+            self._catalogs.pop(property_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "properties": len(self._catalogs),
+            "rejected": self.rejected,
+            "rewritten": self.rewritten,
+        }
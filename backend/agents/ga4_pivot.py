@@ -0,0 +1,121 @@
+"""
+GA4 pivot reports
+Builds RunPivotReportRequest pivots from simple specs and reshapes pivot responses into compact
+row x column tables, so multi-way breakdowns take one request instead of several flat reports
+"""
+
+import itertools
+from typing import Any, Dict, List, Tuple
+
+from agents.ga4_filters import MAX_LIMIT, requested_name, to_plain
+from agents.ga4_metadata import GA4ValidationError
+
+MAX_PIVOTS = 3
+DEFAULT_PIVOT_LIMIT = 10
+# batch_run_pivot_reports accepts at most this many requests per call
+MAX_BATCH_REPORTS = 5
+COLUMN_SEPARATOR = " / "
+
+
+def pivot_fields(pivots) -> List[List[str]]:
+    """Dimension names per pivot spec ([{"fields": [...], "limit", "order_by", "desc"}]), validated for shape."""
+    pivots = to_plain(pivots) if pivots is not None else []
+    if isinstance(pivots, dict):
+        pivots = [pivots]
+    if not pivots:
+        raise GA4ValidationError("A pivot report needs at least one pivot")
+    if len(pivots) > MAX_PIVOTS:
+        raise GA4ValidationError(f"At most {MAX_PIVOTS} pivots are supported")
+    fields = []
+    for pivot in pivots:
+        names = pivot.get("fields") if isinstance(pivot, dict) else None
+        if isinstance(names, str):
+            names = [names]
+        if not names:
+            raise GA4ValidationError("Each pivot needs 'fields' (one or more dimensions)")
+        fields.append(list(names))
+    flat = [name for names in fields for name in names]
+    if len(set(flat)) != len(flat):
+        raise GA4ValidationError("A dimension can appear in only one pivot")
+    return fields
+
+
+def build_pivots(pivots, resolved_fields: List[List[str]], metrics: List[str]) -> List[Dict[str, Any]]:
+    """
+    Pivot dicts for RunPivotReportRequest. Each pivot keeps its top `limit` values (default 10),
+    ordered by `order_by` (a metric or one of its own fields; default the first metric, descending).
+    """
+    pivots = to_plain(pivots)
+    if isinstance(pivots, dict):
+        pivots = [pivots]
+    built = []
+    row_budget = 1
+    for pivot, fields in zip(pivots, resolved_fields):
+        limit = pivot.get("limit", DEFAULT_PIVOT_LIMIT)
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)) or not 1 <= int(limit) <= MAX_LIMIT:
+            raise GA4ValidationError(f"Pivot limit must be between 1 and {MAX_LIMIT}")
+        row_budget *= int(limit)
+
+        order_by = pivot.get("order_by") or metrics[0]
+        metric = requested_name(order_by, metrics)
+        dimension = requested_name(order_by, fields)
+        # Top values first by default; dimension orderings are alphabetical
+        desc = bool(pivot.get("desc", metric is not None))
+        if metric:
+            ordering = {"metric": {"metric_name": metric}, "desc": desc}
+        elif dimension:
+            ordering = {"dimension": {"dimension_name": dimension}, "desc": desc}
+        else:
+            raise GA4ValidationError(
+                f"Cannot order pivot {', '.join(fields)} by '{order_by}': use a report metric or one of its fields"
+            )
+
+        entry = {"field_names": fields, "limit": int(limit), "order_bys": [ordering]}
+        offset = pivot.get("offset")
+        if offset:
+            entry["offset"] = int(offset)
+        built.append(entry)
+
+    # GA4 rejects pivot requests whose limits multiply past the row cap
+    if row_budget > MAX_LIMIT:
+        raise GA4ValidationError(f"Pivot limits multiply to {row_budget} rows; GA4 allows at most {MAX_LIMIT}")
+    return built
+
+
+def _header_labels(header) -> List[Tuple[str, ...]]:
+    return [tuple(v.value for v in h.dimension_values) for h in header.pivot_dimension_headers]
+
+
+def format_pivot_response(response, fields: List[List[str]], metrics: List[str],
+                          metric_number=float) -> Dict[str, Any]:
+    """
+    Compact table: one entry per value of the first pivot (the rows), with metric values keyed
+    by the combined label of the remaining pivots (the columns), in GA4's header order.
+    """
+    dimensions = [name for names in fields for name in names]
+    row_fields, column_fields = fields[0], [name for names in fields[1:] for name in names]
+    headers = list(response.pivot_headers)
+    row_keys = _header_labels(headers[0]) if headers else []
+    column_keys = [tuple(itertools.chain.from_iterable(combo))
+                   for combo in itertools.product(*(_header_labels(h) for h in headers[1:]))]
+    columns = [COLUMN_SEPARATOR.join(key) for key in column_keys] if column_fields else ["total"]
+
+    table: Dict[Tuple[str, ...], Dict[str, Dict[str, Any]]] = {key: {} for key in row_keys}
+    for row in response.rows:
+        values = dict(zip(dimensions, (v.value for v in row.dimension_values)))
+        row_key = tuple(values[d] for d in row_fields)
+        column = COLUMN_SEPARATOR.join(values[d] for d in column_fields) if column_fields else "total"
+        table.setdefault(row_key, {})[column] = {
+            metric: metric_number(row.metric_values[i].value) for i, metric in enumerate(metrics)
+        }
+
+    return {
+        "row_dimensions": row_fields,
+        "column_dimensions": column_fields,
+        "columns": columns,
+        "metrics": metrics,
+        "rows": [{**dict(zip(row_fields, key)), "values": cells} for key, cells in table.items()],
+        "row_count": len(response.rows),
+        # Distinct values per pivot before its limit, to tell when a pivot was truncated
+        "pivot_value_counts": [h.row_count for h in headers],
+    }
@@ -0,0 +1,224 @@
+"""
+GA4 quota-aware scheduling
+Tracks the property quota returned with each report, caps concurrent requests per property,
+serves interactive calls before background syncs and defers or degrades when tokens run low
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_PRIORITY = {INTERACTIVE: 0, BACKGROUND: 1}
+
+# Fields of PropertyQuota (each a QuotaStatus with consumed/remaining)
+QUOTA_FIELDS = (
+    "tokens_per_day",
+    "tokens_per_hour",
+    "tokens_per_project_per_hour",
+    "concurrent_requests",
+    "server_errors_per_project_per_hour",
+    "potentially_thresholded_requests_per_hour",
+)
+
+# Standard property limits; 360 properties have larger ones (remaining above the limit reads as full)
+DEFAULT_TOKEN_LIMITS = {
+    "tokens_per_day": 200000,
+    "tokens_per_hour": 40000,
+    "tokens_per_project_per_hour": 14000,
+}
+GA4_MAX_CONCURRENT_REQUESTS = 10
+
+
+class QuotaDeferredError(RuntimeError):
+    """A background request was held back to keep tokens for interactive use."""
+
+
+class QuotaExhaustedError(RuntimeError):
+    """The property has no tokens left in the current quota window."""
+
+
+class _PropertyState:
+    __slots__ = ("in_flight", "background_in_flight", "waiters", "quota", "updated_at",
+                 "calls", "deferred", "degraded", "exhausted")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.waiters: List[tuple] = []  # heap of (priority, seq, priority_name, future)
+        self.quota: Dict[str, Dict[str, int]] = {}
+        self.updated_at = 0.0  # monotonic
+        self.calls = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.deferred = 0
+        self.degraded = 0
+        self.exhausted = 0
+
+
+class GA4QuotaScheduler:
+    """
+    Admission control and ordering for GA4 calls, per property.
+
+    - At most max_concurrent requests run per property (GA4's concurrent
+      request quota); background calls may use at most background_max of them.
+    - Waiting interactive calls are always admitted before waiting background calls.
+    - After each response the returned property quota is recorded. When the
+      smallest remaining token share falls below background_reserve,
+      background calls are deferred (QuotaDeferredError); below degrade_below,
+      interactive callers are asked to degrade (should_degrade); at zero,
+      calls fail fast (QuotaExhaustedError).
+    - Quota readings older than state_ttl are ignored, so a window that has
+      reset is probed again instead of blocking forever.
+    """
+
+    def __init__(self, max_concurrent: int = GA4_MAX_CONCURRENT_REQUESTS, background_max: int = None,
+                 background_reserve: float = 0.2, degrade_below: float = 0.05, state_ttl: float = 300.0,
+                 token_limits: Dict[str, int] = None):
+        self.max_concurrent = max_concurrent
+        self.background_max = background_max if background_max is not None else max(1, max_concurrent // 2)
+        self.background_reserve = background_reserve
+        self.degrade_below = degrade_below
+        self.state_ttl = state_ttl
+        self.token_limits = token_limits or DEFAULT_TOKEN_LIMITS
+        self.properties: Dict[str, _PropertyState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, property_id: str) -> _PropertyState:
+        state = self.properties.get(property_id)
+        if state is None:
+            state = self.properties[property_id] = _PropertyState()
+        return state
+
+    # Quota tracking
+
+    def record(self, property_id: str, property_quota):
+        """Store the quota returned with a response (return_property_quota=True)."""
+        if property_quota is None:
+            return
+        state = self._state(property_id)
+        for field in QUOTA_FIELDS:
+            status = getattr(property_quota, field, None)
+            # Unset proto sub-messages read as 0/0; they carry no information
+            if status is None or not (status.consumed or status.remaining):
+                continue
+            state.quota[field] = {"consumed": int(status.consumed), "remaining": int(status.remaining)}
+        state.updated_at = time.monotonic()
+
+    def token_share(self, property_id: str) -> Optional[float]:
+        """Smallest remaining/limit across token quotas, or None when no fresh reading exists."""
+        state = self.properties.get(property_id)
+        if state is None or not state.quota or time.monotonic() - state.updated_at > self.state_ttl:
+            return None
+        shares = [
+            min(1.0, state.quota[field]["remaining"] / limit)
+            for field, limit in self.token_limits.items()
+            if field in state.quota and limit
+        ]
+        return min(shares) if shares else None
+
+    def admit(self, property_id: str, priority: str = INTERACTIVE):
+        """Raise when the call should not be sent now given the last known quota."""
+        share = self.token_share(property_id)
+        if share is None:
+            return
+        state = self._state(property_id)
+        if share <= 0:
+            state.exhausted += 1
+            raise QuotaExhaustedError(f"GA4 token quota exhausted for {property_id}; try again later")
+        if priority == BACKGROUND and share < self.background_reserve:
+            state.deferred += 1
+            raise QuotaDeferredError(
+                f"Deferring background GA4 request for {property_id}: {share:.0%} of tokens left"
+            )
+
+    def should_degrade(self, property_id: str) -> bool:
+        """Interactive callers should fall back to cheaper answers (cached data) when tokens are nearly gone."""
+        share = self.token_share(property_id)
+        if share is not None and share < self.degrade_below:
+            self._state(property_id).degraded += 1
+            return True
+        return False
+
+    # Concurrency and ordering
+
+    def _can_start(self, state: _PropertyState, priority: str) -> bool:
+        if state.in_flight >= self.max_concurrent:
+            return False
+        return priority != BACKGROUND or state.background_in_flight < self.background_max
+
+    def _start(self, state: _PropertyState, priority: str):
+        state.in_flight += 1
+        state.calls[priority] += 1
+        if priority == BACKGROUND:
+            state.background_in_flight += 1
+
+    def _wake(self, state: _PropertyState):
+        # Admit waiters in priority order; a background waiter blocked by its own cap
+        # must not hold up interactive waiters queued behind it
+        skipped = []
+        while state.waiters and state.in_flight < self.max_concurrent:
+            entry = heapq.heappop(state.waiters)
+            _, _, priority, future = entry
+            if future.done():
+                continue
+            if not self._can_start(state, priority):
+                skipped.append(entry)
+                continue
+            self._start(state, priority)
+            future.set_result(None)
+        for entry in skipped:
+            heapq.heappush(state.waiters, entry)
+
+    @asynccontextmanager
+    async def slot(self, property_id: str, priority: str = INTERACTIVE):
+        state = self._state(property_id)
+        queued_ahead = any(not f.done() and p <= _PRIORITY[priority] for p, _, _, f in state.waiters)
+        if not queued_ahead and self._can_start(state, priority):
+            self._start(state, priority)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(state.waiters, (_PRIORITY[priority], next(self._seq), priority, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Admitted just as we were cancelled: give the slot back
+                    self._release(state, priority)
+                raise
+        try:
+            yield
+        finally:
+            self._release(state, priority)
+
+    def _release(self, state: _PropertyState, priority: str):
+        state.in_flight -= 1
+        if priority == BACKGROUND:
+            state.background_in_flight -= 1
+        self._wake(state)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "max_concurrent": self.max_concurrent,
+            "background_max": self.background_max,
+            "properties": {
+                property_id: {
+                    "in_flight": state.in_flight,
+                    "queued": sum(1 for *_, f in state.waiters if not f.done()),
+                    "calls": dict(state.calls),
+                    "deferred": state.deferred,
+                    "degraded": state.degraded,
+                    "exhausted": state.exhausted,
+                    "token_share": self.token_share(property_id),
+                    "quota": state.quota,
+                    "quota_age_seconds": round(now - state.updated_at, 1) if state.updated_at else None,
+                }
+                for property_id, state in self.properties.items()
+            },
+        }
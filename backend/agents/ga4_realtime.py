@@ -0,0 +1,153 @@
+"""
+Shared GA4 realtime polling
+One realtime report per property per interval, shared by every caller and fanned out to
+streaming (SSE) subscribers
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+FetchFn = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class _PropertyPoller:
+    __slots__ = ("snapshot", "fetched_at", "inflight", "subscribers", "task", "fetches", "served", "errors")
+
+    def __init__(self):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0  # monotonic
+        self.inflight: Optional[asyncio.Task] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.served = 0
+        self.errors = 0
+
+
+class RealtimeHub:
+    """
+    Per-property realtime snapshots shared across callers.
+
+    latest() returns the property's snapshot while it is younger than
+    interval; otherwise one fetch runs and concurrent callers wait on it.
+    While a property has subscribers, a poller refreshes it every interval
+    and pushes each snapshot to every subscriber queue (latest wins, so a
+    slow reader never builds a backlog). The poller stops with the last
+    subscriber.
+    """
+
+    def __init__(self, fetch: FetchFn, interval: float = 10.0):
+        self.fetch = fetch
+        self.interval = interval
+        self.properties: Dict[str, _PropertyPoller] = {}
+
+    def _poller(self, property_id: str) -> _PropertyPoller:
+        poller = self.properties.get(property_id)
+        if poller is None:
+            poller = self.properties[property_id] = _PropertyPoller()
+        return poller
+
+    async def latest(self, property_id: str) -> Dict[str, Any]:
+        poller = self._poller(property_id)
+        if poller.snapshot is not None and time.monotonic() - poller.fetched_at < self.interval:
+            poller.served += 1
+            return poller.snapshot
+        return await self._refresh(property_id, poller)
+
+    async def _refresh(self, property_id: str, poller: _PropertyPoller) -> Dict[str, Any]:
+        # The fetch runs as its own task so a cancelled caller (or poller) doesn't cancel it for the others
+        if poller.inflight is None:
+            poller.inflight = asyncio.create_task(self._fetch(property_id, poller))
+            poller.inflight.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            poller.served += 1
+        return await asyncio.shield(poller.inflight)
+
+    async def _fetch(self, property_id: str, poller: _PropertyPoller) -> Dict[str, Any]:
+        poller.fetches += 1
+        try:
+            data = await self.fetch(property_id)
+        except Exception:
+            poller.errors += 1
+            raise
+        finally:
+            poller.inflight = None
+        snapshot = {**data, "fetched_at": datetime.now(timezone.utc).isoformat()}
+        poller.snapshot = snapshot
+        poller.fetched_at = time.monotonic()
+        self._publish(poller, snapshot)
+        return snapshot
+
+    @staticmethod
+    def _publish(poller: _PropertyPoller, event: Dict[str, Any]):
+        for queue in poller.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def subscribe(self, property_id: str, heartbeat: float = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield every new snapshot for the property until the consumer stops iterating.
+        With heartbeat set, None is yielded after that many idle seconds (for keep-alives).
+        """
+        poller = self._poller(property_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        poller.subscribers.add(queue)
+        if poller.snapshot is not None:
+            queue.put_nowait(poller.snapshot)
+        if poller.task is None:
+            poller.task = asyncio.create_task(self._poll(property_id, poller))
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            poller.subscribers.discard(queue)
+            if not poller.subscribers and poller.task is not None:
+                poller.task.cancel()
+                poller.task = None
+
+    async def _poll(self, property_id: str, poller: _PropertyPoller):
+        while poller.subscribers:
+            wait = self.interval - (time.monotonic() - poller.fetched_at)
+            if poller.snapshot is None or wait <= 0:
+                try:
+                    await self._refresh(property_id, poller)
+                except Exception as e:
+                    logger.warning(f"Realtime poll for {property_id} failed: {e}")
+                    self._publish(poller, {"property_id": property_id, "error": str(e)})
+                wait = self.interval
+            await asyncio.sleep(wait)
+
+    async def stop(self):
+        for poller in self.properties.values():
+            if poller.task is not None:
+                poller.task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await poller.task
+                poller.task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "interval": self.interval,
+            "properties": {
+                property_id: {
+                    "subscribers": len(poller.subscribers),
+                    "polling": poller.task is not None,
+                    "fetches": poller.fetches,
+                    "served_shared": poller.served,
+                    "errors": poller.errors,
+                    "age_seconds": round(now - poller.fetched_at, 1) if poller.snapshot is not None else None,
+                }
+                for property_id, poller in self.properties.items()
+            },
+        }
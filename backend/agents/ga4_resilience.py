@@ -0,0 +1,185 @@
+"""
+GA4 call resilience
+Classified retries with exponential backoff and full jitter, per-call deadlines and a
+per-property circuit breaker that fails fast while GA4 is unhealthy
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from monitoring.metrics import GA4_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# gRPC statuses worth retrying; everything else (INVALID_ARGUMENT, PERMISSION_DENIED, ...) fails at once
+TRANSIENT_STATUSES = ("UNAVAILABLE", "RESOURCE_EXHAUSTED", "DEADLINE_EXCEEDED")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """GA4 failed repeatedly for this property; calls fail fast until the breaker half-opens."""
+
+    def __init__(self, property_id: str, retry_after: float):
+        super().__init__(
+            f"GA4 is temporarily unavailable for {property_id}; not retrying for {retry_after:.0f}s"
+        )
+        self.property_id = property_id
+        self.retry_after = retry_after
+
+
+def transient_status(error: BaseException) -> Optional[str]:
+    """The gRPC status name when error is a transient GA4 failure, otherwise None."""
+    # google.api_core exceptions carry grpc_status_code; raw grpc.RpcError exposes code()
+    code = getattr(error, "grpc_status_code", None)
+    if code is None and callable(getattr(error, "code", None)):
+        try:
+            code = error.code()
+        except Exception:
+            code = None
+    name = getattr(code, "name", None)
+    if name in TRANSIENT_STATUSES:
+        return name
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return "DEADLINE_EXCEEDED"
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one property.
+
+    Opens after failure_threshold transient failures in a row. While open,
+    calls raise CircuitOpenError without reaching GA4. After reset_timeout a
+    single probe call is let through (half-open): success closes the
+    breaker, another transient failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0  # monotonic
+        self.short_circuited = 0
+        self.times_opened = 0
+        self._probing = False
+
+    def before_call(self, property_id: str):
+        if self.state == CLOSED:
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == OPEN and elapsed >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.short_circuited += 1
+        raise CircuitOpenError(property_id, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_neutral(self):
+        """The call ended for a reason that says nothing about GA4's health (bad request, quota held back, cancelled)."""
+        self._probing = False
+
+
+class GA4Resilience:
+    """
+    Retry policy and circuit breakers for GA4 calls.
+
+    call() runs attempt(timeout) up to max_attempts times. Each attempt gets
+    attempt_timeout seconds, capped by what is left of the overall deadline.
+    Only transient statuses are retried, after a full-jitter backoff
+    (uniform between 0 and base_delay * 2^attempt, capped at max_delay), and
+    never past the deadline.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 attempt_timeout: float = 30.0, deadline: float = 60.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 rng: Callable[[], float] = random.random):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rng = rng
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.gave_up = 0
+
+    def breaker(self, property_id: str) -> CircuitBreaker:
+        breaker = self.breakers.get(property_id)
+        if breaker is None:
+            breaker = self.breakers[property_id] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        return self.rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    async def call(self, property_id: str, method: str, attempt: Callable[[float], Awaitable[Any]]) -> Any:
+        breaker = self.breaker(property_id)
+        started = time.monotonic()
+        for number in range(self.max_attempts):
+            breaker.before_call(property_id)
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                result = await attempt(max(0.001, min(self.attempt_timeout, remaining)))
+            except Exception as e:
+                status = transient_status(e)
+                if status is None:
+                    breaker.record_neutral()
+                    raise
+                breaker.record_failure()
+                delay = self.backoff(number)
+                elapsed = time.monotonic() - started
+                if number + 1 >= self.max_attempts or elapsed + delay >= self.deadline:
+                    self.gave_up += 1
+                    logger.warning(f"GA4 {method} for {property_id} failed with {status} after {number + 1} attempts")
+                    raise
+                self.retries += 1
+                GA4_RETRIES.labels(method, status).inc()
+                logger.info(f"GA4 {method} for {property_id}: {status}, retry {number + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (client gone, poller stopped, outer timeout): release a half-open probe
+                breaker.record_neutral()
+                raise
+            breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "breakers": {
+                property_id: {
+                    "state": breaker.state,
+                    "failures": breaker.failures,
+                    "times_opened": breaker.times_opened,
+                    "short_circuited": breaker.short_circuited,
+                }
+                for property_id, breaker in self.breakers.items()
+            },
+        }
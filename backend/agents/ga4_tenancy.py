@@ -0,0 +1,249 @@
+"""
+GA4 multi-tenancy
+Per-user property resolution (cached), GA4 clients pooled by credential identity and
+per-tenant concurrency limits
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from monitoring.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+DEFAULT_IDENTITY = "default"
+
+PROPERTY_QUERY = """
+    SELECT property_id, tenant_id, credentials_ref, is_default
+    FROM user_ga4_properties
+    WHERE user_id = :user_id
+    ORDER BY is_default DESC, created_at
+"""
+
+
+class PropertyAccessError(PermissionError):
+    """The user asked for a GA4 property they are not linked to."""
+
+
+class TenantBusyError(RuntimeError):
+    """A tenant's GA4 concurrency slots stayed full past the acquire timeout."""
+
+
+class PropertyAccess:
+    """One user → GA4 property link (see migration 004)."""
+
+    __slots__ = ("property_id", "tenant_id", "credentials_ref", "is_default")
+
+    def __init__(self, property_id: str, tenant_id: str = None, credentials_ref: str = None,
+                 is_default: bool = False):
+        self.property_id = property_id
+        self.tenant_id = tenant_id or DEFAULT_TENANT
+        self.credentials_ref = credentials_ref or None
+        self.is_default = bool(is_default)
+
+    def __repr__(self) -> str:
+        return f"PropertyAccess({self.property_id!r}, tenant={self.tenant_id!r})"
+
+
+class PropertyResolver:
+    """
+    Resolves which GA4 properties a user may query.
+
+    Links are read from user_ga4_properties and cached per user for ttl
+    seconds (LRU-bounded). Concurrent lookups for the same user share one
+    database query.
+    """
+
+    def __init__(self, database, ttl: float = 300.0, max_users: int = 10000):
+        self.database = database
+        self.ttl = ttl
+        self.max_users = max_users
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # user_id -> (expires_at, [PropertyAccess])
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def properties_for(self, user_id: str) -> List[PropertyAccess]:
+        key = str(user_id)
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.labels("ga4_property_resolver", "hit").inc()
+            return entry[1]
+
+        self.misses += 1
+        CACHE_REQUESTS.labels("ga4_property_resolver", "miss").inc()
+        pending = self._inflight.get(key)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            rows = await self.database.fetch_all(PROPERTY_QUERY, {"user_id": key})
+            links = [
+                PropertyAccess(row["property_id"], row["tenant_id"], row["credentials_ref"], row["is_default"])
+                for row in rows
+            ]
+            self._cache[key] = (time.monotonic() + self.ttl, links)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_users:
+                self._cache.popitem(last=False)
+            future.set_result(links)
+            return links
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def resolve(self, user_id: Optional[str], property_id: str = None) -> Optional[PropertyAccess]:
+        """
+        The user's link for property_id, or their default property when none is given.
+        Returns None for users with no links (the agent's configured property applies).
+        """
+        if not user_id:
+            return None
+        links = await self.properties_for(user_id)
+        if property_id:
+            for link in links:
+                if link.property_id == property_id:
+                    return link
+            raise PropertyAccessError(f"Property {property_id} is not linked to this account")
+        return links[0] if links else None
+
+    def invalidate(self, user_id: str = None):
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(str(user_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "cached_users": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+
+@lru_cache(maxsize=256)
+def credential_identity(credentials_ref: Optional[str]) -> str:
+    """
+    Stable identity for a credentials reference: the service account email when it can be
+    read (inline JSON or a key file path), so different refs to one account share a client.
+    """
+    if not credentials_ref:
+        return DEFAULT_IDENTITY
+    try:
+        if credentials_ref.lstrip().startswith("{"):
+            info = json.loads(credentials_ref)
+        else:
+            with open(credentials_ref) as f:
+                info = json.load(f)
+        return info.get("client_email") or credentials_ref
+    except (OSError, ValueError):
+        return credentials_ref
+
+
+class GA4ClientPool:
+    """
+    One BetaAnalyticsDataClient per credential identity.
+
+    Each client holds its own gRPC channel and token, so tenants that share
+    a service account share both. Clients are built by client_factory(ref)
+    on first use; lookups after that are a dict hit.
+    """
+
+    def __init__(self, client_factory: Callable[[Optional[str]], Any]):
+        self.client_factory = client_factory
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()  # clients are created from worker threads
+
+    def register(self, identity: str, client):
+        self._clients[identity] = client
+
+    def get(self, credentials_ref: Optional[str] = None):
+        identity = credential_identity(credentials_ref)
+        client = self._clients.get(identity)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(identity)
+                if client is None:
+                    logger.info(f"Creating GA4 client for credential identity {identity}")
+                    client = self._clients[identity] = self.client_factory(credentials_ref)
+        return client
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"clients": len(self._clients), "identities": sorted(self._clients)}
+
+
+class _TenantState:
+    __slots__ = ("semaphore", "in_flight", "waiting", "peak", "rejected", "calls")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak = 0
+        self.rejected = 0
+        self.calls = 0
+
+
+class TenantLimiter:
+    """
+    Caps concurrent GA4 calls per tenant so one heavy tenant cannot hold every
+    worker thread and channel while others queue behind it.
+    """
+
+    def __init__(self, max_concurrent: int = 4, acquire_timeout: float = 30.0):
+        self.max_concurrent = max_concurrent
+        self.acquire_timeout = acquire_timeout
+        self.tenants: Dict[str, _TenantState] = {}
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str = DEFAULT_TENANT):
+        state = self.tenants.get(tenant_id)
+        if state is None:
+            state = self.tenants[tenant_id] = _TenantState(self.max_concurrent)
+
+        state.waiting += 1
+        try:
+            await asyncio.wait_for(state.semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            state.rejected += 1
+            raise TenantBusyError(
+                f"Too many concurrent GA4 requests for tenant {tenant_id}; try again shortly"
+            ) from None
+        finally:
+            state.waiting -= 1
+
+        state.in_flight += 1
+        state.calls += 1
+        state.peak = max(state.peak, state.in_flight)
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+            state.semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "tenants": {
+                tenant: {"in_flight": s.in_flight, "waiting": s.waiting, "peak": s.peak,
+                         "calls": s.calls, "rejected": s.rejected}
+                for tenant, s in self.tenants.items()
+            },
+        }
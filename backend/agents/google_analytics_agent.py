@@ -4,17 +4,31 @@ Handles Google Analytics 4 data retrieval and analysis
 """
 
 import os
+import asyncio
 import json
 import logging
+import time
+from contextlib import nullcontext
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
-# Google Analytics imports
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
-from google.oauth2 import service_account
-
 from agents.base_agent import BaseAgent
+from agents.ga4_analytics import ReportStore, analyze_report_series
+from agents.ga4_day_cache import GA4_DEFAULT_ROW_LIMIT, GA4DayCache, GA4RangeTotals
+from agents.ga4_fact_store import ADDITIVE_METRICS, resolve_date
+from agents.ga4_filters import build_report_options, dimension_filter_fields
+from agents.ga4_metadata import GA4MetadataCatalog, GA4ValidationError
+from agents.ga4_pivot import MAX_BATCH_REPORTS, build_pivots, format_pivot_response, pivot_fields
+from agents.ga4_quota import INTERACTIVE, QuotaDeferredError
+from agents.ga4_realtime import RealtimeHub
+from agents.ga4_resilience import CircuitOpenError, GA4Resilience, transient_status
+from agents.ga4_tenancy import DEFAULT_TENANT, GA4ClientPool, PropertyAccess
+from lazy_imports import LazyModule
+from monitoring.metrics import CACHE_REQUESTS, GA4_REQUEST_DURATION, GA4_REQUESTS
+
+# Google Analytics imports (loaded on first use, see lazy_imports)
+data_api = LazyModule("google.analytics.data_v1beta")
+service_account = LazyModule("google.oauth2.service_account")
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +44,43 @@ class GoogleAnalyticsAgent(BaseAgent):
         # GA4 client will be initialized in _initialize()
         self.ga_client = None
         self.default_property_id = None
+        # Optional GA4FactStore; attached at startup when the fact store is enabled
+        self.fact_store = None
+        # Multi-tenancy: per-property links bound per query, pooled tenant clients, optional TenantLimiter
+        self.client_pool = GA4ClientPool(self._create_client)
+        self.tenant_limiter = None
+        self._properties: Dict[str, PropertyAccess] = {}
+        # Optional GA4QuotaScheduler: per-property concurrency, priorities and quota tracking
+        self.quota_scheduler = None
+        # Retries with backoff, per-call deadlines and per-property circuit breakers
+        from config import settings
+        self.resilience = GA4Resilience(
+            max_attempts=settings.ga4_retry_max_attempts,
+            base_delay=settings.ga4_retry_base_delay,
+            max_delay=settings.ga4_retry_max_delay,
+            attempt_timeout=settings.ga4_call_timeout,
+            deadline=settings.ga4_call_deadline,
+            failure_threshold=settings.ga4_circuit_failure_threshold,
+            reset_timeout=settings.ga4_circuit_reset_timeout,
+        )
+        # Date-dimensioned report rows per day, so overlapping ranges only fetch the days they don't share
+        self.day_cache = GA4DayCache(
+            max_days=settings.ga4_day_cache_max_days,
+            final_after_days=settings.ga4_fact_final_after_days,
+            recent_ttl=settings.ga4_day_cache_recent_ttl,
+        ) if settings.ga4_day_cache_enabled else None
+        # Non-additive totals for final ranges, so rows served locally don't need a totals request each time
+        self.range_totals = GA4RangeTotals(
+            max_ranges=settings.ga4_range_totals_max,
+            final_after_days=settings.ga4_fact_final_after_days,
+        )
+        # Dimension/metric catalog per property for pre-flight validation of report requests
+        self.metadata = GA4MetadataCatalog(self._fetch_metadata, ttl=settings.ga4_metadata_cache_ttl,
+                                           failure_ttl=settings.ga4_metadata_failure_ttl)
+        # One realtime report per property per interval, shared by all callers and stream subscribers
+        self.realtime = RealtimeHub(self._fetch_realtime, interval=settings.ga4_realtime_interval)
+        # Recent interactive reports by handle, for analyze_report
+        self.reports = ReportStore(max_reports=settings.ga4_report_handles_max, ttl=settings.ga4_report_handle_ttl)
         
         super().__init__(
             agent_name="Google Analytics Agent",
@@ -90,7 +141,8 @@ class GoogleAnalyticsAgent(BaseAgent):
                     )
                     logger.info(f"Google Analytics client initialized with service account file: {service_account_file}")
             
-            self.ga_client = BetaAnalyticsDataClient(credentials=credentials)
+            self.ga_client = data_api.BetaAnalyticsDataClient(credentials=credentials)
+            self.credentials = credentials
             
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in service account credentials: {str(e)}")
@@ -103,6 +155,73 @@ class GoogleAnalyticsAgent(BaseAgent):
                 "You'll need to provide property_id parameter for each request."
             )
     
+    def _create_client(self, credentials_ref: str):
+        """GA4 client for a tenant's own service account (inline JSON or key file path)"""
+        scopes = ['https://www.googleapis.com/auth/analytics.readonly']
+        if credentials_ref.lstrip().startswith('{'):
+            credentials = service_account.Credentials.from_service_account_info(json.loads(credentials_ref), scopes=scopes)
+        else:
+            credentials = service_account.Credentials.from_service_account_file(credentials_ref, scopes=scopes)
+        return data_api.BetaAnalyticsDataClient(credentials=credentials)
+    
+    def bind_property(self, access: PropertyAccess):
+        """Route calls for access.property_id through its tenant's client and concurrency limit"""
+        self._properties[access.property_id] = access
+    
+    def _client_for(self, property_id: str):
+        access = self._properties.get(property_id)
+        if access is None or access.credentials_ref is None:
+            return self.ga_client
+        return self.client_pool.get(access.credentials_ref)
+    
+    async def _run_ga4(self, method: str, request, priority: str = INTERACTIVE):
+        """Run a GA4 call, retrying transient failures within the property's circuit breaker"""
+        if self.resilience is None:
+            return await self._run_ga4_once(method, request, priority)
+        property_id = getattr(request, "property", "")
+        return await self.resilience.call(
+            property_id, method, lambda timeout: self._run_ga4_once(method, request, priority, timeout)
+        )
+    
+    async def _run_ga4_once(self, method: str, request, priority: str = INTERACTIVE, timeout: float = None):
+        """
+        One GA4 attempt in a worker thread, within the tenant's concurrency limit and the
+        property's quota scheduler (which also records the quota returned with the response)
+        """
+        property_id = getattr(request, "property", "")
+        access = self._properties.get(property_id)
+        tenant = access.tenant_id if access else DEFAULT_TENANT
+        tenant_slot = self.tenant_limiter.slot(tenant) if self.tenant_limiter else nullcontext()
+        scheduler = self.quota_scheduler
+        if scheduler:
+            scheduler.admit(property_id, priority)
+        quota_slot = scheduler.slot(property_id, priority) if scheduler else nullcontext()
+        
+        async with tenant_slot, quota_slot:
+            call = asyncio.to_thread(self._call_ga4, method, request, timeout)
+            # The gRPC deadline ends the call; wait_for is a backstop for a hung channel
+            response = await (asyncio.wait_for(call, timeout + 1) if timeout else call)
+        
+        # Realtime API quota is metered apart from core reports, so it must not replace the core reading
+        if scheduler and method != "run_realtime_report" and getattr(request, "return_property_quota", False):
+            scheduler.record(property_id, getattr(response, "property_quota", None))
+        return response
+    
+    def _handle_error(self, operation: str, error: Exception) -> Dict[str, Any]:
+        """Flag transient failures (already retried) and explain rejected fields, so callers know whether to retry"""
+        result = super()._handle_error(operation, error)
+        if isinstance(error, GA4ValidationError):
+            result["validation_error"] = True
+            result["invalid_fields"] = error.invalid
+            if any(error.suggestions.values()):
+                result["suggestions"] = error.suggestions
+        elif isinstance(error, CircuitOpenError):
+            result["transient"] = True
+            result["retry_after_seconds"] = round(error.retry_after)
+        elif transient_status(error):
+            result["transient"] = True
+        return result
+    
     async def health_check(self) -> Dict[str, Any]:
         """Perform health check by testing GA4 API connection"""
         try:
@@ -119,15 +238,17 @@ class GoogleAnalyticsAgent(BaseAgent):
             # Try a simple API call
             yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
             
-            request = RunReportRequest(
+            request = data_api.RunReportRequest(
                 property=self.default_property_id,
-                dimensions=[Dimension(name="date")],
-                metrics=[Metric(name="sessions")],
-                date_ranges=[DateRange(start_date=yesterday, end_date=yesterday)],
-                limit=1
+                dimensions=[data_api.Dimension(name="date")],
+                metrics=[data_api.Metric(name="sessions")],
+                date_ranges=[data_api.DateRange(start_date=yesterday, end_date=yesterday)],
+                limit=1,
+                return_property_quota=True
             )
             
-            response = self.ga_client.run_report(request=request)
+            # Off the event loop so callers' timeouts can actually fire
+            response = await asyncio.to_thread(self._call_ga4, "run_report", request)
             
             return {
                 "status": "healthy",
@@ -143,12 +264,42 @@ class GoogleAnalyticsAgent(BaseAgent):
                 "property_id": self.default_property_id
             }
     
+    async def warm_up(self) -> Dict[str, Any]:
+        """Fetch an access token and open the gRPC channel with a metadata request (no report quota)"""
+        if not self.ga_client:
+            return {"status": "skipped", "message": "GA4 client not initialized"}
+        if not self.default_property_id:
+            return {"status": "skipped", "message": "No default GA4 property configured"}
+        
+        # Also primes the metadata catalog used to validate report requests
+        await self.metadata.get(self.default_property_id)
+        return {"status": "ok"}
+    
+    async def _fetch_metadata(self, property_id: str):
+        """Dimension and metric catalog (standard and custom) for a property"""
+        request = data_api.GetMetadataRequest(name=f"{property_id}/metadata")
+        if self.resilience is None:
+            return await asyncio.to_thread(self._call_ga4, "get_metadata", request)
+        # Within the property's circuit breaker, so an outage fails fast here too
+        return await self.resilience.call(
+            property_id, "get_metadata",
+            lambda timeout: asyncio.to_thread(self._call_ga4, "get_metadata", request, timeout)
+        )
+    
     async def get_ga4_report(self, 
                            start_date: str, 
                            end_date: str,
                            dimensions: List[str] = None,
                            metrics: List[str] = None,
-                           property_id: str = None) -> Dict[str, Any]:
+                           property_id: str = None,
+                           use_fact_store: bool = True,
+                           use_day_cache: bool = True,
+                           priority: str = INTERACTIVE,
+                           dimension_filter: List[Dict[str, Any]] = None,
+                           metric_filter: List[Dict[str, Any]] = None,
+                           order_bys: List[Dict[str, Any]] = None,
+                           limit: int = None,
+                           offset: int = None) -> Dict[str, Any]:
         """
         Get a comprehensive GA4 report
         
@@ -156,8 +307,18 @@ class GoogleAnalyticsAgent(BaseAgent):
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             dimensions: List of dimensions (default: ['date'])
-            metrics: List of metrics (default: ['sessions', 'pageviews'])
+            metrics: List of metrics (default: ['sessions', 'screenPageViews']; legacy names like 'pageviews' are mapped)
             property_id: GA4 property ID (uses default if not provided)
+            use_fact_store: Answer final days from the local fact store when attached
+            use_day_cache: Reuse cached days of date-dimensioned reports (False always asks GA4)
+            priority: "interactive" (user-facing) or "background" (syncs; deferred when tokens run low)
+            dimension_filter: Conditions on dimensions, ANDed and applied by GA4 before aggregation
+                ([{"field", "match", "value" or "values", "case_sensitive", "exclude"}], see ga4_filters)
+            metric_filter: Conditions on the report's metrics, applied after aggregation
+                ([{"field", "operator", "value", "to"}])
+            order_bys: Sort order ([{"field", "desc"}]) over the report's dimensions/metrics
+            limit: Maximum rows to return (1-250000)
+            offset: Rows to skip, for paging through large reports
         """
         try:
             if not self.ga_client:
@@ -176,41 +337,38 @@ class GoogleAnalyticsAgent(BaseAgent):
                     "No GA4 property ID available. Set GA4_PROPERTY_ID environment variable or provide property_id parameter."
                 ))
             
-            # Create the request
-            request = RunReportRequest(
-                property=property_id,
-                dimensions=[Dimension(name=dim) for dim in dimensions],
-                metrics=[Metric(name=metric) for metric in metrics],
-                date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-            )
-            
-            # Execute the request
-            response = self.ga_client.run_report(request=request)
-            
-            # Process the response
-            rows = []
-            for row in response.rows:
-                row_data = {}
-                
-                # Add dimensions
-                for i, dim in enumerate(dimensions):
-                    row_data[dim] = row.dimension_values[i].value
-                
-                # Add metrics
-                for i, metric in enumerate(metrics):
-                    try:
-                        value = float(row.metric_values[i].value)
-                        row_data[metric] = int(value) if value.is_integer() else value
-                    except (ValueError, AttributeError):
-                        row_data[metric] = row.metric_values[i].value
-                
-                rows.append(row_data)
-            
-            # Calculate totals
-            totals = {}
-            for metric in metrics:
-                total = sum(row.get(metric, 0) for row in rows if isinstance(row.get(metric), (int, float)))
-                totals[metric] = total
+            # Reject or correct field names locally instead of spending a GA4 round trip on the error
+            dimensions, metrics, rewrites = await self.metadata.validate(property_id, dimensions, metrics)
+            filter_dimensions = await self.metadata.resolve_dimensions(property_id,
+                                                                       dimension_filter_fields(dimension_filter))
+            options = build_report_options(dimensions, metrics, lambda name: filter_dimensions[name],
+                                           dimension_filter, metric_filter, order_bys, limit, offset)
+            
+            # Filtered, ordered or paged reports are answered by GA4 itself; the local stores hold full reports only
+            store_can_serve = (not options and use_fact_store and self.fact_store
+                               and self.fact_store.can_serve(dimensions, metrics))
+            degraded_note = None
+            rows = None
+            available_rows = None
+            aggregates = None
+            if options:
+                rows, available_rows, aggregates = await self._run_report(
+                    property_id, start_date, end_date, dimensions, metrics, priority, options)
+            if (store_can_serve and priority == INTERACTIVE and self.quota_scheduler
+                    and self.quota_scheduler.should_degrade(property_id)):
+                rows, degraded_note = await self._get_degraded_rows(property_id, start_date, end_date, dimensions, metrics)
+            if rows is None and store_can_serve:
+                rows = await self._get_rows_with_fact_store(property_id, start_date, end_date, dimensions, metrics, priority)
+            elif rows is None and use_day_cache and self.day_cache and 'date' in dimensions and not options:
+                rows = await self._fetch_report_rows(property_id, start_date, end_date, dimensions, metrics, priority)
+            elif rows is None:
+                rows, available_rows, aggregates = await self._run_report(
+                    property_id, start_date, end_date, dimensions, metrics, priority)
+            
+            # Totals, minimums and maximums come from GA4 (metric_aggregations) unless the rows were assembled locally
+            if aggregates is None:
+                aggregates = await self._local_aggregates(property_id, start_date, end_date, metrics, rows, priority,
+                                                          remote_totals=degraded_note is None)
             
             result = {
                 "property_id": property_id,
@@ -219,14 +377,426 @@ class GoogleAnalyticsAgent(BaseAgent):
                 "metrics": metrics,
                 "row_count": len(rows),
                 "data": rows,
-                "totals": totals
+                "totals": aggregates["totals"],
+                "minimums": aggregates["minimums"],
+                "maximums": aggregates["maximums"]
             }
+            if options:
+                result["total_row_count"] = available_rows
+                result["query_options"] = {k: v for k, v in {
+                    "dimension_filter": dimension_filter, "metric_filter": metric_filter,
+                    "order_bys": order_bys, "limit": limit, "offset": offset,
+                }.items() if v is not None}
+            if rewrites:
+                result["field_rewrites"] = rewrites
+            if degraded_note:
+                result["degraded"] = True
+                result["note"] = degraded_note
+                missing_totals = [m for m in metrics if m not in aggregates["totals"]]
+                if missing_totals:
+                    result["totals_unavailable"] = missing_totals
+            if priority == INTERACTIVE:
+                result["report_handle"] = self.reports.put(result)
             
             return self._format_success_response(result, "get_ga4_report")
             
+        except QuotaDeferredError as e:
+            error = self._handle_error("get_ga4_report", e)
+            error["deferred"] = True
+            return error
         except Exception as e:
             return self._handle_error("get_ga4_report", e)
     
+    def _call_ga4(self, method: str, request, timeout: float = None):
+        """Call a GA4 Data API method, recording latency and outcome per method/property"""
+        property_id = getattr(request, "property", "") or getattr(request, "name", "").split("/metadata")[0]
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            kwargs = {"timeout": timeout} if timeout else {}
+            response = getattr(self._client_for(property_id), method)(request=request, **kwargs)
+            outcome = "ok"
+            return response
+        finally:
+            GA4_REQUEST_DURATION.labels(method, property_id).observe(time.perf_counter() - started)
+            GA4_REQUESTS.labels(method, property_id, outcome).inc()
+    
+    async def _run_report_rows(self,
+                         property_id: str,
+                         start_date: str,
+                         end_date: str,
+                         dimensions: List[str],
+                         metrics: List[str],
+                         priority: str = INTERACTIVE) -> List[Dict[str, Any]]:
+        """Run a GA4 report and return its rows as dicts keyed by dimension/metric name"""
+        rows, _, _ = await self._run_report(property_id, start_date, end_date, dimensions, metrics, priority)
+        return rows
+    
+    async def _run_report(self,
+                          property_id: str,
+                          start_date: str,
+                          end_date: str,
+                          dimensions: List[str],
+                          metrics: List[str],
+                          priority: str = INTERACTIVE,
+                          options: Dict[str, Any] = None):
+        """
+        Run a GA4 report with optional filter/order/paging fields (from build_report_options);
+        returns (rows, row_count, aggregates) where row_count is the number of rows GA4 has before
+        paging and aggregates holds GA4's totals/minimums/maximums over all of them
+        """
+        request = data_api.RunReportRequest(
+            property=property_id,
+            dimensions=[data_api.Dimension(name=dim) for dim in dimensions],
+            metrics=[data_api.Metric(name=metric) for metric in metrics],
+            date_ranges=[data_api.DateRange(start_date=start_date, end_date=end_date)],
+            metric_aggregations=[
+                data_api.MetricAggregation.TOTAL,
+                data_api.MetricAggregation.MINIMUM,
+                data_api.MetricAggregation.MAXIMUM,
+            ],
+            return_property_quota=True,
+            **(options or {}),
+        )
+        
+        response = await self._run_ga4("run_report", request, priority)
+        
+        rows = []
+        for row in response.rows:
+            row_data = {}
+            
+            # Add dimensions
+            for i, dim in enumerate(dimensions):
+                row_data[dim] = row.dimension_values[i].value
+            
+            # Add metrics
+            for i, metric in enumerate(metrics):
+                row_data[metric] = self._metric_number(row.metric_values[i].value)
+            
+            rows.append(row_data)
+        
+        aggregates = {}
+        for key, aggregate_rows in (("totals", response.totals), ("minimums", response.minimums),
+                                    ("maximums", response.maximums)):
+            # One aggregate row per date range; reports here always use a single range
+            values = aggregate_rows[0].metric_values if aggregate_rows else []
+            aggregates[key] = {metric: self._metric_number(values[i].value) for i, metric in enumerate(metrics)
+                               if i < len(values)}
+        
+        return rows, response.row_count, aggregates
+    
+    @staticmethod
+    def _metric_number(value: str):
+        try:
+            number = float(value)
+            return int(number) if number.is_integer() else number
+        except (ValueError, TypeError):
+            return value
+    
+    async def _local_aggregates(self,
+                                property_id: str,
+                                start_date: str,
+                                end_date: str,
+                                metrics: List[str],
+                                rows: List[Dict[str, Any]],
+                                priority: str = INTERACTIVE,
+                                remote_totals: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Totals/minimums/maximums for rows assembled from the fact store or day cache. Additive
+        metrics are summed; non-additive ones (activeUsers, bounceRate, ...) cannot be, so their
+        totals come from one dimensionless GA4 request (skipped when remote_totals is False),
+        reused for final ranges
+        """
+        aggregates = {"totals": {}, "minimums": {}, "maximums": {}}
+        for metric in metrics:
+            values = [row[metric] for row in rows if isinstance(row.get(metric), (int, float))]
+            if values:
+                aggregates["minimums"][metric] = min(values)
+                aggregates["maximums"][metric] = max(values)
+            if metric in ADDITIVE_METRICS:
+                aggregates["totals"][metric] = sum(values)
+        
+        non_additive = [m for m in metrics if m not in ADDITIVE_METRICS]
+        if non_additive and remote_totals:
+            start, end = resolve_date(start_date), resolve_date(end_date)
+            cached = self.range_totals.get(property_id, start, end, non_additive) if self.range_totals else {}
+            missing = [m for m in non_additive if m not in cached]
+            if missing:
+                _, _, remote = await self._run_report(property_id, start_date, end_date, [], missing, priority)
+                if self.range_totals:
+                    self.range_totals.put(property_id, start, end, remote["totals"])
+                cached.update(remote["totals"])
+            aggregates["totals"].update(cached)
+            aggregates["totals"] = {m: aggregates["totals"][m] for m in metrics if m in aggregates["totals"]}
+        return aggregates
+    
+    async def _fetch_report_rows(self,
+                                 property_id: str,
+                                 start_date: str,
+                                 end_date: str,
+                                 dimensions: List[str],
+                                 metrics: List[str],
+                                 priority: str = INTERACTIVE) -> List[Dict[str, Any]]:
+        """Report rows from GA4, through the day cache when the report is broken down by date"""
+        start = resolve_date(start_date)
+        end = resolve_date(end_date)
+        if not self.day_cache or 'date' not in dimensions or not start or not end or start > end:
+            return await self._run_report_rows(property_id, start_date, end_date, dimensions, metrics, priority)
+        
+        key = self.day_cache.key(property_id, dimensions, metrics)
+        by_day, missing = self.day_cache.lookup(key, start, end)
+        if missing:
+            # One request per contiguous run of missing days
+            fetched = await asyncio.gather(*(
+                self._run_report_rows(property_id, run_start.isoformat(), run_end.isoformat(),
+                                      dimensions, metrics, priority)
+                for run_start, run_end in missing
+            ))
+            for (run_start, run_end), rows in zip(missing, fetched):
+                run_by_day: Dict[Any, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    run_by_day.setdefault(datetime.strptime(row['date'], "%Y%m%d").date(), []).append(row)
+                by_day.update(run_by_day)
+                # A full page may have been truncated by GA4's row limit; don't cache partial days
+                if len(rows) < GA4_DEFAULT_ROW_LIMIT:
+                    self.day_cache.store(key, run_start, run_end, run_by_day)
+            logger.info(f"GA4 report {start}..{end}: fetched {len(missing)} missing range(s), "
+                        f"{(end - start).days + 1 - sum((b - a).days + 1 for a, b in missing)} day(s) cached")
+        
+        return [row for day in sorted(by_day) for row in by_day[day]]
+    
+    async def _get_rows_with_fact_store(self,
+                                        property_id: str,
+                                        start_date: str,
+                                        end_date: str,
+                                        dimensions: List[str],
+                                        metrics: List[str],
+                                        priority: str = INTERACTIVE) -> List[Dict[str, Any]]:
+        """Serve the final, already-synced head of the range locally and fetch only the tail from GA4"""
+        start = resolve_date(start_date)
+        end = resolve_date(end_date)
+        if not start or not end or start > end:
+            return await self._run_report_rows(property_id, start_date, end_date, dimensions, metrics, priority)
+        
+        covered_until = await self.fact_store.covered_until(property_id, dimensions, start, end)
+        if covered_until is None:
+            CACHE_REQUESTS.labels("ga4_fact_store", "miss").inc()
+            return await self._run_report_rows(property_id, start_date, end_date, dimensions, metrics, priority)
+        
+        rows = await self.fact_store.query(property_id, dimensions, metrics, start, covered_until)
+        if covered_until == end:
+            CACHE_REQUESTS.labels("ga4_fact_store", "hit").inc()
+            logger.info(f"GA4 report {start}..{end} served from fact store")
+            return rows
+        
+        CACHE_REQUESTS.labels("ga4_fact_store", "partial").inc()
+        tail_start = (covered_until + timedelta(days=1)).isoformat()
+        tail_rows = await self._fetch_report_rows(property_id, tail_start, end.isoformat(), dimensions, metrics, priority)
+        logger.info(f"GA4 report {start}..{covered_until} served from fact store, {tail_start}..{end} fetched remotely")
+        
+        if 'date' in dimensions:
+            return rows + tail_rows
+        
+        # Without a date breakdown, merge the tail into the stored aggregates (additive metrics only)
+        breakdown = [d for d in dimensions if d != 'date']
+        merged = {tuple(row[d] for d in breakdown): row for row in rows}
+        for tail_row in tail_rows:
+            key = tuple(tail_row[d] for d in breakdown)
+            if key not in merged:
+                merged[key] = tail_row
+                continue
+            for metric in metrics:
+                merged[key][metric] = merged[key][metric] + tail_row[metric]
+        return list(merged.values())
+    
+    async def _get_degraded_rows(self,
+                                 property_id: str,
+                                 start_date: str,
+                                 end_date: str,
+                                 dimensions: List[str],
+                                 metrics: List[str]):
+        """Stored rows only (no GA4 call) while quota is nearly exhausted; (None, None) if nothing is stored"""
+        start = resolve_date(start_date)
+        end = resolve_date(end_date)
+        if not start or not end or start > end:
+            return None, None
+        covered_until = await self.fact_store.covered_until(property_id, dimensions, start, end)
+        if covered_until is None:
+            return None, None
+        rows = await self.fact_store.query(property_id, dimensions, metrics, start, covered_until)
+        logger.warning(f"GA4 quota low for {property_id}; serving {start}..{covered_until} from fact store only")
+        note = f"GA4 quota nearly exhausted; data shown through {covered_until.isoformat()} only"
+        return rows, note
+    
+    async def analyze_report(self,
+                             report_handle: str,
+                             metrics: List[str] = None,
+                             window: int = 7,
+                             z_threshold: float = 3.0,
+                             max_groups: int = 5,
+                             property_id: str = None) -> Dict[str, Any]:
+        """
+        Time-series insights for a report fetched earlier with get_ga4_report
+        
+        Args:
+            report_handle: The report_handle returned by get_ga4_report (the report needs the 'date' dimension)
+            metrics: Metrics to analyze (default: all of the report's metrics)
+            window: Rolling-mean window in days
+            z_threshold: |z| at or above which a day is reported as an anomaly
+            max_groups: Breakdown values analyzed per metric (largest first) when the report has other dimensions
+            property_id: The caller's property; a handle for another property is treated as unknown
+        """
+        try:
+            report = self.reports.get(report_handle)
+            if report is None or (property_id and report["property_id"] != property_id):
+                return self._handle_error("analyze_report", Exception(
+                    f"Unknown or expired report handle '{report_handle}'; run get_ga4_report again"
+                ))
+            
+            analysis = await asyncio.to_thread(
+                analyze_report_series, report, metrics, int(window), 7, float(z_threshold), int(max_groups)
+            )
+            return self._format_success_response({
+                "report_handle": report_handle,
+                "property_id": report["property_id"],
+                **analysis,
+            }, "analyze_report")
+        
+        except Exception as e:
+            return self._handle_error("analyze_report", e)
+    
+    async def get_pivot_report(self,
+                               start_date: str,
+                               end_date: str,
+                               pivots: List[Dict[str, Any]],
+                               metrics: List[str] = None,
+                               property_id: str = None,
+                               dimension_filter: List[Dict[str, Any]] = None,
+                               priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """
+        Get a multi-way breakdown (e.g. sessions by channel by device) in one pivot request
+        
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            pivots: [{"fields": [...], "limit", "order_by", "desc"}]; the first pivot gives the table's
+                rows, the others its columns, each keeping only its top `limit` values
+            metrics: List of metrics (default: ['sessions'])
+            property_id: GA4 property ID (uses default if not provided)
+            dimension_filter: Dimension conditions, as for get_ga4_report
+            priority: "interactive" (user-facing) or "background"
+        """
+        try:
+            if not self.ga_client:
+                return self._handle_error("get_pivot_report", Exception("GA4 client not initialized"))
+            property_id = property_id or self.default_property_id
+            if not property_id:
+                return self._handle_error("get_pivot_report", Exception("No GA4 property ID available"))
+            
+            request, fields, metrics, rewrites = await self._build_pivot_request(
+                property_id, start_date, end_date, pivots, metrics, dimension_filter)
+            response = await self._run_ga4("run_pivot_report", request, priority)
+            
+            result = {
+                "property_id": property_id,
+                "date_range": f"{start_date} to {end_date}",
+                **format_pivot_response(response, fields, metrics, self._metric_number),
+            }
+            if rewrites:
+                result["field_rewrites"] = rewrites
+            return self._format_success_response(result, "get_pivot_report")
+        
+        except Exception as e:
+            return self._handle_error("get_pivot_report", e)
+    
+    async def get_pivot_reports(self,
+                                reports: List[Dict[str, Any]],
+                                property_id: str = None,
+                                priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """
+        Several pivot reports for one property through batch_run_pivot_reports (five per call)
+        
+        Args:
+            reports: [{"start_date", "end_date", "pivots", "metrics", "dimension_filter"}], as for get_pivot_report
+            property_id: GA4 property ID (uses default if not provided)
+            priority: "interactive" (user-facing) or "background"
+        """
+        try:
+            if not self.ga_client:
+                return self._handle_error("get_pivot_reports", Exception("GA4 client not initialized"))
+            property_id = property_id or self.default_property_id
+            if not property_id:
+                return self._handle_error("get_pivot_reports", Exception("No GA4 property ID available"))
+            if not reports:
+                raise GA4ValidationError("At least one pivot report is required")
+            
+            prepared = [
+                await self._build_pivot_request(property_id, report.get("start_date"), report.get("end_date"),
+                                                report.get("pivots"), report.get("metrics"),
+                                                report.get("dimension_filter"))
+                for report in reports
+            ]
+            batches = [prepared[i:i + MAX_BATCH_REPORTS] for i in range(0, len(prepared), MAX_BATCH_REPORTS)]
+            responses = await asyncio.gather(*(
+                self._run_ga4("batch_run_pivot_reports", data_api.BatchRunPivotReportsRequest(
+                    property=property_id, requests=[request for request, _, _, _ in batch]
+                ), priority)
+                for batch in batches
+            ))
+            
+            results = []
+            for batch, response in zip(batches, responses):
+                for (request, fields, metrics, rewrites), report in zip(batch, response.pivot_reports):
+                    date_range = request.date_ranges[0]
+                    entry = {
+                        "date_range": f"{date_range.start_date} to {date_range.end_date}",
+                        **format_pivot_response(report, fields, metrics, self._metric_number),
+                    }
+                    if rewrites:
+                        entry["field_rewrites"] = rewrites
+                    results.append(entry)
+                # Quota comes back per sub-report; the last one is the most recent reading
+                if self.quota_scheduler and response.pivot_reports:
+                    self.quota_scheduler.record(property_id, getattr(response.pivot_reports[-1], "property_quota", None))
+            
+            return self._format_success_response({
+                "property_id": property_id,
+                "reports": results,
+                "requests_made": len(batches),
+            }, "get_pivot_reports")
+        
+        except Exception as e:
+            return self._handle_error("get_pivot_reports", e)
+    
+    async def _build_pivot_request(self, property_id: str, start_date: str, end_date: str, pivots,
+                                   metrics: List[str] = None, dimension_filter=None):
+        """Validated RunPivotReportRequest with the pivots' fields, plus (fields per pivot, metrics, rewrites)"""
+        if not start_date or not end_date:
+            raise GA4ValidationError("Pivot reports need start_date and end_date")
+        fields = pivot_fields(pivots)
+        dimensions, metrics, rewrites = await self.metadata.validate(
+            property_id, [name for names in fields for name in names], metrics or ['sessions'])
+        # validate() keeps order, so pivot fields map back onto the resolved names
+        if len(dimensions) != sum(len(names) for names in fields):
+            raise GA4ValidationError("A dimension can appear in only one pivot")
+        resolved = iter(dimensions)
+        fields = [[next(resolved) for _ in names] for names in fields]
+        
+        filter_dimensions = await self.metadata.resolve_dimensions(property_id,
+                                                                   dimension_filter_fields(dimension_filter))
+        options = build_report_options(dimensions, metrics, lambda name: filter_dimensions[name],
+                                       dimension_filter=dimension_filter)
+        request = data_api.RunPivotReportRequest(
+            property=property_id,
+            dimensions=[data_api.Dimension(name=dim) for dim in dimensions],
+            metrics=[data_api.Metric(name=metric) for metric in metrics],
+            date_ranges=[data_api.DateRange(start_date=start_date, end_date=end_date)],
+            pivots=build_pivots(pivots, fields, metrics),
+            return_property_quota=True,
+            **options,
+        )
+        return request, fields, metrics, rewrites
+    
     async def get_top_pages(self, 
                           start_date: str, 
                           end_date: str,
@@ -254,20 +824,21 @@ class GoogleAnalyticsAgent(BaseAgent):
                 ))
             
             # Create the request for top pages
-            request = RunReportRequest(
+            request = data_api.RunReportRequest(
                 property=property_id,
-                dimensions=[Dimension(name="pagePath"), Dimension(name="pageTitle")],
+                dimensions=[data_api.Dimension(name="pagePath"), data_api.Dimension(name="pageTitle")],
                 metrics=[
-                    Metric(name="screenPageViews"),
-                    Metric(name="sessions"),
-                    Metric(name="activeUsers")
+                    data_api.Metric(name="screenPageViews"),
+                    data_api.Metric(name="sessions"),
+                    data_api.Metric(name="activeUsers")
                 ],
-                date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
+                date_ranges=[data_api.DateRange(start_date=start_date, end_date=end_date)],
                 order_bys=[{"metric": {"metric_name": "screenPageViews"}, "desc": True}],
-                limit=limit
+                limit=limit,
+                return_property_quota=True
             )
             
-            response = self.ga_client.run_report(request=request)
+            response = await self._run_ga4("run_report", request)
             
             # Process the response
             pages = []
@@ -319,23 +890,24 @@ class GoogleAnalyticsAgent(BaseAgent):
                 ))
             
             # Create the request for traffic sources
-            request = RunReportRequest(
+            request = data_api.RunReportRequest(
                 property=property_id,
                 dimensions=[
-                    Dimension(name="sessionDefaultChannelGroup"),
-                    Dimension(name="sessionSource"),
-                    Dimension(name="sessionMedium")
+                    data_api.Dimension(name="sessionDefaultChannelGroup"),
+                    data_api.Dimension(name="sessionSource"),
+                    data_api.Dimension(name="sessionMedium")
                 ],
                 metrics=[
-                    Metric(name="sessions"),
-                    Metric(name="activeUsers"),
-                    Metric(name="bounceRate")
+                    data_api.Metric(name="sessions"),
+                    data_api.Metric(name="activeUsers"),
+                    data_api.Metric(name="bounceRate")
                 ],
-                date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-                order_bys=[{"metric": {"metric_name": "sessions"}, "desc": True}]
+                date_ranges=[data_api.DateRange(start_date=start_date, end_date=end_date)],
+                order_bys=[{"metric": {"metric_name": "sessions"}, "desc": True}],
+                return_property_quota=True
             )
             
-            response = self.ga_client.run_report(request=request)
+            response = await self._run_ga4("run_report", request)
             
             # Process the response
             sources = []
@@ -374,7 +946,8 @@ class GoogleAnalyticsAgent(BaseAgent):
     
     async def get_real_time_data(self, property_id: str = None) -> Dict[str, Any]:
         """
-        Get real-time analytics data (last 30 minutes)
+        Get real-time analytics data (active users over the last 30 minutes) from the Realtime API.
+        Snapshots are shared per property for the realtime interval, so concurrent callers cost one request.
         
         Args:
             property_id: GA4 property ID (uses default if not provided)
@@ -391,43 +964,42 @@ class GoogleAnalyticsAgent(BaseAgent):
                     "No GA4 property ID available. Set GA4_PROPERTY_ID environment variable or provide property_id parameter."
                 ))
             
-            # Note: Real-time reporting API is different from the standard reporting API
-            # For now, we'll return recent data from the standard API
-            yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-            today = datetime.now().strftime("%Y-%m-%d")
-            
-            request = RunReportRequest(
-                property=property_id,
-                dimensions=[Dimension(name="date")],
-                metrics=[
-                    Metric(name="activeUsers"),
-                    Metric(name="screenPageViews")
-                ],
-                date_ranges=[DateRange(start_date=yesterday, end_date=today)],
-            )
-            
-            response = self.ga_client.run_report(request=request)
-            
-            # Process recent activity
-            recent_data = []
-            for row in response.rows:
-                date = row.dimension_values[0].value
-                active_users = int(row.metric_values[0].value)
-                pageviews = int(row.metric_values[1].value)
-                
-                recent_data.append({
-                    "date": date,
-                    "active_users": active_users,
-                    "pageviews": pageviews
-                })
-            
-            result = {
-                "property_id": property_id,
-                "note": "Recent activity data (real-time API not yet implemented)",
-                "data": recent_data
-            }
-            
+            result = await self.realtime.latest(property_id)
             return self._format_success_response(result, "get_real_time_data")
             
         except Exception as e:
             return self._handle_error("get_real_time_data", e)
+    
+    async def _fetch_realtime(self, property_id: str, limit: int = 10) -> Dict[str, Any]:
+        """One realtime report: active users and views per screen for the last 30 minutes, with totals"""
+        request = data_api.RunRealtimeReportRequest(
+            property=property_id,
+            dimensions=[data_api.Dimension(name="unifiedScreenName")],
+            metrics=[
+                data_api.Metric(name="activeUsers"),
+                data_api.Metric(name="screenPageViews")
+            ],
+            metric_aggregations=[data_api.MetricAggregation.TOTAL],
+            order_bys=[{"metric": {"metric_name": "activeUsers"}, "desc": True}],
+            limit=limit,
+            return_property_quota=True
+        )
+        
+        response = await self._run_ga4("run_realtime_report", request)
+        
+        top_screens = []
+        for row in response.rows:
+            top_screens.append({
+                "screen": row.dimension_values[0].value,
+                "active_users": int(row.metric_values[0].value),
+                "pageviews": int(row.metric_values[1].value)
+            })
+        
+        totals = response.totals[0].metric_values if response.totals else None
+        return {
+            "property_id": property_id,
+            "window": "last_30_minutes",
+            "active_users": int(totals[0].value) if totals else sum(s["active_users"] for s in top_screens),
+            "pageviews": int(totals[1].value) if totals else sum(s["pageviews"] for s in top_screens),
+            "top_screens": top_screens
+        }
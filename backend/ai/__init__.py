@@ -3,8 +3,14 @@ Aterges AI Module
 AI orchestration and model management
 """
 
-from ai.orchestrator import AIOrchestrator
-
 __all__ = [
     'AIOrchestrator'
 ]
+
+
+def __getattr__(name):
+    # Deferred so importing ai.models does not load the orchestrator and its SDKs
+    if name == 'AIOrchestrator':
+        from ai.orchestrator import AIOrchestrator
+        return AIOrchestrator
+    raise AttributeError(f"module 'ai' has no attribute {name!r}")
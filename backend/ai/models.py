@@ -0,0 +1,73 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Union
+
+# Scalar cell in a GA4 report row (dimension values are strings, metrics numbers)
+ReportValue = Union[int, float, str, None]
+
+
+class QueryResponse(BaseModel):
+    response: str
+    status: str
+    timestamp: Optional[str] = None
+    help: Optional[str] = None
+
+
+class AIStatusResponse(BaseModel):
+    status: str
+    message: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    configuration_issues: Optional[List[str]] = None
+    setup_guide: Optional[str] = None
+
+
+class AgentsHealthResponse(BaseModel):
+    status: str
+    agents: Optional[Dict[str, Dict[str, Any]]] = None
+    total_agents: Optional[int] = None
+    message: Optional[str] = None
+    help: Optional[str] = None
+
+
+class ReportData(BaseModel):
+    property_id: str
+    date_range: str
+    dimensions: List[str]
+    metrics: List[str]
+    row_count: int
+    data: List[Dict[str, ReportValue]]
+    totals: Dict[str, ReportValue] = {}
+    minimums: Dict[str, ReportValue] = {}
+    maximums: Dict[str, ReportValue] = {}
+
+
+class ReportResponse(BaseModel):
+    success: bool
+    data: ReportData
+    agent: Optional[str] = None
+    operation: Optional[str] = None
+
+
+class RealtimeScreen(BaseModel):
+    screen: str
+    active_users: int
+    pageviews: int
+
+
+class RealtimeData(BaseModel):
+    property_id: str
+    window: str
+    active_users: int
+    pageviews: int
+    top_screens: List[RealtimeScreen]
+    fetched_at: Optional[str] = None
+
+
+class RealtimeResponse(BaseModel):
+    success: Optional[bool] = None
+    data: Optional[RealtimeData] = None
+    agent: Optional[str] = None
+    operation: Optional[str] = None
+    error: Optional[bool] = None
+    message: Optional[str] = None
+    transient: Optional[bool] = None
+    retry_after_seconds: Optional[int] = None
@@ -5,22 +5,23 @@ Handles tool calling workflow with Google Gemini and data agents
 
 import json
 import logging
+import time
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, timedelta
 import asyncio
 
-# Google Vertex AI imports
-import vertexai
-from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration, Part
-from vertexai.generative_models import FinishReason
-import vertexai.preview.generative_models as generative_models
-
 # Import our agents
 from agents.base_agent import BaseAgent
 from agents.google_analytics_agent import GoogleAnalyticsAgent
+from lazy_imports import LazyModule
+from monitoring.metrics import GEMINI_TURN_DURATION, TOOL_CALLS
 
 logger = logging.getLogger(__name__)
 
+# Google Vertex AI imports (loaded on first use, see lazy_imports)
+vertexai = LazyModule("vertexai")
+generative_models = LazyModule("vertexai.generative_models")
+
 class AIOrchestrator:
     """
     Core AI Orchestrator for Aterges Platform
@@ -37,7 +38,7 @@ class AIOrchestrator:
         self._initialize_vertex_ai()
         
         # Initialize the model
-        self.model = GenerativeModel(self.model_name)
+        self.model = generative_models.GenerativeModel(self.model_name)
         
         # Initialize agents
         self.agents = self._initialize_agents()
@@ -45,6 +46,9 @@ class AIOrchestrator:
         # Create tools for function calling
         self.tools = self._create_tools()
         
+        # Optional PropertyResolver; attached at startup to serve each user's own GA4 property
+        self.property_resolver = None
+        
         logger.info(f"AI Orchestrator initialized with {len(self.agents)} agents")
     
     def _initialize_vertex_ai(self):
@@ -103,7 +107,7 @@ class AIOrchestrator:
         
         return agents
     
-    def _create_tools(self) -> List[Tool]:
+    def _create_tools(self) -> List[Any]:
         """Create Vertex AI tools from available agents"""
         function_declarations = []
         
@@ -112,7 +116,7 @@ class AIOrchestrator:
             if 'google_analytics' in self.agents:
                 # Get GA4 report
                 function_declarations.append(
-                    FunctionDeclaration(
+                    generative_models.FunctionDeclaration(
                         name="get_ga4_report",
                         description="Get Google Analytics 4 data for website metrics like sessions, pageviews, users, etc.",
                         parameters={
@@ -134,7 +138,60 @@ class AIOrchestrator:
                                 "metrics": {
                                     "type": "array",
                                     "items": {"type": "string"},
-                                    "description": "List of metrics like ['sessions', 'pageviews', 'users']"
+                                    "description": "List of GA4 metrics like ['sessions', 'screenPageViews', 'activeUsers']"
+                                },
+                                "dimension_filter": {
+                                    "type": "array",
+                                    "description": "Only include rows matching ALL of these conditions, e.g. [{'field': 'country', 'match': 'exact', 'value': 'Spain'}] or [{'field': 'pagePath', 'match': 'in_list', 'values': ['/', '/pricing']}]",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "field": {"type": "string", "description": "Dimension name, e.g. 'country'"},
+                                            "match": {
+                                                "type": "string",
+                                                "enum": ["exact", "contains", "begins_with", "ends_with", "regex", "full_regex", "in_list"]
+                                            },
+                                            "value": {"type": "string"},
+                                            "values": {"type": "array", "items": {"type": "string"}},
+                                            "case_sensitive": {"type": "boolean"},
+                                            "exclude": {"type": "boolean", "description": "Keep rows that do NOT match"}
+                                        },
+                                        "required": ["field"]
+                                    }
+                                },
+                                "metric_filter": {
+                                    "type": "array",
+                                    "description": "Only include rows whose metrics match ALL of these conditions, e.g. [{'field': 'sessions', 'operator': 'gt', 'value': 100}]; fields must be among the requested metrics",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "field": {"type": "string"},
+                                            "operator": {"type": "string", "enum": ["eq", "lt", "lte", "gt", "gte", "between"]},
+                                            "value": {"type": "number"},
+                                            "to": {"type": "number", "description": "Upper bound for 'between'"}
+                                        },
+                                        "required": ["field", "value"]
+                                    }
+                                },
+                                "order_bys": {
+                                    "type": "array",
+                                    "description": "Sort order, e.g. [{'field': 'sessions', 'desc': true}]; fields must be among the requested dimensions or metrics",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "field": {"type": "string"},
+                                            "desc": {"type": "boolean"}
+                                        },
+                                        "required": ["field"]
+                                    }
+                                },
+                                "limit": {
+                                    "type": "integer",
+                                    "description": "Maximum number of rows to return, e.g. 10 for a top-10"
+                                },
+                                "offset": {
+                                    "type": "integer",
+                                    "description": "Number of rows to skip, for the next page of results"
                                 }
                             },
                             "required": ["start_date", "end_date"]
@@ -142,9 +199,96 @@ class AIOrchestrator:
                     )
                 )
                 
+                # Analyze a fetched report
+                function_declarations.append(
+                    generative_models.FunctionDeclaration(
+                        name="analyze_report",
+                        description="Compute trends for a report already fetched with get_ga4_report (which must include the 'date' dimension): day-over-day and period-over-period change, rolling averages, trend per day and anomalous days against a weekly-seasonal baseline. Use this instead of calculating from raw rows.",
+                        parameters={
+                            "type": "object",
+                            "properties": {
+                                "report_handle": {
+                                    "type": "string",
+                                    "description": "The report_handle returned by get_ga4_report"
+                                },
+                                "metrics": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "Metrics to analyze (default: all metrics in the report)"
+                                },
+                                "window": {
+                                    "type": "integer",
+                                    "description": "Rolling average window in days (default 7)"
+                                },
+                                "z_threshold": {
+                                    "type": "number",
+                                    "description": "How unusual a day must be to count as an anomaly, in standard deviations (default 3)"
+                                }
+                            },
+                            "required": ["report_handle"]
+                        }
+                    )
+                )
+                
+                # Get pivot report
+                function_declarations.append(
+                    generative_models.FunctionDeclaration(
+                        name="get_pivot_report",
+                        description="Get a multi-way breakdown (e.g. sessions by channel by device for each week) in a single request, as a compact table with rows from the first pivot and columns from the others",
+                        parameters={
+                            "type": "object",
+                            "properties": {
+                                "start_date": {
+                                    "type": "string",
+                                    "description": "Start date in YYYY-MM-DD format"
+                                },
+                                "end_date": {
+                                    "type": "string",
+                                    "description": "End date in YYYY-MM-DD format"
+                                },
+                                "pivots": {
+                                    "type": "array",
+                                    "description": "Breakdowns, e.g. [{'fields': ['isoYearIsoWeek'], 'order_by': 'isoYearIsoWeek', 'limit': 8}, {'fields': ['sessionDefaultChannelGroup'], 'limit': 5}, {'fields': ['deviceCategory'], 'limit': 3}]",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "fields": {"type": "array", "items": {"type": "string"}, "description": "Dimensions in this pivot"},
+                                            "limit": {"type": "integer", "description": "Keep only the top N values (default 10)"},
+                                            "order_by": {"type": "string", "description": "Metric or one of this pivot's fields to rank by (default: first metric, descending)"},
+                                            "desc": {"type": "boolean"}
+                                        },
+                                        "required": ["fields"]
+                                    }
+                                },
+                                "metrics": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "List of GA4 metrics like ['sessions', 'activeUsers']"
+                                },
+                                "dimension_filter": {
+                                    "type": "array",
+                                    "description": "Optional conditions, as for get_ga4_report, e.g. [{'field': 'country', 'value': 'Spain'}]",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "field": {"type": "string"},
+                                            "match": {"type": "string"},
+                                            "value": {"type": "string"},
+                                            "values": {"type": "array", "items": {"type": "string"}},
+                                            "exclude": {"type": "boolean"}
+                                        },
+                                        "required": ["field"]
+                                    }
+                                }
+                            },
+                            "required": ["start_date", "end_date", "pivots"]
+                        }
+                    )
+                )
+                
                 # Get top pages
                 function_declarations.append(
-                    FunctionDeclaration(
+                    generative_models.FunctionDeclaration(
                         name="get_top_pages",
                         description="Get the most popular pages from Google Analytics",
                         parameters={
@@ -170,7 +314,7 @@ class AIOrchestrator:
                 
                 # Get traffic sources
                 function_declarations.append(
-                    FunctionDeclaration(
+                    generative_models.FunctionDeclaration(
                         name="get_traffic_sources",
                         description="Get traffic source data from Google Analytics (organic, direct, referral, etc.)",
                         parameters={
@@ -189,10 +333,22 @@ class AIOrchestrator:
                         }
                     )
                 )
+                
+                # Get real-time data
+                function_declarations.append(
+                    generative_models.FunctionDeclaration(
+                        name="get_real_time_data",
+                        description="Get live Google Analytics data: active users and pageviews in the last 30 minutes and the top screens right now",
+                        parameters={
+                            "type": "object",
+                            "properties": {}
+                        }
+                    )
+                )
             
             # Create tools if we have function declarations
             if function_declarations:
-                tools = [Tool(function_declarations=function_declarations)]
+                tools = [generative_models.Tool(function_declarations=function_declarations)]
                 logger.info(f"Successfully created {len(function_declarations)} function declarations in {len(tools)} tool(s)")
             else:
                 tools = []
@@ -239,8 +395,18 @@ class AIOrchestrator:
             start_date = (today - timedelta(days=7)).strftime("%Y-%m-%d")
             return start_date, end_date
     
-    async def _execute_function_call(self, function_call) -> Dict[str, Any]:
-        """Execute a function call from the AI model"""
+    async def _resolve_property(self, user_context: Dict[str, Any] = None) -> Optional[str]:
+        """The user's GA4 property (None falls back to the agent's configured property)"""
+        if not self.property_resolver or 'google_analytics' not in self.agents or not user_context:
+            return None
+        access = await self.property_resolver.resolve(user_context.get('user_id'))
+        if access is None:
+            return None
+        self.agents['google_analytics'].bind_property(access)
+        return access.property_id
+    
+    async def _execute_function_call(self, function_call, property_id: str = None) -> Dict[str, Any]:
+        """Execute a function call from the AI model (property_id: the user's resolved GA4 property)"""
         try:
             # Add null check for function_call
             if not function_call:
@@ -263,7 +429,7 @@ class AIOrchestrator:
             logger.info(f"Executing function: {function_name} with args: {function_args}")
             
             # CRITICAL FIX: Override AI-generated dates with properly parsed dates
-            if function_name in ["get_ga4_report", "get_top_pages", "get_traffic_sources"]:
+            if function_name in ["get_ga4_report", "get_pivot_report", "get_top_pages", "get_traffic_sources"]:
                 # Check if the AI used old/incorrect dates
                 start_date = function_args.get('start_date')
                 end_date = function_args.get('end_date')
@@ -297,7 +463,38 @@ class AIOrchestrator:
                     start_date=function_args.get('start_date'),
                     end_date=function_args.get('end_date'),
                     dimensions=function_args.get('dimensions', ['date']),
-                    metrics=function_args.get('metrics', ['sessions', 'pageviews'])
+                    metrics=function_args.get('metrics', ['sessions', 'screenPageViews']),
+                    property_id=property_id,
+                    dimension_filter=function_args.get('dimension_filter'),
+                    metric_filter=function_args.get('metric_filter'),
+                    order_bys=function_args.get('order_bys'),
+                    limit=function_args.get('limit'),
+                    offset=function_args.get('offset')
+                )
+            
+            elif function_name == "analyze_report":
+                if 'google_analytics' not in self.agents:
+                    return {"error": "Google Analytics agent not available"}
+                
+                return await self.agents['google_analytics'].analyze_report(
+                    report_handle=function_args.get('report_handle'),
+                    metrics=function_args.get('metrics'),
+                    window=function_args.get('window', 7),
+                    z_threshold=function_args.get('z_threshold', 3.0),
+                    property_id=property_id
+                )
+            
+            elif function_name == "get_pivot_report":
+                if 'google_analytics' not in self.agents:
+                    return {"error": "Google Analytics agent not available"}
+                
+                return await self.agents['google_analytics'].get_pivot_report(
+                    start_date=function_args.get('start_date'),
+                    end_date=function_args.get('end_date'),
+                    pivots=function_args.get('pivots'),
+                    metrics=function_args.get('metrics'),
+                    property_id=property_id,
+                    dimension_filter=function_args.get('dimension_filter')
                 )
             
             elif function_name == "get_top_pages":
@@ -307,7 +504,8 @@ class AIOrchestrator:
                 return await self.agents['google_analytics'].get_top_pages(
                     start_date=function_args.get('start_date'),
                     end_date=function_args.get('end_date'),
-                    limit=function_args.get('limit', 10)
+                    limit=function_args.get('limit', 10),
+                    property_id=property_id
                 )
             
             elif function_name == "get_traffic_sources":
@@ -316,9 +514,16 @@ class AIOrchestrator:
                 
                 return await self.agents['google_analytics'].get_traffic_sources(
                     start_date=function_args.get('start_date'),
-                    end_date=function_args.get('end_date')
+                    end_date=function_args.get('end_date'),
+                    property_id=property_id
                 )
             
+            elif function_name == "get_real_time_data":
+                if 'google_analytics' not in self.agents:
+                    return {"error": "Google Analytics agent not available"}
+                
+                return await self.agents['google_analytics'].get_real_time_data(property_id=property_id)
+            
             else:
                 return {"error": f"Unknown function: {function_name}"}
                 
@@ -331,13 +536,16 @@ class AIOrchestrator:
             logger.error(f"Error executing function call: {e}")
             return {"error": f"Function execution failed: {str(e)}"}
     
-    async def process_query(self, user_query: str, user_context: Dict[str, Any] = None) -> str:
+    async def process_query(self, user_query: str, user_context: Dict[str, Any] = None,
+                            trace: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Process a user query using the AI orchestrator
         
         Args:
             user_query: The user's natural language query
             user_context: Additional context about the user (email, preferences, etc.)
+            trace: Optional list that receives one entry per executed tool call
+                   (name, args, latency_ms, error) for query history
             
         Returns:
             AI-generated response string
@@ -346,11 +554,15 @@ class AIOrchestrator:
             # Create system prompt
             system_prompt = self._create_system_prompt(user_context)
             
+            # Resolve the user's GA4 property once per query
+            property_id = await self._resolve_property(user_context)
+            
             # Start the conversation with response validation disabled
             chat = self.model.start_chat(response_validation=False)
             
             # Send the system prompt first
-            response = chat.send_message(
+            response = self._send_message(
+                chat, 0,
                 system_prompt + "\n\nUser Query: " + user_query,
                 tools=self.tools
             )
@@ -378,9 +590,19 @@ class AIOrchestrator:
                 
                 for part in response.candidates[0].content.parts:
                     if hasattr(part, 'function_call') and part.function_call:
-                        result = await self._execute_function_call(part.function_call)
+                        call_started = time.perf_counter()
+                        result = await self._execute_function_call(part.function_call, property_id=property_id)
+                        failed = bool(isinstance(result, dict) and result.get("error"))
+                        TOOL_CALLS.labels(part.function_call.name, "error" if failed else "ok").inc()
+                        if trace is not None:
+                            trace.append({
+                                "name": part.function_call.name,
+                                "args": dict(part.function_call.args or {}),
+                                "latency_ms": round((time.perf_counter() - call_started) * 1000, 2),
+                                "error": failed
+                            })
                         function_responses.append(
-                            Part.from_function_response(
+                            generative_models.Part.from_function_response(
                                 name=part.function_call.name,
                                 response=result
                             )
@@ -388,7 +610,7 @@ class AIOrchestrator:
                 
                 # Send function results back to the model
                 if function_responses:
-                    response = chat.send_message(function_responses)
+                    response = self._send_message(chat, iteration, function_responses)
             
             # Get the final response text
             if response.candidates and response.candidates[0].content.parts:
@@ -403,6 +625,28 @@ class AIOrchestrator:
             logger.error(f"Error processing query: {e}")
             return f"I encountered an error while processing your query: {str(e)}. Please try again or contact support if the issue persists."
     
+    async def warm_up_model(self) -> Dict[str, Any]:
+        """Open the Vertex channel and fetch a token with count_tokens (no generation is billed)"""
+        await asyncio.to_thread(self.model.count_tokens, "ping")
+        return {"status": "ok"}
+    
+    def get_credentials(self) -> Dict[str, Any]:
+        """Credentials in use by the model and each agent, for proactive token refresh"""
+        from google.cloud.aiplatform import initializer
+        credentials = {"vertex": initializer.global_config.credentials}
+        for agent_name, agent in self.agents.items():
+            if agent.credentials is not None:
+                credentials[agent_name] = agent.credentials
+        return credentials
+    
+    def _send_message(self, chat, turn: int, *args, **kwargs):
+        """Send one message to Gemini, recording its latency under the conversation turn"""
+        started = time.perf_counter()
+        try:
+            return chat.send_message(*args, **kwargs)
+        finally:
+            GEMINI_TURN_DURATION.labels(turn).observe(time.perf_counter() - started)
+    
     def _create_system_prompt(self, user_context: Dict[str, Any] = None) -> str:
         """Create a system prompt for the AI model"""
         
@@ -425,7 +669,7 @@ IMPORTANT FUNCTION CALLING INSTRUCTIONS:
 - When you need analytics data, ONLY use the provided function tools
 - DO NOT write or execute Python code directly
 - DO NOT use imports like 'from datetime import date'
-- Use the structured function calls: get_ga4_report, get_top_pages, get_traffic_sources
+- Use the structured function calls: get_ga4_report, get_pivot_report, analyze_report, get_top_pages, get_traffic_sources, get_real_time_data
 - For date ranges, use YYYY-MM-DD format in function parameters
 
 Guidelines:
@@ -437,11 +681,16 @@ Guidelines:
 6. If data is unavailable, explain why and suggest alternatives
 
 Available Function Tools:
-- get_ga4_report: Get general Google Analytics data with custom dimensions and metrics
+- get_ga4_report: Get general Google Analytics data with custom dimensions and metrics; use dimension_filter, metric_filter, order_bys and limit to let GA4 filter and rank rows instead of fetching everything
+- analyze_report: Compute changes, rolling averages, trends and anomalies for a report fetched with get_ga4_report (pass its report_handle); never do this arithmetic yourself
+- get_pivot_report: Get a breakdown by two or three dimensions at once (e.g. channel by device per week) in one call
 - get_top_pages: Get most popular pages from your website
 - get_traffic_sources: Get traffic source breakdown (organic, direct, referral, etc.)
+- get_real_time_data: Get who is on the site right now (active users in the last 30 minutes)
 
-Example: If user asks "How many users yesterday?", call get_ga4_report with yesterday's date and users metric.
+Example: If user asks "How many users yesterday?", call get_ga4_report with yesterday's date and the activeUsers metric.
+Example: For "is traffic trending up this month?", call get_ga4_report with dimensions ['date'], then analyze_report with the report_handle it returns.
+Example: For "top 5 pages from Spain last week", call get_ga4_report with dimensions ['pagePath'], dimension_filter [{'field': 'country', 'value': 'Spain'}], order_bys [{'field': 'screenPageViews', 'desc': true}] and limit 5.
 
 Remember: You can access real Google Analytics data for this user. Use the function tools proactively to provide data-driven insights."""
 
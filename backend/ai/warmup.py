@@ -0,0 +1,129 @@
+"""
+Client warm-up for the AI path
+Opens gRPC channels, fetches access tokens and sends a no-op request for the Vertex model and
+each agent once the server is serving, then keeps tokens refreshed ahead of expiry
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_if_expiring(credentials, margin_seconds: float) -> bool:
+    """Refresh google-auth credentials that have no token yet or expire within the margin."""
+    if credentials is None or not hasattr(credentials, "refresh"):
+        return False
+    expiry = getattr(credentials, "expiry", None)  # naive UTC per google-auth
+    if getattr(credentials, "token", None) and expiry is not None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if expiry - now > timedelta(seconds=margin_seconds):
+            return False
+    from google.auth.transport.requests import Request
+    credentials.refresh(Request())
+    return True
+
+
+class ClientWarmer:
+    """
+    Warm-up stage for the orchestrator's clients.
+
+    Components (the Gemini model and each agent) warm up concurrently, each
+    bounded by the timeout; a failure only leaves that component cold. After
+    warm-up, a loop refreshes every known credential before it gets within
+    refresh_margin of expiry, so requests never wait on a token fetch.
+    """
+
+    def __init__(self, orchestrator, timeout: float = 20.0,
+                 refresh_interval: float = 60.0, refresh_margin: float = 300.0):
+        self.orchestrator = orchestrator
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.refresh_margin = refresh_margin
+        self.state = "pending"
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.token_refreshes = 0
+        self.refresh_errors = 0
+        self.warmed_at: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _steps(self) -> Dict[str, Callable[[], Awaitable[Dict[str, Any]]]]:
+        steps = {"vertex_model": self.orchestrator.warm_up_model}
+        for agent_name, agent in self.orchestrator.agents.items():
+            steps[f"agent:{agent_name}"] = agent.warm_up
+        return steps
+
+    async def _run(self, name: str, step: Callable[[], Awaitable[Dict[str, Any]]]):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(step(), timeout=self.timeout)
+            entry = {"status": result.get("status", "ok") if isinstance(result, dict) else "ok"}
+        except asyncio.TimeoutError:
+            entry = {"status": "error", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            entry = {"status": "error", "error": str(e)}
+        entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.components[name] = entry
+
+    async def warm_up(self):
+        self.state = "warming"
+        steps = self._steps()
+        await asyncio.gather(*(self._run(name, step) for name, step in steps.items()))
+        failed = [name for name, entry in self.components.items() if entry["status"] == "error"]
+        self.state = "warm" if not failed else ("failed" if len(failed) == len(steps) else "partial")
+        self.warmed_at = datetime.now(timezone.utc).isoformat()
+        summary = ", ".join(f"{name} {entry['status']} {entry['duration_ms']}ms" for name, entry in self.components.items())
+        logger.info(f"Client warm-up {self.state}: {summary}")
+
+    def refresh_credentials(self) -> int:
+        """Refresh every credential close to expiry. Blocking; runs in a worker thread."""
+        refreshed = 0
+        for name, credentials in self.orchestrator.get_credentials().items():
+            try:
+                if refresh_if_expiring(credentials, self.refresh_margin):
+                    refreshed += 1
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Token refresh for {name} failed: {e}")
+        return refreshed
+
+    async def _loop(self):
+        try:
+            await self.warm_up()
+        except Exception as e:
+            self.state = "failed"
+            logger.error(f"Client warm-up failed: {e}")
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                self.token_refreshes += await asyncio.to_thread(self.refresh_credentials)
+            except Exception as e:
+                logger.error(f"Token refresh loop error: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness view: ok once warm, warning while warming or partially warm, error if nothing warmed."""
+        status = {"warm": "ok", "failed": "error"}.get(self.state, "warning")
+        return {
+            "status": status,
+            "state": self.state,
+            "components": dict(self.components),
+            "warmed_at": self.warmed_at,
+            "token_refreshes": self.token_refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
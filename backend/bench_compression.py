@@ -0,0 +1,59 @@
+"""
+Benchmark for response compression
+Bytes saved and CPU cost per response for gzip levels and brotli qualities on report-shaped JSON
+
+Usage:
+    python bench_compression.py
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+import orjson
+
+from bench_serialization import build_report
+from middleware.compression import _BrotliEncoder, _GzipEncoder, brotli
+
+REPEAT = int(os.environ.get("BENCH_REPEAT", "10"))
+SIZES = (10, 100, 1000, 10000)
+ENCODERS = [("gzip", level, lambda level=level: _GzipEncoder(level)) for level in (1, 6, 9)]
+if brotli is not None:
+    ENCODERS += [("br", quality, lambda quality=quality: _BrotliEncoder(quality)) for quality in (1, 4, 6, 11)]
+
+
+def measure(new_encoder, body: bytes):
+    """Return (compressed size, best CPU milliseconds) for one full-body compression."""
+    best = float("inf")
+    size = 0
+    for _ in range(REPEAT):
+        encoder = new_encoder()
+        started = time.thread_time()
+        data = encoder.process(body, flush=False) + encoder.finish()
+        best = min(best, time.thread_time() - started)
+        size = len(data)
+    return size, best * 1000
+
+
+def main():
+    print("⏱️  Aterges Compression Benchmark")
+    print("=" * 50)
+    if brotli is None:
+        print("⚠️  brotli not installed: gzip only")
+
+    for rows in SIZES:
+        body = orjson.dumps(build_report(rows))
+        print(f"\n📦 Report with {rows} rows ({len(body)} bytes)")
+        print("-" * 50)
+        for name, level, new_encoder in ENCODERS:
+            size, cpu_ms = measure(new_encoder, body)
+            saved = len(body) - size
+            print(f"{name:<5} level {level:<3} {size:>9} bytes  saved {saved / len(body):6.1%}  "
+                  f"CPU {cpu_ms:8.3f} ms  ({saved / 1024 / max(cpu_ms, 1e-6):8.1f} KiB saved/ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark for API response serialization
+Old path: loose dict -> jsonable_encoder -> json (JSONResponse)
+New path: typed response_model (pydantic-core) -> orjson (ORJSONResponse)
+
+Usage:
+    python bench_serialization.py [rows]
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from ai.models import ReportResponse
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+REPEAT = int(os.environ.get("BENCH_REPEAT", "20"))
+
+CHANNELS = ["Organic Search", "Direct", "Referral", "Paid Search", "Email"]
+DEVICES = ["desktop", "mobile", "tablet"]
+
+
+def build_report(rows: int) -> dict:
+    """A get_ga4_report-shaped payload with `rows` date x channel x device rows."""
+    start = date(2025, 1, 1)
+    data = []
+    for i in range(rows):
+        data.append({
+            "date": (start + timedelta(days=i // 15)).strftime("%Y%m%d"),
+            "sessionDefaultChannelGroup": CHANNELS[i % len(CHANNELS)],
+            "deviceCategory": DEVICES[i % len(DEVICES)],
+            "sessions": 100 + i % 977,
+            "activeUsers": 80 + i % 613,
+            "bounceRate": round(0.3 + (i % 50) / 100, 4),
+        })
+    return {
+        "success": True,
+        "data": {
+            "property_id": "properties/123456",
+            "date_range": "2025-01-01 to 2025-12-31",
+            "dimensions": ["date", "sessionDefaultChannelGroup", "deviceCategory"],
+            "metrics": ["sessions", "activeUsers", "bounceRate"],
+            "row_count": rows,
+            "data": data,
+            "totals": {"sessions": sum(r["sessions"] for r in data)},
+            "minimums": {"sessions": min(r["sessions"] for r in data)},
+            "maximums": {"sessions": max(r["sessions"] for r in data)},
+        },
+        "agent": "Google Analytics Agent",
+        "operation": "get_ga4_report",
+    }
+
+
+def timed(fn) -> float:
+    """Best-of-REPEAT wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    payload = build_report(ROWS)
+
+    old_app = FastAPI()
+    new_app = FastAPI(default_response_class=ORJSONResponse)
+
+    @old_app.get("/report")
+    async def old_report():
+        return payload
+
+    @new_app.get("/report", response_model=ReportResponse)
+    async def new_report():
+        return payload
+
+    old_client = TestClient(old_app)
+    new_client = TestClient(new_app)
+    assert old_client.get("/report").json() == new_client.get("/report").json()
+
+    print("⏱️  Aterges Serialization Benchmark")
+    print("=" * 50)
+    print(f"Report rows: {ROWS}, best of {REPEAT}")
+
+    results = {
+        "serialize: jsonable_encoder + json": timed(lambda: JSONResponse(jsonable_encoder(payload))),
+        "serialize: response_model + orjson": timed(
+            lambda: ORJSONResponse(ReportResponse.model_validate(payload).model_dump(mode="json"))
+        ),
+        "end-to-end: dict endpoint": timed(lambda: old_client.get("/report")),
+        "end-to-end: typed + orjson endpoint": timed(lambda: new_client.get("/report")),
+    }
+
+    print("\n📊 RESULTS")
+    print("-" * 30)
+    for label, ms in results.items():
+        print(f"{label:<38} {ms:8.2f} ms")
+    print(f"\nSerialization speedup: "
+          f"{results['serialize: jsonable_encoder + json'] / results['serialize: response_model + orjson']:.1f}x")
+    print(f"End-to-end speedup:    "
+          f"{results['end-to-end: dict endpoint'] / results['end-to-end: typed + orjson endpoint']:.1f}x")
+    print(f"Body size: {len(old_client.get('/report').content)} bytes (old), "
+          f"{len(new_client.get('/report').content)} bytes (new)")
+
+
+if __name__ == "__main__":
+    main()
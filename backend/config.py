@@ -12,7 +12,45 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_key: str
     database_url: str
-    
+
+    # Database connection pool (asyncpg)
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_statement_cache_size: int = 100  # Forced to 0 behind a transaction-mode pooler
+    db_command_timeout: float = 30.0  # Default per-query timeout in seconds
+    db_acquire_timeout: float = 10.0  # Max wait for a free pool connection
+    db_max_queries: int = 50000  # Recycle a connection after this many queries
+    db_max_inactive_connection_lifetime: float = 300.0
+    db_max_connection_lifetime: float = 3600.0  # Recycle all connections after this age (0 disables)
+    db_slow_query_ms: float = 500.0  # Statements slower than this are logged
+    db_slow_query_log_size: int = 50  # Recent slow queries kept for /api/db/metrics
+
+    # Query history (write-behind log for /api/query)
+    query_history_enabled: bool = True
+    query_history_batch_size: int = 200
+    query_history_flush_interval: float = 5.0  # Seconds between time-based flushes
+    query_history_max_buffer: int = 5000  # Records held in memory before overflow
+    query_history_overflow: str = "drop"  # "drop" or "spill"
+    query_history_spill_path: str = "query_history.spill.jsonl"
+
+    # Startup
+    startup_step_timeout: float = 20.0  # Per-step limit for database/auth initialization
+    startup_ai_mode: str = "background"  # eager | background (after serving starts) | lazy (first use) | disabled
+    startup_ai_timeout: float = 60.0  # Reported as a timeout past this; construction keeps running
+
+    # Client warm-up (after serving starts): channels, tokens and a no-op request per client
+    warmup_enabled: bool = True
+    warmup_timeout: float = 20.0  # Per-client limit
+    warmup_gates_readiness: bool = False  # Hold /readyz at 503 until clients are warm
+    token_refresh_interval: float = 60.0  # Seconds between expiry checks
+    token_refresh_margin: float = 300.0  # Refresh tokens expiring within this many seconds
+
+    # Readiness (/readyz serves cached results refreshed in the background)
+    readiness_refresh_interval: float = 15.0  # Seconds between cheap dependency checks
+    readiness_check_timeout: float = 5.0  # Per-check timeout
+    readiness_stale_after: float = 60.0  # Results older than this make /readyz fail
+    readiness_agent_check_interval: float = 300.0  # Deep agent checks (GA4 run_report) cost quota
+
     # JWT
     secret_key: str
     algorithm: str = "HS256"
@@ -28,6 +66,55 @@ class Settings(BaseSettings):
     # Must be configured with your Aterges-specific GA4 property
     ga4_property_id: str = ""
     
+    # GA4 multi-tenancy (user_ga4_properties, see docs/database_migrations/004_user_ga4_properties.sql)
+    ga4_property_cache_ttl: float = 300.0  # Seconds a user's property links are cached
+    ga4_tenant_max_concurrency: int = 4  # Concurrent GA4 calls per tenant
+    ga4_tenant_acquire_timeout: float = 30.0  # Max wait for a tenant slot before failing the call
+    
+    # GA4 quota scheduling (property quota returned with each report)
+    ga4_max_concurrent_per_property: int = 10  # GA4's concurrent request quota per property
+    ga4_background_token_reserve: float = 0.2  # Defer background syncs below this share of tokens left
+    ga4_degrade_token_share: float = 0.05  # Serve stored data only below this share of tokens left
+    
+    # GA4 call resilience (UNAVAILABLE, RESOURCE_EXHAUSTED and DEADLINE_EXCEEDED are retried)
+    ga4_retry_max_attempts: int = 3
+    ga4_retry_base_delay: float = 0.5  # Backoff before retry n is uniform in [0, base * 2^n]
+    ga4_retry_max_delay: float = 8.0
+    ga4_call_timeout: float = 30.0  # Per-attempt gRPC deadline
+    ga4_call_deadline: float = 60.0  # Overall budget for a call including retries
+    ga4_circuit_failure_threshold: int = 5  # Consecutive transient failures that open a property's breaker
+    ga4_circuit_reset_timeout: float = 30.0  # Seconds before a half-open probe is let through
+    
+    # GA4 metadata catalog (get_metadata per property, used to validate report fields)
+    ga4_metadata_cache_ttl: float = 86400.0
+    ga4_metadata_failure_ttl: float = 60.0
+    
+    # GA4 day-partitioned report cache (date-dimensioned reports, in memory)
+    ga4_day_cache_enabled: bool = True
+    ga4_day_cache_max_days: int = 50000  # Max cached (property, dimensions, metrics, day) entries
+    ga4_day_cache_recent_ttl: float = 300.0  # Seconds non-final days are reused before re-fetching
+    ga4_range_totals_max: int = 2000  # Max cached non-additive totals per (property, final date range)
+    
+    # GA4 report handles (recent reports kept for analyze_report)
+    ga4_report_handles_max: int = 200
+    ga4_report_handle_ttl: float = 3600.0
+    
+    # GA4 realtime (one shared run_realtime_report per property per interval)
+    ga4_realtime_interval: float = 10.0
+    ga4_realtime_heartbeat: float = 15.0  # SSE keep-alive comment interval
+    
+    # GA4 fact store (local daily metrics, see sync_ga4_facts.py)
+    ga4_fact_store_enabled: bool = False
+    ga4_fact_final_after_days: int = 3  # GA4 data older than this is treated as final
+    ga4_fact_sync_days_back: int = 90
+    ga4_fact_sync_chunk_days: int = 14  # Max days per sync request
+    
+    # Response compression (brotli when installed, otherwise gzip)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Bytes; smaller bodies are sent as-is
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # Fast enough for dynamic JSON, better ratio than gzip 6
+    
     # API Configuration - CORS origins as comma-separated string
     cors_origins: str = "http://localhost:3000,https://aterges.vercel.app,https://aterges-m7uy49hpk-javier-rodeiros-projects.vercel.app"
     
@@ -1,45 +1,224 @@
 import asyncpg
-from databases import Database as AsyncDatabase
 import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse, parse_qs, unquote
+
 from config import settings
+from database.instrumentation import QueryStats
 
 logger = logging.getLogger(__name__)
 
+# Named placeholders (":name") as accepted by the previous `databases` wrapper.
+# Same rule as SQLAlchemy's text(): Postgres casts ("::int") are left untouched.
+_NAMED_PARAM = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+
+# Supabase transaction-mode pooler (pgbouncer) cannot hold prepared statements
+_TRANSACTION_POOLER_PORT = 6543
+
+
+@lru_cache(maxsize=512)
+def _compile_query(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """Translate a ":name" query into asyncpg "$n" form and the ordered param names."""
+    names: List[str] = []
+
+    def _replace(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return _NAMED_PARAM.sub(_replace, query), tuple(names)
+
+
+def _bind(query: str, values: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """Return the compiled SQL and positional arguments for a named-parameter query."""
+    sql, names = _compile_query(query)
+    if not names:
+        return sql, []
+    values = values or {}
+    missing = [name for name in names if name not in values]
+    if missing:
+        raise ValueError(f"Missing values for query parameters: {', '.join(missing)}")
+    return sql, [values[name] for name in names]
+
+
+def _copy_row_count(status: str) -> int:
+    """Extract the row count from a "COPY <n>" command status."""
+    try:
+        return int(status.rsplit(" ", 1)[-1])
+    except (AttributeError, ValueError):
+        return 0
+
+
+def _connection_kwargs(database_url: str) -> Dict[str, Any]:
+    """Build asyncpg connect arguments from DATABASE_URL.
+
+    Only host, port, credentials, database and SSL mode are taken from the URL;
+    provider-specific query options (e.g. Supabase's ``supa=``) are not sent
+    to the server as runtime parameters.
+    """
+    url = urlparse(database_url)
+    query = parse_qs(url.query)
+
+    kwargs: Dict[str, Any] = {
+        "host": url.hostname,
+        "port": url.port or 5432,
+        "user": unquote(url.username) if url.username else None,
+        "password": unquote(url.password) if url.password else None,
+        "database": url.path.lstrip("/") or None,
+    }
+
+    ssl = (query.get("ssl") or query.get("sslmode") or [None])[0]
+    if ssl is not None:
+        kwargs["ssl"] = {"true": True, "false": False, "disable": False}.get(ssl.lower(), ssl.lower())
+
+    return kwargs
+
+
 class Database:
     def __init__(self):
-        self.database: AsyncDatabase = None
         self.pool: asyncpg.Pool = None
-    
+        self._pool_created_at: float = 0.0
+        self.stats = QueryStats(
+            slow_query_ms=settings.db_slow_query_ms,
+            slow_log_size=settings.db_slow_query_log_size
+        )
+
     async def connect(self):
-        """Connect to the database."""
+        """Create the asyncpg connection pool."""
         try:
-            self.database = AsyncDatabase(settings.database_url)
-            await self.database.connect()
-            logger.info("Database connected successfully")
+            connect_kwargs = _connection_kwargs(settings.database_url)
+
+            statement_cache_size = settings.db_statement_cache_size
+            if connect_kwargs["port"] == _TRANSACTION_POOLER_PORT and statement_cache_size:
+                logger.warning("Transaction-mode pooler detected, disabling prepared statement cache")
+                statement_cache_size = 0
+
+            self.pool = await asyncpg.create_pool(
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
+                max_queries=settings.db_max_queries,
+                max_inactive_connection_lifetime=settings.db_max_inactive_connection_lifetime,
+                command_timeout=settings.db_command_timeout,
+                statement_cache_size=statement_cache_size,
+                **connect_kwargs
+            )
+            self._pool_created_at = time.monotonic()
+            logger.info(
+                f"Database connected successfully "
+                f"(pool {settings.db_pool_min_size}-{settings.db_pool_max_size}, "
+                f"statement cache {statement_cache_size})"
+            )
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
-    
+
     async def disconnect(self):
-        """Disconnect from the database."""
-        if self.database:
-            await self.database.disconnect()
+        """Close the connection pool."""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
             logger.info("Database disconnected")
-    
-    async def execute(self, query: str, values: dict = None):
+
+    async def _recycle_if_expired(self):
+        """Expire pooled connections once they outlive db_max_connection_lifetime."""
+        lifetime = settings.db_max_connection_lifetime
+        if lifetime and time.monotonic() - self._pool_created_at > lifetime:
+            await self.pool.expire_connections()
+            self._pool_created_at = time.monotonic()
+            logger.info("Database connections expired for recycling")
+
+    @asynccontextmanager
+    async def connection(self):
+        """Acquire a pooled connection for multi-statement work."""
+        if not self.pool:
+            raise RuntimeError("Database is not connected")
+        await self._recycle_if_expired()
+        wait_started = time.perf_counter()
+        async with self.pool.acquire(timeout=settings.db_acquire_timeout) as conn:
+            self.stats.record_pool_wait(time.perf_counter() - wait_started)
+            yield conn
+
+    @asynccontextmanager
+    async def _statement(self, query: str, operation: str):
+        """Acquire a connection and time the statement run on it."""
+        async with self.connection() as conn:
+            started = time.perf_counter()
+            failed = True
+            try:
+                yield conn
+                failed = False
+            finally:
+                self.stats.record_query(query, time.perf_counter() - started, error=failed, operation=operation)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-statement latency, pool wait/utilization and recent slow queries."""
+        return self.stats.snapshot(self.pool)
+
+    def get_metrics_summary(self) -> Dict[str, Any]:
+        """Compact database metrics for /health."""
+        return self.stats.summary(self.pool)
+
+    async def execute(self, query: str, values: dict = None, timeout: float = None):
         """Execute a query."""
-        if values:
-            return await self.database.execute(query, values)
-        return await self.database.execute(query)
-    
-    async def fetch_one(self, query: str, values: dict = None):
+        sql, args = _bind(query, values)
+        async with self._statement(query, "execute") as conn:
+            return await conn.fetchval(sql, *args, timeout=timeout)
+
+    async def fetch_one(self, query: str, values: dict = None, timeout: float = None):
         """Fetch one record."""
-        if values:
-            return await self.database.fetch_one(query, values)
-        return await self.database.fetch_one(query)
-    
-    async def fetch_all(self, query: str, values: dict = None):
+        sql, args = _bind(query, values)
+        async with self._statement(query, "fetch_one") as conn:
+            return await conn.fetchrow(sql, *args, timeout=timeout)
+
+    async def fetch_all(self, query: str, values: dict = None, timeout: float = None):
         """Fetch all records."""
-        if values:
-            return await self.database.fetch_all(query, values)
-        return await self.database.fetch_all(query)
+        sql, args = _bind(query, values)
+        async with self._statement(query, "fetch_all") as conn:
+            return await conn.fetch(sql, *args, timeout=timeout)
+
+    async def execute_many(self, query: str, values: Iterable[dict], timeout: float = None):
+        """Execute a query once per values dict, pipelined over a single connection.
+
+        asyncpg runs the whole batch atomically: either every row is applied
+        or none is.
+        """
+        sql, names = _compile_query(query)
+
+        def _rows():
+            for row in values:
+                missing = [name for name in names if name not in row]
+                if missing:
+                    raise ValueError(f"Missing values for query parameters: {', '.join(missing)}")
+                yield [row[name] for name in names]
+
+        async with self._statement(query, "execute_many") as conn:
+            await conn.executemany(sql, _rows(), timeout=timeout)
+
+    async def bulk_insert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        records: Union[Iterable[tuple], AsyncIterable[tuple]],
+        schema: str = None,
+        timeout: float = None,
+    ) -> int:
+        """Stream row tuples into a table with binary COPY.
+
+        ``records`` may be a regular or async iterable; rows are consumed
+        lazily, so large exports never have to be held in memory.
+        Returns the number of rows copied.
+        """
+        async with self._statement(f"COPY {table} ({', '.join(columns)})", "bulk_insert") as conn:
+            status = await conn.copy_records_to_table(
+                table,
+                records=records,
+                columns=list(columns),
+                schema_name=schema,
+                timeout=timeout,
+            )
+        return _copy_row_count(status)
@@ -0,0 +1,138 @@
+"""
+Database query instrumentation
+Per-statement timing keyed by SQL fingerprint, pool wait/utilization and a slow-query log
+"""
+
+import logging
+import re
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict
+
+from monitoring.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Distinct fingerprints tracked before new ones are folded into one series
+MAX_FINGERPRINTS = 500
+OTHER_FINGERPRINT = "(other)"
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\$\d+|(?<![:\w]):\w+(?!:)")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """Normalize SQL so statements differing only in literals/params share one series."""
+    sql = _COMMENTS.sub(" ", query)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("(?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class _StatementStats:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+
+
+class QueryStats:
+    """
+    In-process database metrics.
+
+    Recording is a dict lookup plus a histogram update; formatting only
+    happens when a snapshot is requested.
+    """
+
+    def __init__(self, slow_query_ms: float, slow_log_size: int = 50):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.statements: Dict[str, _StatementStats] = {}
+        self.pool_wait = Histogram()
+        self.slow_queries: deque = deque(maxlen=slow_log_size)
+        self.slow_query_count = 0
+
+    def record_query(self, query: str, seconds: float, error: bool = False, operation: str = "query"):
+        key = fingerprint(query)
+        stats = self.statements.get(key)
+        if stats is None:
+            if len(self.statements) >= MAX_FINGERPRINTS:
+                key = OTHER_FINGERPRINT
+                stats = self.statements.setdefault(key, _StatementStats())
+            else:
+                stats = self.statements[key] = _StatementStats()
+
+        stats.latency.observe(seconds)
+        if error:
+            stats.errors += 1
+
+        if seconds >= self.slow_query_seconds:
+            self.slow_query_count += 1
+            entry = {
+                "fingerprint": key,
+                "operation": operation,
+                "duration_ms": round(seconds * 1000, 2),
+                "error": error,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.slow_queries.append(entry)
+            logger.warning(f"Slow query ({entry['duration_ms']}ms, {operation}): {key[:200]}")
+
+    def record_pool_wait(self, seconds: float):
+        self.pool_wait.observe(seconds)
+
+    @staticmethod
+    def pool_gauges(pool) -> Dict[str, Any]:
+        """Current pool size and utilization (read directly from asyncpg, no bookkeeping)."""
+        if pool is None:
+            return {"size": 0, "idle": 0, "in_use": 0, "max_size": 0, "utilization": 0.0}
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        max_size = pool.get_max_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "max_size": max_size,
+            "utilization": round((size - idle) / max_size, 3) if max_size else 0.0,
+        }
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        """Full metrics: every fingerprint, pool wait, pool gauges and recent slow queries."""
+        statements = [
+            {"fingerprint": key, "errors": stats.errors, **stats.latency.snapshot()}
+            for key, stats in self.statements.items()
+        ]
+        statements.sort(key=lambda s: s["avg_ms"] * s["count"], reverse=True)
+        return {
+            "statements": statements,
+            "pool": {**self.pool_gauges(pool), "wait": self.pool_wait.snapshot()},
+            "slow_query_threshold_ms": round(self.slow_query_seconds * 1000, 2),
+            "slow_query_count": self.slow_query_count,
+            "slow_queries": list(self.slow_queries),
+        }
+
+    def summary(self, pool=None, top: int = 3) -> Dict[str, Any]:
+        """Compact view for /health."""
+        total = sum(stats.latency.count for stats in self.statements.values())
+        errors = sum(stats.errors for stats in self.statements.values())
+        slowest = sorted(
+            ((key, stats.latency.quantile(0.95)) for key, stats in self.statements.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:top]
+        return {
+            "queries": total,
+            "errors": errors,
+            "slow_queries": self.slow_query_count,
+            "pool": {**self.pool_gauges(pool), "wait_p95_ms": round(self.pool_wait.quantile(0.95) * 1000, 2)},
+            "slowest_p95": [{"fingerprint": key[:120], "p95_ms": round(p95 * 1000, 2)} for key, p95 in slowest],
+        }
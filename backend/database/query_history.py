@@ -0,0 +1,218 @@
+"""
+Write-behind query history log
+Buffers /api/query history records in memory and flushes them to the database in batches
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE = "query_history"
+COLUMNS = ("user_id", "prompt", "response", "status", "tool_calls", "tool_call_count", "latency_ms", "created_at")
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_SPILL = "spill"
+
+
+def build_record(user_id: Optional[str],
+                 prompt: str,
+                 response: Optional[str],
+                 status: str,
+                 latency_ms: float,
+                 tool_calls: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Create a history record for one /api/query request."""
+    return {
+        "user_id": user_id,
+        "prompt": prompt,
+        "response": response,
+        "status": status,
+        "tool_calls": tool_calls or [],
+        "latency_ms": round(latency_ms, 2),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _to_row(record: Dict[str, Any]) -> tuple:
+    """Convert a history record into a COPY row matching COLUMNS."""
+    tool_calls = record.get("tool_calls") or []
+    return (
+        record.get("user_id"),
+        record["prompt"],
+        record.get("response"),
+        record["status"],
+        json.dumps(tool_calls, default=str),
+        len(tool_calls),
+        record.get("latency_ms"),
+        datetime.fromisoformat(record["created_at"]),
+    )
+
+
+class QueryHistoryWriter:
+    """
+    Batches history records and writes them with Database.bulk_insert.
+
+    A flush happens when batch_size records are buffered or every
+    flush_interval seconds, whichever comes first. The buffer never holds
+    more than max_buffer records; beyond that new records are dropped or,
+    with the "spill" policy, appended to a JSONL file that is replayed
+    once the database keeps up again.
+    """
+
+    def __init__(self,
+                 database,
+                 batch_size: int = None,
+                 flush_interval: float = None,
+                 max_buffer: int = None,
+                 overflow_policy: str = None,
+                 spill_path: str = None):
+        self.database = database
+        self.batch_size = batch_size or settings.query_history_batch_size
+        self.flush_interval = flush_interval or settings.query_history_flush_interval
+        self.max_buffer = max_buffer or settings.query_history_max_buffer
+        self.overflow_policy = overflow_policy or settings.query_history_overflow
+        self.spill_path = spill_path or settings.query_history_spill_path
+
+        self._buffer: deque = deque()
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0  # records currently waiting in the spill file
+        self.spilled_total = 0
+        self.failed_flushes = 0
+
+    def record(self, record: Dict[str, Any]):
+        """Queue a record without waiting for the database (never blocks the request)."""
+        if len(self._buffer) >= self.max_buffer:
+            self._overflow([record])
+        else:
+            self._buffer.append(record)
+
+        if len(self._buffer) >= self.batch_size:
+            self._flush_event.set()
+
+    def start(self):
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Query history writer started (batch {self.batch_size}, "
+                f"interval {self.flush_interval}s, buffer {self.max_buffer}, overflow {self.overflow_policy})"
+            )
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task:
+            # Let the loop finish its current flush instead of cancelling it mid-insert
+            self._stop_event.set()
+            self._flush_event.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error("Query history flush loop did not stop in time, cancelled")
+            self._task = None
+
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Query history final flush timed out with {len(self._buffer)} records pending")
+            self._overflow(list(self._buffer))
+            self._buffer.clear()
+        logger.info(f"Query history writer stopped ({self.written} written, {self.dropped} dropped)")
+
+    async def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Query history flush loop error: {e}")
+
+    async def flush(self):
+        """Write all buffered records in batch_size chunks, then replay any spill file."""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                try:
+                    self.written += await self.database.bulk_insert(TABLE, COLUMNS, (_to_row(r) for r in batch))
+                except asyncio.CancelledError:
+                    # Put the in-flight batch back so stop() can still write or spill it
+                    self._buffer.extendleft(reversed(batch))
+                    raise
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Query history flush failed for {len(batch)} records: {e}")
+                    self._overflow(batch)
+                    return
+
+            if self.overflow_policy == OVERFLOW_SPILL and os.path.exists(self.spill_path):
+                await self._replay_spill()
+
+    def _overflow(self, records: List[Dict[str, Any]]):
+        """Apply the overflow policy to records that cannot be buffered."""
+        if self.overflow_policy == OVERFLOW_SPILL:
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record, default=str) + "\n")
+                self.spilled += len(records)
+                self.spilled_total += len(records)
+                return
+            except OSError as e:
+                logger.error(f"Query history spill to {self.spill_path} failed: {e}")
+
+        self.dropped += len(records)
+        logger.warning(f"Query history dropped {len(records)} records (buffer full or database unavailable)")
+
+    async def _replay_spill(self):
+        """Stream the spill file back into the database without loading it into memory."""
+        replay_path = self.spill_path + ".replay"
+        os.replace(self.spill_path, replay_path)
+
+        def _rows() -> Iterator[tuple]:
+            with open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield _to_row(json.loads(line))
+
+        try:
+            replayed = await self.database.bulk_insert(TABLE, COLUMNS, _rows())
+            self.written += replayed
+            self.spilled = max(0, self.spilled - replayed)
+            os.remove(replay_path)
+            logger.info(f"Query history replayed {replayed} spilled records")
+        except Exception as e:
+            # COPY is atomic: nothing was written, keep the file for the next attempt
+            logger.error(f"Query history spill replay failed: {e}")
+            with open(self.spill_path, "a", encoding="utf-8") as out, open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    out.write(line)
+            os.remove(replay_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current buffer and throughput counters."""
+        return {
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spilled_total": self.spilled_total,
+            "failed_flushes": self.failed_flushes,
+            "overflow_policy": self.overflow_policy,
+        }
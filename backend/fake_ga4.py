@@ -0,0 +1,338 @@
+"""
+Fake GA4 Data API client for tests and benchmarks
+Generates deterministic daily data for any dimensions/metrics and records every request
+"""
+
+import itertools
+import re
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Dict, List
+
+from agents.ga4_fact_store import resolve_date
+
+# Values each dimension takes on every day; unknown dimensions get a single "(other)" value
+DIMENSION_VALUES: Dict[str, List[str]] = {
+    "sessionDefaultChannelGroup": ["Organic Search", "Direct", "Referral"],
+    "deviceCategory": ["desktop", "mobile"],
+    "country": ["Spain", "France"],
+    "pagePath": ["/", "/pricing", "/blog"],
+}
+
+TODAY = date(2025, 6, 30)
+PROPERTY = "properties/123"
+
+# Catalog served by get_metadata (api name -> category)
+METADATA_DIMENSIONS: Dict[str, str] = {
+    "date": "Time",
+    "sessionDefaultChannelGroup": "Traffic source",
+    "sessionSource": "Traffic source",
+    "sessionMedium": "Traffic source",
+    "deviceCategory": "Platform / Device",
+    "country": "Geography",
+    "pagePath": "Page / Screen",
+    "landingPage": "Page / Screen",
+    "unifiedScreenName": "Page / Screen",
+    "itemName": "Ecommerce",
+}
+METADATA_METRICS: Dict[str, str] = {
+    "sessions": "Session",
+    "engagedSessions": "Session",
+    "bounceRate": "Session",
+    "averageSessionDuration": "Session",
+    "activeUsers": "User",
+    "newUsers": "User",
+    "totalUsers": "User",
+    "screenPageViews": "Page / Screen",
+    "eventCount": "Event",
+    "purchaseRevenue": "Revenue",
+    "itemRevenue": "Ecommerce",
+    "itemsViewed": "Ecommerce",
+}
+
+
+def metric_value(day: date, values: tuple, metric: str) -> int:
+    """Deterministic, additive daily value for one dimension combination."""
+    return (day.toordinal() % 7 + 1) * (len(metric) + sum(len(v) for v in values))
+
+
+def _which(message, oneof: str):
+    """Name of the field set in a proto-plus oneof (None when unset)."""
+    return type(message).pb(message).WhichOneof(oneof)
+
+
+def _number(value) -> float:
+    return value.double_value if _which(value, "one_value") == "double_value" else value.int64_value
+
+
+def _matches(expression, values: dict) -> bool:
+    """Evaluate a FilterExpression against one row's field values, as GA4 would."""
+    kind = _which(expression, "expr")
+    if kind is None:
+        return True
+    if kind == "and_group":
+        return all(_matches(e, values) for e in expression.and_group.expressions)
+    if kind == "or_group":
+        return any(_matches(e, values) for e in expression.or_group.expressions)
+    if kind == "not_expression":
+        return not _matches(expression.not_expression, values)
+
+    condition = expression.filter
+    value = values.get(condition.field_name)
+    filter_kind = _which(condition, "one_filter")
+    if filter_kind == "string_filter":
+        string_filter = condition.string_filter
+        target = string_filter.value
+        if not string_filter.case_sensitive:
+            value, target = str(value).lower(), target.lower()
+        match = string_filter.match_type.name
+        if match == "EXACT":
+            return value == target
+        if match == "BEGINS_WITH":
+            return value.startswith(target)
+        if match == "ENDS_WITH":
+            return value.endswith(target)
+        if match == "CONTAINS":
+            return target in value
+        if match == "FULL_REGEXP":
+            return re.fullmatch(target, value) is not None
+        return re.search(target, value) is not None
+    if filter_kind == "in_list_filter":
+        in_list = condition.in_list_filter
+        if in_list.case_sensitive:
+            return value in in_list.values
+        return str(value).lower() in {v.lower() for v in in_list.values}
+    if filter_kind == "numeric_filter":
+        target = _number(condition.numeric_filter.value)
+        return {
+            "EQUAL": value == target,
+            "LESS_THAN": value < target,
+            "LESS_THAN_OR_EQUAL": value <= target,
+            "GREATER_THAN": value > target,
+            "GREATER_THAN_OR_EQUAL": value >= target,
+        }[condition.numeric_filter.operation.name]
+    if filter_kind == "between_filter":
+        between = condition.between_filter
+        return _number(between.from_value) <= value <= _number(between.to_value)
+    return True
+
+
+class FakeGA4Client:
+    """Stands in for BetaAnalyticsDataClient.run_report."""
+
+    def __init__(self, today: date = TODAY, tokens_per_day: int = None, tokens_per_request: int = 10):
+        self.today = today
+        self.requests = []
+        # Optional property quota simulation (returned when return_property_quota is set)
+        self.tokens_per_day = tokens_per_day
+        self.tokens_per_request = tokens_per_request
+        self.tokens_consumed = 0
+        self.realtime_calls = 0
+        self.metadata_calls = 0
+
+    def _aggregate(self, request, dimensions: List[str], metrics: List[str]) -> Dict[tuple, Dict[str, int]]:
+        """Metric totals per dimension-value combination over the request's date range and dimension filter."""
+        date_range = request.date_ranges[0]
+        start = resolve_date(date_range.start_date, self.today)
+        end = resolve_date(date_range.end_date, self.today)
+
+        breakdown = [d for d in dimensions if d != "date"]
+        all_dims = sorted(set(breakdown) | set(DIMENSION_VALUES))
+        aggregated: Dict[tuple, Dict[str, int]] = {}
+
+        day = start
+        while day <= end:
+            for combo in itertools.product(*(DIMENSION_VALUES.get(d, ["(other)"]) for d in all_dims)):
+                values = dict(zip(all_dims, combo), date=day.strftime("%Y%m%d"))
+                if not _matches(request.dimension_filter, values):
+                    continue
+                key = tuple(day.strftime("%Y%m%d") if d == "date" else values[d] for d in dimensions)
+                totals = aggregated.setdefault(key, {m: 0 for m in metrics})
+                for m in metrics:
+                    totals[m] += metric_value(day, combo, m)
+            day += timedelta(days=1)
+        return aggregated
+
+    def run_report(self, request=None, **kwargs):
+        self.requests.append(request)
+        dimensions = [d.name for d in request.dimensions]
+        metrics = [m.name for m in request.metrics]
+        aggregated = self._aggregate(request, dimensions, metrics)
+
+        results = [(key, totals) for key, totals in sorted(aggregated.items())
+                   if _matches(request.metric_filter, totals)]
+        for order_by in reversed(request.order_bys):
+            if _which(order_by, "one_order_by") == "metric":
+                sort_key = lambda item, name=order_by.metric.metric_name: item[1][name]
+            else:
+                sort_key = lambda item, i=dimensions.index(order_by.dimension.dimension_name): item[0][i]
+            results.sort(key=sort_key, reverse=order_by.desc)
+        page = results[request.offset:request.offset + request.limit] if request.limit else results[request.offset:]
+
+        rows = [
+            SimpleNamespace(
+                dimension_values=[SimpleNamespace(value=v) for v in key],
+                metric_values=[SimpleNamespace(value=str(totals[m])) for m in metrics],
+            )
+            for key, totals in page
+        ]
+        # metric_aggregations cover every matching row, not just the returned page
+        requested = {a.name for a in request.metric_aggregations}
+        aggregates = {}
+        for field, name, combine in (("totals", "TOTAL", sum), ("minimums", "MINIMUM", min),
+                                     ("maximums", "MAXIMUM", max)):
+            aggregates[field] = [SimpleNamespace(
+                dimension_values=[SimpleNamespace(value=f"RESERVED_{name}") for _ in dimensions],
+                metric_values=[SimpleNamespace(value=str(combine(totals[m] for _, totals in results)))
+                               for m in metrics],
+            )] if name in requested and results else []
+        return SimpleNamespace(rows=rows, row_count=len(results), property_quota=self._property_quota(request),
+                               **aggregates)
+
+    def run_pivot_report(self, request=None, **kwargs):
+        """Pivot report: each pivot keeps its top values (by its order_by), rows cover their combinations."""
+        self.requests.append(request)
+        return self._pivot(request)
+
+    def batch_run_pivot_reports(self, request=None, **kwargs):
+        self.requests.append(request)
+        return SimpleNamespace(pivot_reports=[self._pivot(sub_request) for sub_request in request.requests])
+
+    def _pivot(self, request):
+        dimensions = [d.name for d in request.dimensions]
+        metrics = [m.name for m in request.metrics]
+        aggregated = {key: totals for key, totals in self._aggregate(request, dimensions, metrics).items()
+                      if _matches(request.metric_filter, totals)}
+
+        headers, selected = [], []
+        for pivot in request.pivots:
+            positions = [dimensions.index(name) for name in pivot.field_names]
+            per_value: Dict[tuple, Dict[str, int]] = {}
+            for key, totals in aggregated.items():
+                value_totals = per_value.setdefault(tuple(key[i] for i in positions), {m: 0 for m in metrics})
+                for m in metrics:
+                    value_totals[m] += totals[m]
+            ranked = sorted(per_value.items())
+            for order_by in reversed(pivot.order_bys):
+                if _which(order_by, "one_order_by") == "metric":
+                    sort_key = lambda item, name=order_by.metric.metric_name: item[1][name]
+                else:
+                    sort_key = lambda item, i=list(pivot.field_names).index(order_by.dimension.dimension_name): \
+                        item[0][i]
+                ranked.sort(key=sort_key, reverse=order_by.desc)
+            kept = [value for value, _ in ranked[pivot.offset:pivot.offset + pivot.limit]]
+            headers.append(SimpleNamespace(
+                pivot_dimension_headers=[SimpleNamespace(dimension_values=[SimpleNamespace(value=v) for v in value])
+                                         for value in kept],
+                row_count=len(per_value),
+            ))
+            selected.append((positions, {value: rank for rank, value in enumerate(kept)}))
+
+        def rank(key):
+            return tuple(ranks[tuple(key[i] for i in positions)] for positions, ranks in selected)
+
+        keys = sorted((key for key in aggregated
+                       if all(tuple(key[i] for i in positions) in ranks for positions, ranks in selected)), key=rank)
+        rows = [
+            SimpleNamespace(
+                dimension_values=[SimpleNamespace(value=v) for v in key],
+                metric_values=[SimpleNamespace(value=str(aggregated[key][m])) for m in metrics],
+            )
+            for key in keys
+        ]
+        return SimpleNamespace(pivot_headers=headers, rows=rows, property_quota=self._property_quota(request))
+
+    def get_metadata(self, request=None, **kwargs):
+        self.metadata_calls += 1
+        return SimpleNamespace(
+            dimensions=[SimpleNamespace(api_name=name, category=category, deprecated_api_names=[])
+                        for name, category in METADATA_DIMENSIONS.items()],
+            metrics=[SimpleNamespace(api_name=name, category=category, deprecated_api_names=[])
+                     for name, category in METADATA_METRICS.items()],
+        )
+
+    def run_realtime_report(self, request=None, **kwargs):
+        """Active users per screen for the last 30 minutes; grows by one user per call."""
+        self.requests.append(request)
+        self.realtime_calls += 1
+        screens = DIMENSION_VALUES["pagePath"]
+        rows = [
+            SimpleNamespace(
+                dimension_values=[SimpleNamespace(value=screen)],
+                metric_values=[SimpleNamespace(value=str(len(screens) - i + self.realtime_calls)),
+                               SimpleNamespace(value=str((len(screens) - i) * 3))],
+            )
+            for i, screen in enumerate(screens)
+        ]
+        totals = [SimpleNamespace(metric_values=[
+            SimpleNamespace(value=str(sum(int(row.metric_values[m].value) for row in rows))) for m in (0, 1)
+        ])]
+        return SimpleNamespace(rows=rows, totals=totals, row_count=len(rows),
+                               property_quota=self._property_quota(request))
+
+    def _property_quota(self, request):
+        if self.tokens_per_day is None or not getattr(request, "return_property_quota", False):
+            return None
+        self.tokens_consumed += self.tokens_per_request
+        remaining = max(0, self.tokens_per_day - self.tokens_consumed)
+        return SimpleNamespace(
+            tokens_per_day=SimpleNamespace(consumed=self.tokens_per_request, remaining=remaining),
+            concurrent_requests=SimpleNamespace(consumed=0, remaining=10),
+        )
+
+
+class FaultyGA4Client:
+    """
+    Wraps a fake client and injects GA4 failures.
+
+    faults is consumed one entry per call: a gRPC status name
+    ("UNAVAILABLE", "RESOURCE_EXHAUSTED", "DEADLINE_EXCEEDED", "INVALID_ARGUMENT")
+    raises the matching google.api_core exception, None passes the call
+    through. Once faults runs out, fail_with (if set) applies to every call.
+    """
+
+    def __init__(self, inner: FakeGA4Client = None, faults: List[str] = None, fail_with: str = None):
+        self.inner = inner or FakeGA4Client()
+        self.faults = list(faults or [])
+        self.fail_with = fail_with
+        self.calls = 0
+        self.timeouts = []
+
+    @property
+    def requests(self):
+        return self.inner.requests
+
+    def run_report(self, request=None, timeout=None, **kwargs):
+        import grpc
+        from google.api_core import exceptions
+
+        self.calls += 1
+        self.timeouts.append(timeout)
+        fault = self.faults.pop(0) if self.faults else self.fail_with
+        if fault:
+            raise exceptions.from_grpc_status(getattr(grpc.StatusCode, fault), f"injected {fault}")
+        return self.inner.run_report(request=request, **kwargs)
+
+    def get_metadata(self, request=None, **kwargs):
+        return self.inner.get_metadata(request=request, **kwargs)
+
+
+def make_agent(client=None, property_id: str = PROPERTY, **components):
+    """
+    A GoogleAnalyticsAgent on a fake client (a fresh FakeGA4Client unless given).
+
+    components replace the agent's optional parts by attribute name, e.g.
+    day_cache=None or resilience=GA4Resilience(...); a callable is called
+    with the agent first, for parts wrapping its fetchers
+    (realtime=lambda agent: RealtimeHub(agent._fetch_realtime, interval=0.05)).
+    """
+    from agents.google_analytics_agent import GoogleAnalyticsAgent
+
+    agent = GoogleAnalyticsAgent()
+    agent.ga_client = client or FakeGA4Client()
+    agent.default_property_id = property_id
+    for name, component in components.items():
+        if not hasattr(agent, name):
+            raise AttributeError(f"GoogleAnalyticsAgent has no component {name!r}")
+        setattr(agent, name, component(agent) if callable(component) else component)
+    return agent
@@ -0,0 +1,33 @@
+"""
+Deferred SDK imports
+The Google SDKs (Vertex AI, GA4 Data API) pull in protobuf and gRPC stubs for hundreds of
+services and dominate cold-start time; they are bound as LazyModule proxies and only
+imported on first attribute access
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """Proxy for a module that is imported the first time one of its attributes is used."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Agents are built in worker threads; import once even if two threads race here
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
@@ -1,9 +1,14 @@
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
+import time
+
+import orjson
 from typing import Dict, Any, Optional
 
 # Supabase imports for authentication
@@ -14,9 +19,20 @@ from config import settings
 from auth.auth_service_improved import AuthService
 from auth.models import UserSignup, UserLogin, UserResponse
 from database.database import Database
+from middleware.compression import CompressionMiddleware, CompressionStats
+from middleware.metrics import MetricsMiddleware
+from monitoring.metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge, LatencyHistogram
+from monitoring.readiness import ReadinessMonitor
+from startup import StartupReport
+from database.query_history import QueryHistoryWriter, build_record
+from agents.ga4_fact_store import GA4FactStore
+from agents.ga4_quota import GA4QuotaScheduler
+from agents.ga4_tenancy import PropertyResolver, TenantLimiter
 
 # AI Orchestrator import
 from ai.orchestrator import AIOrchestrator
+from ai.warmup import ClientWarmer
+from ai.models import QueryResponse, AIStatusResponse, AgentsHealthResponse, RealtimeResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,53 +60,196 @@ else:
 auth_service: AuthService = None
 database: Database = None
 ai_orchestrator: AIOrchestrator = None
+query_history: Optional[QueryHistoryWriter] = None
+readiness: Optional[ReadinessMonitor] = None
+ai_init_task: Optional[asyncio.Task] = None
+client_warmer: Optional[ClientWarmer] = None
+startup_report = StartupReport()
+
+
+async def _check_database():
+    await database.execute("SELECT 1", timeout=settings.readiness_check_timeout)
+    return {"status": "ok"}
+
+
+async def _check_google_cloud_config():
+    # Filesystem lookup, kept off the probe path
+    complete = await asyncio.to_thread(settings.validate_google_cloud_config)
+    return {"status": "ok" if complete else "warning", "configuration": "complete" if complete else "incomplete"}
+
+
+async def _check_warmup():
+    # Reads warm-up state only; the warm-up itself runs in the background
+    if not settings.warmup_enabled:
+        return {"status": "ok", "state": "disabled"}
+    if not client_warmer:
+        return {"status": "warning", "state": "pending", "ai_orchestrator": _ai_state()}
+    return client_warmer.status()
+
+
+def _build_readiness() -> ReadinessMonitor:
+    """Database is critical; AI configuration and agents are reported but do not gate readiness."""
+    monitor = ReadinessMonitor(
+        interval=settings.readiness_refresh_interval,
+        timeout=settings.readiness_check_timeout,
+        stale_after=settings.readiness_stale_after,
+    )
+    monitor.add_check("database", _check_database, critical=True)
+    monitor.add_check("google_cloud_config", _check_google_cloud_config, critical=False)
+    monitor.add_check("warmup", _check_warmup, critical=settings.warmup_enabled and settings.warmup_gates_readiness,
+                      interval=2.0)
+    if ai_orchestrator:
+        _add_agent_checks(monitor, ai_orchestrator)
+    return monitor
+
+
+def _add_agent_checks(monitor: ReadinessMonitor, orchestrator: AIOrchestrator):
+    for agent_name, agent in orchestrator.agents.items():
+        monitor.add_check(f"agent:{agent_name}", agent.health_check, critical=False,
+                          interval=settings.readiness_agent_check_interval)
+
+
+def _build_ai_orchestrator() -> Optional[AIOrchestrator]:
+    """Construct the orchestrator (Vertex init, model, GA4 client). Blocking; runs in a worker thread."""
+    # Validate Google Cloud configuration
+    if not settings.validate_google_cloud_config():
+        logger.warning("Google Cloud configuration incomplete:")
+        logger.warning(f"  - Project ID: {'✓' if settings.google_cloud_project else '✗'}")
+        logger.warning(f"  - Credentials file: {'✓' if settings.google_application_credentials else '✗'}")
+        logger.warning(f"  - File exists: {'✓' if settings.google_application_credentials and os.path.exists(settings.google_application_credentials) else '✗'}")
+        logger.warning("AI features will be unavailable until configuration is complete")
+        logger.warning("See ATERGES_INDEPENDENT_SETUP.md for setup instructions")
+        return None
+    
+    orchestrator = AIOrchestrator(
+        project_id=settings.google_cloud_project,
+        location=settings.google_cloud_location
+    )
+    logger.info("AI Orchestrator initialized successfully")
+    logger.info(f"Using Google Cloud project: {settings.google_cloud_project}")
+    logger.info(f"GA4 Property ID: {settings.ga4_property_id or 'Not configured'}")
+    
+    # Serve final GA4 days from the local fact store
+    if settings.ga4_fact_store_enabled and 'google_analytics' in orchestrator.agents:
+        orchestrator.agents['google_analytics'].fact_store = GA4FactStore(database)
+        logger.info("GA4 fact store attached to Google Analytics Agent")
+    
+    # Serve each user's own GA4 property, with per-tenant concurrency limits
+    orchestrator.property_resolver = PropertyResolver(database, ttl=settings.ga4_property_cache_ttl)
+    if 'google_analytics' in orchestrator.agents:
+        orchestrator.agents['google_analytics'].tenant_limiter = TenantLimiter(
+            max_concurrent=settings.ga4_tenant_max_concurrency,
+            acquire_timeout=settings.ga4_tenant_acquire_timeout,
+        )
+        orchestrator.agents['google_analytics'].quota_scheduler = GA4QuotaScheduler(
+            max_concurrent=settings.ga4_max_concurrent_per_property,
+            background_reserve=settings.ga4_background_token_reserve,
+            degrade_below=settings.ga4_degrade_token_share,
+        )
+    return orchestrator
+
+
+def _publish_ai(orchestrator: Optional[AIOrchestrator]):
+    global ai_orchestrator, client_warmer
+    if orchestrator and not ai_orchestrator:
+        ai_orchestrator = orchestrator
+        if readiness:
+            _add_agent_checks(readiness, orchestrator)
+        if settings.warmup_enabled:
+            client_warmer = ClientWarmer(
+                orchestrator,
+                timeout=settings.warmup_timeout,
+                refresh_interval=settings.token_refresh_interval,
+                refresh_margin=settings.token_refresh_margin,
+            )
+            client_warmer.start()
+
+
+def _ai_initialized(future: asyncio.Future):
+    """Publish the orchestrator once construction finishes, even if that is past the startup timeout."""
+    if not future.cancelled() and future.exception() is None:
+        _publish_ai(future.result())
+
+
+async def _init_ai():
+    build = asyncio.ensure_future(asyncio.to_thread(_build_ai_orchestrator))
+    build.add_done_callback(_ai_initialized)
+    orchestrator = await startup_report.run_step("ai_orchestrator", build, timeout=settings.startup_ai_timeout)
+    _publish_ai(orchestrator)
+    if build.done() and not ai_orchestrator and startup_report.steps["ai_orchestrator"]["status"] == "error":
+        logger.warning("AI features will be unavailable")
+        logger.warning("Check your Google Cloud credentials and configuration")
+
+
+async def get_ai_orchestrator() -> Optional[AIOrchestrator]:
+    """The orchestrator, building it on first use (or joining the background warm-up already running)."""
+    global ai_init_task
+    if ai_orchestrator or settings.startup_ai_mode == "disabled":
+        return ai_orchestrator
+    if ai_init_task is None:
+        ai_init_task = asyncio.create_task(_init_ai())
+    await asyncio.shield(ai_init_task)
+    return ai_orchestrator
+
+
+def _ai_state() -> str:
+    if ai_orchestrator:
+        return "available"
+    if ai_init_task is None:
+        return "deferred" if settings.startup_ai_mode == "lazy" else "unavailable"
+    return "initializing" if not ai_init_task.done() else "unavailable"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    global auth_service, database, ai_orchestrator
+    global auth_service, database, query_history, readiness, ai_init_task, startup_report
     
     # Startup
     logger.info("Starting Aterges AI Backend...")
+    startup_report = StartupReport()
     
-    # Initialize database
+    # Independent initializers run together; the pool and the auth client don't need each other
     database = Database()
-    await database.connect()
+    steps = await startup_report.run_concurrently({
+        "database": (database.connect, True),
+        "auth_service": (lambda: asyncio.to_thread(AuthService, database), True),
+    }, timeout=settings.startup_step_timeout)
+    auth_service = steps["auth_service"]
     
-    # Initialize auth service
-    auth_service = AuthService(database)
+    # Start write-behind query history log
+    if settings.query_history_enabled:
+        query_history = QueryHistoryWriter(database)
+        query_history.start()
     
-    # Initialize AI Orchestrator (Phase 1)
-    try:
-        # Validate Google Cloud configuration
-        if not settings.validate_google_cloud_config():
-            logger.warning("Google Cloud configuration incomplete:")
-            logger.warning(f"  - Project ID: {'✓' if settings.google_cloud_project else '✗'}")
-            logger.warning(f"  - Credentials file: {'✓' if settings.google_application_credentials else '✗'}")
-            logger.warning(f"  - File exists: {'✓' if settings.google_application_credentials and os.path.exists(settings.google_application_credentials) else '✗'}")
-            logger.warning("AI features will be unavailable until configuration is complete")
-            logger.warning("See ATERGES_INDEPENDENT_SETUP.md for setup instructions")
-        else:
-            ai_orchestrator = AIOrchestrator(
-                project_id=settings.google_cloud_project,
-                location=settings.google_cloud_location
-            )
-            logger.info("AI Orchestrator initialized successfully")
-            logger.info(f"Using Google Cloud project: {settings.google_cloud_project}")
-            logger.info(f"GA4 Property ID: {settings.ga4_property_id or 'Not configured'}")
-            
-    except Exception as e:
-        logger.error(f"Failed to initialize AI Orchestrator: {e}")
-        logger.warning("AI features will be unavailable")
-        logger.warning("Check your Google Cloud credentials and configuration")
+    # Background dependency checks for /readyz
+    readiness = _build_readiness()
+    readiness.start()
     
+    # AI Orchestrator (Phase 1): Vertex init, model and GA4 client are the slowest part of startup
+    if settings.startup_ai_mode == "eager":
+        ai_init_task = asyncio.create_task(_init_ai())
+        await ai_init_task
+    elif settings.startup_ai_mode == "background":
+        ai_init_task = asyncio.create_task(_init_ai())
+    
+    startup_report.mark_ready()
     logger.info("Backend initialization complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down backend...")
+    if ai_init_task and not ai_init_task.done():
+        ai_init_task.cancel()
+    if client_warmer:
+        await client_warmer.stop()
+    if ai_orchestrator and 'google_analytics' in ai_orchestrator.agents:
+        await ai_orchestrator.agents['google_analytics'].realtime.stop()
+    if readiness:
+        await readiness.stop()
+    if query_history:
+        await query_history.stop()
     if database:
         await database.disconnect()
 
@@ -101,7 +260,9 @@ app = FastAPI(
     description="Backend API for Aterges AI Platform - AI Orchestrator with Google Analytics Integration",
     version="1.3.0",
     debug=settings.debug,
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Typed endpoints are serialized by pydantic-core and rendered with orjson
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -114,6 +275,103 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Add response compression (outside CORS, so it sees the final headers; only metrics wraps it)
+compression_stats = CompressionStats()
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        stats=compression_stats,
+    )
+
+# Request metrics (outermost, so latency includes compression)
+app.add_middleware(MetricsMiddleware)
+
+
+def _collect_runtime_metrics():
+    """Scrape-time view of the database pool, query history writer and compression stats."""
+    families = []
+    if database:
+        gauges = database.stats.pool_gauges(database.pool)
+        pool = Gauge("aterges_db_pool_connections", "Database pool connections by state", ("state",))
+        pool.labels("in_use").set(gauges["in_use"])
+        pool.labels("idle").set(gauges["idle"])
+        pool_max = Gauge("aterges_db_pool_max_size", "Configured database pool size")
+        pool_max.labels().set(gauges["max_size"])
+        pool_wait = LatencyHistogram("aterges_db_pool_wait_seconds", "Time spent waiting for a pool connection")
+        pool_wait.attach(database.stats.pool_wait)
+        statements = database.stats.statements.values()
+        queries = Counter("aterges_db_queries_total", "Database statements executed")
+        queries.labels().inc(sum(stats.latency.count for stats in statements))
+        errors = Counter("aterges_db_query_errors_total", "Database statements that raised")
+        errors.labels().inc(sum(stats.errors for stats in statements))
+        slow = Counter("aterges_db_slow_queries_total", "Database statements over the slow-query threshold")
+        slow.labels().inc(database.stats.slow_query_count)
+        families += [pool, pool_max, pool_wait, queries, errors, slow]
+    if query_history:
+        history = query_history.get_stats()
+        records = Counter("aterges_query_history_records_total", "Query history records by outcome", ("outcome",))
+        for outcome, key in (("written", "written"), ("dropped", "dropped"), ("spilled", "spilled_total")):
+            records.labels(outcome).inc(history[key])
+        buffered = Gauge("aterges_query_history_buffered", "Query history records waiting to be flushed")
+        buffered.labels().set(history["buffered"])
+        spill_pending = Gauge("aterges_query_history_spill_pending", "Spilled query history records not yet replayed")
+        spill_pending.labels().set(history["spilled"])
+        families += [records, buffered, spill_pending]
+    ga_agent = ai_orchestrator.agents.get('google_analytics') if ai_orchestrator else None
+    if ga_agent and ga_agent.tenant_limiter:
+        in_flight = Gauge("aterges_ga4_tenant_in_flight", "GA4 calls in flight per tenant", ("tenant",))
+        waiting = Gauge("aterges_ga4_tenant_waiting", "GA4 calls waiting for a tenant slot", ("tenant",))
+        rejected = Counter("aterges_ga4_tenant_rejected_total", "GA4 calls rejected after waiting for a tenant slot",
+                           ("tenant",))
+        for tenant, stats in ga_agent.tenant_limiter.get_stats()["tenants"].items():
+            in_flight.labels(tenant).set(stats["in_flight"])
+            waiting.labels(tenant).set(stats["waiting"])
+            rejected.labels(tenant).inc(stats["rejected"])
+        clients = Gauge("aterges_ga4_clients", "GA4 clients pooled by credential identity")
+        clients.labels().set(ga_agent.client_pool.get_stats()["clients"])
+        families += [in_flight, waiting, rejected, clients]
+    if ga_agent and ga_agent.quota_scheduler:
+        remaining = Gauge("aterges_ga4_quota_remaining", "GA4 property quota remaining at the last response",
+                          ("property", "quota"))
+        share = Gauge("aterges_ga4_quota_token_share", "Smallest share of GA4 tokens left per property", ("property",))
+        property_in_flight = Gauge("aterges_ga4_property_in_flight", "GA4 calls in flight per property", ("property",))
+        queued = Gauge("aterges_ga4_property_queued", "GA4 calls queued for a property slot", ("property",))
+        throttled = Counter("aterges_ga4_quota_throttled_total", "GA4 calls deferred, degraded or refused on quota",
+                            ("property", "action"))
+        for property_id, stats in ga_agent.quota_scheduler.get_stats()["properties"].items():
+            for quota, reading in stats["quota"].items():
+                remaining.labels(property_id, quota).set(reading["remaining"])
+            if stats["token_share"] is not None:
+                share.labels(property_id).set(stats["token_share"])
+            property_in_flight.labels(property_id).set(stats["in_flight"])
+            queued.labels(property_id).set(stats["queued"])
+            for action in ("deferred", "degraded", "exhausted"):
+                throttled.labels(property_id, action).inc(stats[action])
+        families += [remaining, share, property_in_flight, queued, throttled]
+    if ga_agent and ga_agent.resilience:
+        circuit_open = Gauge("aterges_ga4_circuit_open", "1 while a property's GA4 circuit breaker is open or probing",
+                             ("property",))
+        short_circuited = Counter("aterges_ga4_circuit_short_circuited_total",
+                                  "GA4 calls failed fast by an open circuit breaker", ("property",))
+        for property_id, breaker in ga_agent.resilience.get_stats()["breakers"].items():
+            circuit_open.labels(property_id).set(0 if breaker["state"] == "closed" else 1)
+            short_circuited.labels(property_id).inc(breaker["short_circuited"])
+        families += [circuit_open, short_circuited]
+    if settings.compression_enabled:
+        compressed = Counter("aterges_compression_bytes_total", "Response bytes before/after compression",
+                             ("encoding", "stage"))
+        for encoding in compression_stats.responses:
+            compressed.labels(encoding, "in").inc(compression_stats.bytes_in[encoding])
+            compressed.labels(encoding, "out").inc(compression_stats.bytes_out[encoding])
+        families.append(compressed)
+    return families
+
+
+REGISTRY.add_collector(_collect_runtime_metrics)
+
 
 # Dependency to get current user using Supabase JWT verification
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
@@ -260,8 +518,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    ai_status = "available" if ai_orchestrator else "unavailable"
-    config_status = "complete" if settings.validate_google_cloud_config() else "incomplete"
+    ai_status = _ai_state()
     
     # Get the actual port from environment (Cloud Run sets this automatically)
     current_port = os.environ.get("PORT", "8000")
@@ -276,6 +533,12 @@ async def health_check():
             "auth_service": "available" if auth_service else "unavailable",
             "ai_orchestrator": ai_status
         },
+        "readiness": readiness.snapshot()["status"] if readiness else "starting",
+        "startup": startup_report.snapshot(),
+        "warmup": client_warmer.status() if client_warmer else None,
+        "database_metrics": database.get_metrics_summary() if database else None,
+        "query_history": query_history.get_stats() if query_history else "disabled",
+        "compression": compression_stats.snapshot() if settings.compression_enabled else "disabled",
         "cors_origins": settings.get_cors_origins_list(),
         "environment_check": {
             "SUPABASE_URL": "set" if os.environ.get("SUPABASE_URL") else "missing",
@@ -288,11 +551,34 @@ async def health_check():
     }
 
 
+# Liveness probe: process is up and serving, no I/O
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    return {"status": "alive"}
+
+
+# Readiness probe: cached dependency status, refreshed in the background
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    if not readiness:
+        return ORJSONResponse({"status": "starting", "checks": {}}, status_code=503)
+    snapshot = readiness.snapshot()
+    return ORJSONResponse(snapshot, status_code=200 if snapshot["status"] == "ready" else 503)
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, GA4, Gemini, tool, cache and database metrics."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 # AI status endpoint
-@app.get("/api/ai/status")
+@app.get("/api/ai/status", response_model=AIStatusResponse, response_model_exclude_none=True)
 async def ai_status(current_user = Depends(get_current_user)):
     """Get AI system status."""
-    if not ai_orchestrator:
+    orchestrator = await get_ai_orchestrator()
+    if not orchestrator:
         config_issues = []
         if not settings.google_cloud_project:
             config_issues.append("GOOGLE_CLOUD_PROJECT not set")
@@ -309,13 +595,22 @@ async def ai_status(current_user = Depends(get_current_user)):
         }
     
     try:
-        status = ai_orchestrator.get_agent_status()
+        status = orchestrator.get_agent_status()
         return {"status": "available", "details": status}
     except Exception as e:
         logger.error(f"Error getting AI status: {e}")
         return {"status": "error", "message": str(e)}
 
 
+# Database metrics endpoint
+@app.get("/api/db/metrics")
+async def db_metrics(current_user = Depends(get_current_user)):
+    """Per-statement latency histograms, pool wait/utilization and the slow-query log."""
+    if not database:
+        return {"status": "unavailable", "message": "Database not initialized"}
+    return {"status": "available", "metrics": database.get_metrics()}
+
+
 # Authentication endpoints
 @app.post("/auth/signup")
 async def signup(user_data: UserSignup):
@@ -472,8 +767,22 @@ async def get_me(current_user = Depends(get_current_user)):
     }
 
 
+def _record_query_history(current_user: Dict[str, Any], prompt: str, response: Optional[str],
+                          status: str, started: float, tool_calls: list):
+    """Hand a finished /api/query request to the write-behind history log."""
+    if query_history:
+        query_history.record(build_record(
+            user_id=current_user.get("id"),
+            prompt=prompt,
+            response=response,
+            status=status,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            tool_calls=tool_calls
+        ))
+
+
 # AI Query endpoint - Phase 1 Implementation
-@app.post("/api/query")
+@app.post("/api/query", response_model=QueryResponse, response_model_exclude_none=True)
 async def query_ai(
     query_data: dict,
     current_user = Depends(get_current_user)
@@ -484,13 +793,17 @@ async def query_ai(
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt is required")
     
-    if not ai_orchestrator:
+    orchestrator = await get_ai_orchestrator()
+    if not orchestrator:
         return {
             "response": "I apologize, but the AI system is currently unavailable. Please ensure your Google Cloud configuration is complete. Check the server logs or visit /api/ai/status for more details.",
             "status": "ai_unavailable",
             "help": "See ATERGES_INDEPENDENT_SETUP.md for configuration instructions"
         }
     
+    started = time.perf_counter()
+    tool_calls = []
+    
     try:
         # Prepare user context for the AI
         user_context = {
@@ -502,12 +815,14 @@ async def query_ai(
         # Process the query through the AI Orchestrator
         logger.info(f"Processing AI query for user {user_context['email']}: {prompt[:100]}...")
         
-        response = await ai_orchestrator.process_query(
+        response = await orchestrator.process_query(
             user_query=prompt,
-            user_context=user_context
+            user_context=user_context,
+            trace=tool_calls
         )
         
         logger.info(f"AI query processed successfully for user {user_context['email']}")
+        _record_query_history(current_user, prompt, response, "success", started, tool_calls)
         
         return {
             "response": response,
@@ -517,6 +832,7 @@ async def query_ai(
         
     except Exception as e:
         logger.error(f"Error processing AI query for user {current_user.get('email')}: {e}")
+        _record_query_history(current_user, prompt, str(e), "error", started, tool_calls)
         return {
             "response": f"I encountered an error while processing your request: {str(e)}. Please try again or contact support if the issue persists.",
             "status": "error"
@@ -524,10 +840,11 @@ async def query_ai(
 
 
 # Agent health check endpoint
-@app.get("/api/agents/health")
-async def agents_health_check(current_user = Depends(get_current_user)):
-    """Check health of all data agents."""
-    if not ai_orchestrator:
+@app.get("/api/agents/health", response_model=AgentsHealthResponse, response_model_exclude_none=True)
+async def agents_health_check(refresh: bool = False, current_user = Depends(get_current_user)):
+    """Check health of all data agents (cached; refresh=true re-runs the checks)."""
+    orchestrator = await get_ai_orchestrator()
+    if not orchestrator or not readiness:
         return {
             "status": "unavailable", 
             "message": "AI Orchestrator not initialized",
@@ -535,10 +852,22 @@ async def agents_health_check(current_user = Depends(get_current_user)):
         }
     
     try:
-        health_results = {}
+        # Served from the readiness cache; deep checks run concurrently with timeouts
+        names = [f"agent:{agent_name}" for agent_name in orchestrator.agents]
+        cached = readiness.results(prefix="agent:")
+        if refresh or any(cached.get(name, {}).get("status", "pending") == "pending" for name in names):
+            await readiness.refresh(force=True, names=names)
+            cached = readiness.results(prefix="agent:")
         
-        for agent_name, agent in ai_orchestrator.agents.items():
-            health_results[agent_name] = await agent.health_check()
+        health_results = {}
+        for name, result in cached.items():
+            detail = result.get("detail") or {"status": result["status"], "message": result.get("error")}
+            health_results[name[len("agent:"):]] = {
+                **detail,
+                "checked_at": result.get("checked_at"),
+                "age_seconds": result.get("age_seconds"),
+                "stale": result.get("stale"),
+            }
         
         return {
             "status": "checked",
@@ -551,6 +880,45 @@ async def agents_health_check(current_user = Depends(get_current_user)):
         return {"status": "error", "message": str(e)}
 
 
+async def _realtime_agent(current_user: Dict[str, Any]):
+    """The GA agent and the user's GA4 property for realtime endpoints"""
+    orchestrator = await get_ai_orchestrator()
+    if not orchestrator or 'google_analytics' not in orchestrator.agents:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Google Analytics agent not available")
+    agent = orchestrator.agents['google_analytics']
+    property_id = await orchestrator._resolve_property({"user_id": current_user.get("id")})
+    property_id = property_id or agent.default_property_id
+    if not agent.ga_client or not property_id:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="No GA4 property configured")
+    return agent, property_id
+
+
+@app.get("/api/analytics/realtime", response_model=RealtimeResponse, response_model_exclude_none=True)
+async def realtime_snapshot(current_user = Depends(get_current_user)):
+    """Active users for the last 30 minutes (shared snapshot, at most one GA4 request per interval)."""
+    agent, property_id = await _realtime_agent(current_user)
+    return await agent.get_real_time_data(property_id=property_id)
+
+
+@app.get("/api/analytics/realtime/stream")
+async def realtime_stream(current_user = Depends(get_current_user)):
+    """Server-sent events: one realtime snapshot per interval, shared by every viewer of the property."""
+    agent, property_id = await _realtime_agent(current_user)
+    
+    async def events():
+        async for snapshot in agent.realtime.subscribe(property_id, heartbeat=settings.ga4_realtime_heartbeat):
+            if snapshot is None:
+                yield b": keep-alive\n\n"
+            else:
+                event = b"event: error\n" if "error" in snapshot else b""
+                yield event + b"data: " + orjson.dumps(snapshot) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 if __name__ == "__main__":
     import uvicorn
     # Use PORT environment variable for Cloud Run, default to 8000 for local development
@@ -0,0 +1,13 @@
+"""
+Aterges Middleware Module
+ASGI middleware for the FastAPI application
+"""
+
+from middleware.compression import CompressionMiddleware, CompressionStats
+from middleware.metrics import MetricsMiddleware
+
+__all__ = [
+    'CompressionMiddleware',
+    'CompressionStats',
+    'MetricsMiddleware'
+]
@@ -0,0 +1,244 @@
+"""
+Negotiated response compression (brotli / gzip)
+Compresses large responses, streams chunked bodies without buffering and never touches SSE
+"""
+
+import logging
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.histogram import Histogram
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without the brotli package
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Never buffered or compressed: SSE must reach the client event by event
+STREAMING_CONTENT_TYPES = ("text/event-stream",)
+
+# Already compressed formats; recompressing only costs CPU
+PRECOMPRESSED_CONTENT_TYPES = (
+    "image/png", "image/jpeg", "image/gif", "image/webp", "image/avif",
+    "video/", "audio/", "font/woff", "font/woff2",
+    "application/zip", "application/gzip", "application/x-gzip", "application/pdf",
+    "application/octet-stream",
+)
+
+# Compression CPU time per response, in seconds
+CPU_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = None) -> Optional[str]:
+    """Pick the accepted encoding with the highest q ("br" on ties, never q=0), or None."""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if token:
+            accepted[token] = q
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = [encoding for encoding in ("br", "gzip") if encoding != "br" or brotli_available]
+    # max() keeps the first of equal q-values, so br is preferred only on a tie
+    best = max(candidates, key=lambda encoding: accepted.get(encoding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, chunk: bytes, flush: bool) -> bytes:
+        data = self._compressor.compress(chunk)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, chunk: bytes, flush: bool) -> bytes:
+        data = self._compressor.process(chunk)
+        return data + self._compressor.flush() if flush else data
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionStats:
+    """Bytes in/out per encoding, compression CPU per response and skip reasons."""
+
+    def __init__(self):
+        self.responses: Dict[str, int] = {"br": 0, "gzip": 0}
+        self.bytes_in: Dict[str, int] = {"br": 0, "gzip": 0}
+        self.bytes_out: Dict[str, int] = {"br": 0, "gzip": 0}
+        self.cpu = Histogram(CPU_BUCKETS)
+        self.skipped: Dict[str, int] = {
+            "not_accepted": 0, "too_small": 0, "streaming": 0, "precompressed": 0, "already_encoded": 0,
+        }
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        self.responses[encoding] += 1
+        self.bytes_in[encoding] += bytes_in
+        self.bytes_out[encoding] += bytes_out
+        self.cpu.observe(cpu_seconds)
+
+    def skip(self, reason: str):
+        self.skipped[reason] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        bytes_in = sum(self.bytes_in.values())
+        bytes_out = sum(self.bytes_out.values())
+        return {
+            "compressed_responses": dict(self.responses),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "bytes_saved": bytes_in - bytes_out,
+            "ratio": round(bytes_out / bytes_in, 3) if bytes_in else None,
+            "cpu_per_response": self.cpu.snapshot(),
+            "skipped": dict(self.skipped),
+        }
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI compression middleware.
+
+    Single-chunk bodies at or above minimum_size are compressed in one go.
+    Chunked (streaming) bodies are compressed chunk by chunk with a sync
+    flush, so nothing is held back. text/event-stream, already encoded and
+    precompressed content types pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, stats: CompressionStats = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats or CompressionStats()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            self.stats.skip("not_accepted")
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self, encoding)(scope, receive, send)
+
+    def new_encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.stats = middleware.stats
+        self.encoding = encoding
+        self.send: Send = None
+        self.start_message: Message = None
+        self.passthrough = False
+        self.encoder = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    def _compress(self, chunk: bytes, flush: bool, finish: bool) -> bytes:
+        started = time.thread_time()
+        data = self.encoder.process(chunk, flush=flush and not finish)
+        if finish:
+            data += self.encoder.finish()
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(chunk)
+        self.bytes_out += len(data)
+        return data
+
+    async def send_wrapper(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if content_type.startswith(STREAMING_CONTENT_TYPES):
+                self.stats.skip("streaming")
+                self.passthrough = True
+            elif "content-encoding" in headers:
+                self.stats.skip("already_encoded")
+                self.passthrough = True
+            elif content_type.startswith(PRECOMPRESSED_CONTENT_TYPES):
+                self.stats.skip("precompressed")
+                self.passthrough = True
+
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Hold the headers until the first body chunk decides the strategy
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.stats.skip("too_small")
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+
+            self.encoder = self.middleware.new_encoder(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streaming: length is unknown until the end
+                del headers["Content-Length"]
+                message["body"] = self._compress(body, flush=True, finish=False)
+            else:
+                message["body"] = self._compress(body, flush=False, finish=True)
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(start_message)
+            await self.send(message)
+        else:
+            message["body"] = self._compress(body, flush=True, finish=not more_body)
+            await self.send(message)
+
+        if not more_body:
+            self.stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
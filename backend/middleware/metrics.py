@@ -0,0 +1,46 @@
+"""
+HTTP request metrics
+Latency histogram and request counter per route template and status, plus an in-flight gauge
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+# Label for requests that matched no route (keeps 404 scans from creating series)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; labels use the route template ("/api/items/{id}"), never the raw path."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._in_flight = HTTP_IN_FLIGHT.labels()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        self._in_flight.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            labels = (scope["method"], route_path, str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
@@ -0,0 +1,10 @@
+"""
+Aterges Monitoring Module
+Cheap in-process metrics primitives
+"""
+
+from monitoring.histogram import Histogram
+
+__all__ = [
+    'Histogram'
+]
@@ -0,0 +1,64 @@
+"""
+Fixed-bucket latency histogram
+Constant memory per series; observe() is a bisect plus two additions
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence
+
+# Seconds; upper bounds of each bucket (an implicit +Inf bucket follows)
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """Counts observations per bucket, plus their sum, count and max."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def cumulative_counts(self) -> List[int]:
+        """Counts of observations <= each bound, ending with the +Inf total."""
+        total = 0
+        cumulative = []
+        for bucket_count in self.counts:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary in milliseconds, suitable for JSON responses."""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 2),
+            "p95_ms": round(self.quantile(0.95) * 1000, 2),
+            "p99_ms": round(self.quantile(0.99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
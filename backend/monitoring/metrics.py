@@ -0,0 +1,218 @@
+"""
+Prometheus-format metrics
+In-process counters, gauges and histograms rendered in the text exposition format on scrape
+
+Recording is a dict lookup on a label tuple plus an addition; label strings
+are formatted once per label set, and the exposition text is only built
+when /metrics is scraped.
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from monitoring.histogram import DEFAULT_LATENCY_BUCKETS, Histogram
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> (child, preformatted label string)
+        self._children: Dict[Tuple[str, ...], tuple] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        entry = self._children.get(key)
+        if entry is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            entry = self._children[key] = (self._new_child(), _format_labels(self.labelnames, key))
+        return entry[0]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for child, label_str in self._children.values():
+            lines.append(f"{self.name}{label_str} {_format_value(child.value)}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class LatencyHistogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: "Registry" = None, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def attach(self, histogram: Histogram, *values):
+        """Expose an existing Histogram (e.g. one owned by another component) under these labels."""
+        key = tuple(str(v) for v in values)
+        self._children[key] = (histogram, _format_labels(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, (histogram, label_str) in self._children.items():
+            lines.extend(render_histogram(self.name, self.labelnames, key, histogram))
+        return lines
+
+
+def render_histogram(name: str, labelnames: Sequence[str], values: Sequence[str], histogram: Histogram) -> List[str]:
+    """Exposition lines (_bucket, _sum, _count) for one histogram series."""
+    lines = []
+    bounds = [repr(float(b)) for b in histogram.bounds] + ["+Inf"]
+    for le, count in zip(bounds, histogram.cumulative_counts()):
+        lines.append(f"{name}_bucket{_format_labels((*labelnames, 'le'), (*values, le))} {count}")
+    label_str = _format_labels(labelnames, values)
+    lines.append(f"{name}_sum{label_str} {repr(float(histogram.sum))}")
+    lines.append(f"{name}_count{label_str} {histogram.count}")
+    return lines
+
+
+class Registry:
+    """Holds metric families plus collectors that read other components' state at scrape time."""
+
+    def __init__(self):
+        self._families: List[_Family] = []
+        self._collectors: List[Callable[[], Iterable[_Family]]] = []
+
+    def register(self, family: _Family):
+        self._families.append(family)
+
+    def add_collector(self, collector: Callable[[], Iterable[_Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        for collector in self._collectors:
+            try:
+                for family in collector():
+                    lines.extend(family.render())
+            except Exception as e:
+                logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "aterges_http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"), REGISTRY)
+HTTP_REQUEST_DURATION = LatencyHistogram(
+    "aterges_http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status"), REGISTRY)
+HTTP_IN_FLIGHT = Gauge(
+    "aterges_http_requests_in_flight", "HTTP requests currently being served", (), REGISTRY)
+
+# GA4 Data API
+GA4_REQUEST_DURATION = LatencyHistogram(
+    "aterges_ga4_request_duration_seconds", "GA4 Data API call latency by method and property",
+    ("method", "property"), REGISTRY)
+GA4_REQUESTS = Counter(
+    "aterges_ga4_requests_total", "GA4 Data API calls by method, property and outcome",
+    ("method", "property", "outcome"), REGISTRY)
+GA4_RETRIES = Counter(
+    "aterges_ga4_retries_total", "GA4 Data API calls retried by method and transient status",
+    ("method", "status"), REGISTRY)
+
+# Gemini / tool calling
+GEMINI_TURN_DURATION = LatencyHistogram(
+    "aterges_gemini_turn_duration_seconds", "Gemini send_message latency by conversation turn",
+    ("turn",), REGISTRY, buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+TOOL_CALLS = Counter(
+    "aterges_tool_calls_total", "Tool calls executed for the model by tool and outcome",
+    ("tool", "outcome"), REGISTRY)
+
+# Caches
+CACHE_REQUESTS = Counter(
+    "aterges_cache_requests_total", "Cache lookups by cache and result (hit, partial, miss, failure)",
+    ("cache", "result"), REGISTRY)
+
+
+def _cache_hit_ratio() -> Iterable[_Family]:
+    ratio = Gauge("aterges_cache_hit_ratio", "Share of cache lookups fully served from cache", ("cache",))
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), (child, _) in CACHE_REQUESTS._children.items():
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_total[1] += child.value
+        if result == "hit":
+            hits_total[0] += child.value
+    for cache, (hits, total) in totals.items():
+        ratio.labels(cache).set(hits / total if total else 0.0)
+    return [ratio]
+
+
+REGISTRY.add_collector(_cache_hit_ratio)
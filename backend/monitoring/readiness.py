@@ -0,0 +1,152 @@
+"""
+Readiness monitor
+Dependency checks run concurrently in the background; probes read the cached results
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CheckFn = Callable[[], Awaitable[Any]]
+
+
+class _Check:
+    __slots__ = ("name", "fn", "critical", "interval", "timeout", "result", "checked_at")
+
+    def __init__(self, name: str, fn: CheckFn, critical: bool, interval: float, timeout: float):
+        self.name = name
+        self.fn = fn
+        self.critical = critical
+        self.interval = interval
+        self.timeout = timeout
+        self.result: Optional[Dict[str, Any]] = None
+        self.checked_at: float = 0.0  # monotonic
+
+
+def _status_of(value: Any) -> str:
+    """Map a check's return value to ok/error; agent health dicts report their own status."""
+    if isinstance(value, dict):
+        status = value.get("status")
+        if status in ("error", "unhealthy"):
+            return "error"
+        if status == "warning":
+            return "warning"
+        return "ok"
+    return "ok" if value is not False else "error"
+
+
+class ReadinessMonitor:
+    """
+    Cached dependency status for /readyz.
+
+    Every check runs on its own interval (cheap checks often, quota-costing
+    ones rarely), concurrently and bounded by a per-check timeout. Probes
+    never trigger I/O; they read the last results and their age. Results
+    older than stale_after are reported as stale and make the service
+    not ready.
+    """
+
+    def __init__(self, interval: float = 15.0, timeout: float = 5.0, stale_after: float = 60.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._checks: Dict[str, _Check] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def add_check(self, name: str, fn: CheckFn, critical: bool = True,
+                  interval: Optional[float] = None, timeout: Optional[float] = None):
+        self._checks[name] = _Check(
+            name, fn, critical,
+            interval if interval is not None else self.interval,
+            timeout if timeout is not None else self.timeout,
+        )
+
+    async def _run(self, check: _Check):
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(check.fn(), timeout=check.timeout)
+            result = {"status": _status_of(value)}
+            if isinstance(value, dict):
+                result["detail"] = value
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"timed out after {check.timeout}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        if result["status"] == "error" and (check.result or {}).get("status") != "error":
+            logger.warning(f"Readiness check '{check.name}' failing: {result.get('error', result.get('detail'))}")
+        check.result = result
+        check.checked_at = time.monotonic()
+
+    async def refresh(self, force: bool = False, names: Optional[List[str]] = None):
+        """Run the checks that are due (or all/named ones when forced) concurrently."""
+        now = time.monotonic()
+        due = [
+            check for check in self._checks.values()
+            if (names is None or check.name in names)
+            and (force or check.result is None or now - check.checked_at >= check.interval)
+        ]
+        if due:
+            await asyncio.gather(*(self._run(check) for check in due))
+        self.refreshes += 1
+
+    async def _loop(self):
+        # Wake often enough for the shortest interval; each check decides if it is due
+        tick = min([check.interval for check in self._checks.values()] + [self.interval])
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Readiness refresh failed: {e}")
+            await asyncio.sleep(tick)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def results(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """Cached results with their age, optionally limited to checks whose name starts with prefix."""
+        now = time.monotonic()
+        results = {}
+        for check in self._checks.values():
+            if not check.name.startswith(prefix):
+                continue
+            if check.result is None:
+                results[check.name] = {"status": "pending", "critical": check.critical}
+                continue
+            age = now - check.checked_at
+            results[check.name] = {
+                **check.result,
+                "critical": check.critical,
+                "age_seconds": round(age, 1),
+                "stale": age > max(self.stale_after, check.interval + check.timeout),
+            }
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Readiness verdict: every critical check has a fresh, non-error result."""
+        checks = self.results()
+        ready = all(
+            result["status"] in ("ok", "warning") and not result.get("stale")
+            for result in checks.values() if result["critical"]
+        )
+        return {
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "max_age_seconds": max((r.get("age_seconds", 0.0) for r in checks.values()), default=0.0),
+        }
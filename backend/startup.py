@@ -0,0 +1,80 @@
+"""
+Application startup steps
+Runs independent initializers concurrently with per-step timeouts and records their timings
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+StepFn = Callable[[], Awaitable[Any]]
+
+
+class StartupError(RuntimeError):
+    """A required startup step failed or timed out."""
+
+
+class StartupReport:
+    """
+    Per-step startup timings.
+
+    Steps run through run_step (or run_concurrently for independent ones);
+    each is time-boxed and recorded as ok, timeout or error. Required steps
+    raise StartupError; optional ones log and return None so the app can
+    start degraded. Deferred steps (e.g. background AI warm-up) are
+    recorded under the same report when they finish.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.ready_ms: Optional[float] = None
+
+    async def run_step(self, name: str, step: Union[StepFn, Awaitable[Any]], timeout: float,
+                       required: bool = False) -> Any:
+        """Run one step under a timeout. A future passed in is shielded, so it keeps running past the timeout."""
+        started = time.perf_counter()
+        entry = self.steps[name] = {"status": "running", "required": required}
+        try:
+            awaitable = step() if callable(step) else asyncio.shield(step)
+            result = await asyncio.wait_for(awaitable, timeout=timeout)
+            entry["status"] = "ok"
+            return result
+        except asyncio.TimeoutError:
+            entry["status"] = "timeout"
+            entry["error"] = f"timed out after {timeout}s"
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+        finally:
+            entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            entry["offset_ms"] = round((started - self.started) * 1000, 2)
+            logger.info(f"Startup step '{name}': {entry['status']} in {entry['duration_ms']}ms")
+
+        if required:
+            raise StartupError(f"Startup step '{name}' failed: {entry['error']}")
+        logger.warning(f"Optional startup step '{name}' failed: {entry['error']}")
+        return None
+
+    async def run_concurrently(self, steps: Dict[str, tuple], timeout: float) -> Dict[str, Any]:
+        """Run independent steps together. steps maps name -> (step_fn, required)."""
+        names = list(steps)
+        results = await asyncio.gather(
+            *(self.run_step(name, fn, timeout, required) for name, (fn, required) in steps.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(names, results))
+
+    def mark_ready(self):
+        """Serving starts here; later steps are background work."""
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        logger.info(f"Startup complete in {self.ready_ms}ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"ready_ms": self.ready_ms, "steps": dict(self.steps)}
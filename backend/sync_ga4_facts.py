@@ -0,0 +1,68 @@
+"""
+Incremental GA4 fact store sync
+Fetches missing or not-yet-final days into the local fact store (run daily, e.g. Cloud Scheduler)
+
+Usage:
+    python sync_ga4_facts.py [property_id] [days_back]
+"""
+
+import asyncio
+import os
+import sys
+import logging
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_fact_store import GA4FactStore
+from agents.ga4_quota import GA4QuotaScheduler
+from agents.google_analytics_agent import GoogleAnalyticsAgent
+from config import settings
+from database.database import Database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    property_id = sys.argv[1] if len(sys.argv) > 1 else settings.ga4_property_id
+    days_back = int(sys.argv[2]) if len(sys.argv) > 2 else settings.ga4_fact_sync_days_back
+
+    print("🔄 GA4 Fact Store Sync")
+    print("=" * 50)
+    print(f"Property: {property_id}, days back: {days_back}")
+
+    agent = GoogleAnalyticsAgent()
+    if not agent.is_initialized:
+        print(f"❌ Google Analytics Agent unavailable: {agent.last_error}")
+        sys.exit(1)
+    # Background priority: the sync stops early instead of using tokens reserved for interactive queries
+    agent.quota_scheduler = GA4QuotaScheduler(
+        max_concurrent=settings.ga4_max_concurrent_per_property,
+        background_reserve=settings.ga4_background_token_reserve,
+    )
+
+    database = Database()
+    await database.connect()
+    try:
+        store = GA4FactStore(database)
+        await store.ensure_schema()
+        summary = await store.sync(agent, property_id=property_id, days_back=days_back)
+    finally:
+        await database.disconnect()
+
+    print("\n📊 SUMMARY")
+    print("-" * 30)
+    print(f"GA4 requests: {summary['requests']}")
+    print(f"Days synced:  {summary['days_synced']}")
+    print(f"Rows written: {summary['rows_written']}")
+    if summary.get("deferred"):
+        print("⏸️  Deferred: GA4 tokens are low, remaining days will sync on the next run")
+    if summary["errors"]:
+        print(f"❌ Errors: {len(summary['errors'])}")
+        sys.exit(1)
+    print("✅ Sync complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
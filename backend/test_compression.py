@@ -0,0 +1,117 @@
+"""
+Tests for the response compression middleware
+Negotiation, size threshold, streaming and SSE passthrough
+"""
+
+import gzip
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from middleware.compression import CompressionMiddleware, CompressionStats, choose_encoding
+
+LARGE = {"rows": [{"date": f"2025010{i % 9}", "sessions": i} for i in range(2000)]}
+
+
+def _client():
+    app = FastAPI()
+    stats = CompressionStats()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, stats=stats)
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"status": "healthy"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield ("chunk-%d " % i) * 300
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {'x' * 2000}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/png")
+    async def png():
+        return Response(b"\x89PNG" + b"\x00" * 5000, media_type="image/png")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(b"a" * 5000), headers={"Content-Encoding": "gzip"}, media_type="text/plain")
+
+    return TestClient(app), stats
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br", brotli_available=True) == "br"
+    assert choose_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0.5", brotli_available=True) == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*", brotli_available=False) == "gzip"
+    assert choose_encoding("gzip;q=1.0, br;q=0.1", brotli_available=True) == "gzip"
+    assert choose_encoding("gzip;q=0.8, br;q=0.8", brotli_available=True) == "br"
+    assert choose_encoding("br;q=0.5, *;q=0.9", brotli_available=True) == "gzip"
+
+
+def test_large_json_is_compressed_small_is_not():
+    client, stats = _client()
+
+    br = client.get("/large", headers={"Accept-Encoding": "br"})
+    assert br.headers["content-encoding"] == "br"
+    assert br.headers["vary"] == "Accept-Encoding"
+    assert br.json() == LARGE
+
+    gz = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip"
+    assert int(gz.headers["content-length"]) < len(gz.content)
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in small.headers
+
+    snapshot = stats.snapshot()
+    assert snapshot["compressed_responses"] == {"br": 1, "gzip": 1}
+    assert snapshot["bytes_saved"] > 0
+    assert snapshot["cpu_per_response"]["count"] == 2
+    assert snapshot["skipped"]["too_small"] == 1
+
+
+def test_streaming_is_compressed_per_chunk():
+    client, _ = _client()
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = b"".join(response.iter_raw())
+    assert gzip.decompress(body).decode() == "".join(("chunk-%d " % i) * 300 for i in range(5))
+
+
+def test_sse_precompressed_and_encoded_pass_through():
+    client, stats = _client()
+    events = client.get("/events", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in events.headers
+    assert events.text.count("data: ") == 3
+
+    png = client.get("/png", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in png.headers
+
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "br"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.text == "a" * 5000
+
+    assert stats.skipped["streaming"] == 1
+    assert stats.skipped["precompressed"] == 1
+    assert stats.skipped["already_encoded"] == 1
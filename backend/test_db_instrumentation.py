@@ -0,0 +1,51 @@
+"""
+Tests for database query instrumentation
+SQL fingerprinting, latency histograms and the slow-query log (no server required)
+"""
+
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from database.instrumentation import QueryStats, fingerprint
+from monitoring.histogram import Histogram
+
+
+def test_fingerprint_normalizes_literals_and_params():
+    a = fingerprint("SELECT * FROM profiles  WHERE id = :id AND age > 30 -- lookup")
+    c = fingerprint("SELECT * FROM profiles WHERE id = $1 AND age > 45")
+    assert a == c == "SELECT * FROM profiles WHERE id = ? AND age > ?"
+    assert fingerprint("SELECT 1 WHERE x IN (1, 2, 3) AND y = 'a''b'") == "SELECT ? WHERE x IN (?) AND y = ?"
+    assert fingerprint("SELECT CAST(:v AS int), col::text") == "SELECT CAST(? AS int), col::text"
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+    for value in [0.005] * 90 + [0.05] * 9 + [2.0]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.95) == 0.1
+    assert histogram.quantile(1.0) == 2.0
+    assert histogram.cumulative_counts() == [90, 99, 99, 100]
+
+
+def test_slow_query_log_and_summary():
+    stats = QueryStats(slow_query_ms=100, slow_log_size=2)
+    for ms in (5, 7, 150, 300, 450):
+        stats.record_query(f"SELECT * FROM messages WHERE id = {ms}", ms / 1000)
+    stats.record_query("DELETE FROM messages WHERE id = :id", 0.002, error=True, operation="execute")
+    stats.record_pool_wait(0.001)
+
+    snapshot = stats.snapshot()
+    assert len(snapshot["statements"]) == 2
+    assert snapshot["slow_query_count"] == 3
+    assert [q["duration_ms"] for q in snapshot["slow_queries"]] == [300.0, 450.0]  # bounded log
+
+    summary = stats.summary()
+    assert summary["queries"] == 6
+    assert summary["errors"] == 1
+    assert summary["slowest_p95"][0]["fingerprint"] == "SELECT * FROM messages WHERE id = ?"
+    assert summary["pool"]["in_use"] == 0
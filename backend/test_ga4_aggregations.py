@@ -0,0 +1,67 @@
+"""
+Tests for GA4 report totals, minimums and maximums
+Aggregates come from GA4's metric_aggregations in the same request, so they stay correct for
+non-additive metrics and for truncated or paged row lists
+"""
+
+import asyncio
+import os
+import sys
+from datetime import timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_day_cache import GA4DayCache
+from fake_ga4 import TODAY, make_agent
+
+
+def _report(agent, dimensions=("pagePath",), metrics=("sessions", "activeUsers"), **kwargs):
+    start = (TODAY - timedelta(days=20)).isoformat()
+    end = (TODAY - timedelta(days=10)).isoformat()
+    return asyncio.run(agent.get_ga4_report(start, end, dimensions=list(dimensions), metrics=list(metrics),
+                                            **kwargs))["data"]
+
+
+def test_aggregations_requested_with_the_report():
+    agent = make_agent(day_cache=None)
+    report = _report(agent)
+    assert len(agent.ga_client.requests) == 1
+    assert [a.name for a in agent.ga_client.requests[0].metric_aggregations] == ["TOTAL", "MINIMUM", "MAXIMUM"]
+
+    sessions = [row["sessions"] for row in report["data"]]
+    assert report["totals"]["sessions"] == sum(sessions)
+    assert report["minimums"]["sessions"] == min(sessions)
+    assert report["maximums"]["sessions"] == max(sessions)
+
+
+def test_totals_cover_rows_beyond_the_returned_page():
+    agent = make_agent(day_cache=None)
+    full = _report(agent)
+    page = _report(agent, order_bys=[{"field": "sessions", "desc": True}], limit=1)
+    assert page["row_count"] == 1
+    assert page["totals"] == full["totals"]
+    assert page["maximums"]["sessions"] == page["data"][0]["sessions"]
+
+
+def test_locally_assembled_rows_fetch_only_non_additive_totals():
+    agent = make_agent(day_cache=GA4DayCache())
+    dimensions = ("date", "deviceCategory")
+    uncached = _report(agent, dimensions, use_day_cache=False)
+    _report(agent, dimensions)
+    # Rows go to the day cache; activeUsers can't be summed across days, so GA4 is asked for its total alone
+    totals_request = agent.ga_client.requests[-1]
+    assert not totals_request.dimensions
+    assert [m.name for m in totals_request.metrics] == ["activeUsers"]
+    agent.ga_client.requests.clear()
+
+    cached = _report(agent, dimensions)
+    assert not agent.ga_client.requests  # the range is final, so its activeUsers total is reused
+    assert cached["totals"] == uncached["totals"]
+    assert list(cached["totals"]) == ["sessions", "activeUsers"]
+    assert cached["minimums"] == uncached["minimums"] and cached["maximums"] == uncached["maximums"]
+
+    agent.ga_client.requests.clear()
+    _report(agent, dimensions, metrics=("sessions", "newUsers"))
+    _report(agent, dimensions, metrics=("sessions", "newUsers"))
+    assert len(agent.ga_client.requests) == 1  # additive totals are summed from cached days
@@ -0,0 +1,113 @@
+"""
+Tests for the vectorized report analytics
+Changes, rolling means, trends and seasonal anomalies are computed for every series at once and
+reached through the report handle returned by get_ga4_report
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_analytics import ReportStore, analyze_matrix, analyze_report_series
+from fake_ga4 import PROPERTY, make_agent
+START = date(2025, 5, 5)  # a Monday
+WEEKLY = [1.2, 1.1, 1.0, 1.0, 0.9, 0.4, 0.4]
+
+
+def _report(series_by_group, metric="sessions"):
+    rows = []
+    for group, series in series_by_group.items():
+        for i, value in enumerate(series):
+            row = {"date": (START + timedelta(days=i)).strftime("%Y%m%d"), metric: value}
+            if group:
+                row["deviceCategory"] = group
+            rows.append(row)
+    dimensions = ["date", "deviceCategory"] if any(series_by_group) else ["date"]
+    return {"property_id": PROPERTY, "dimensions": dimensions, "metrics": [metric], "data": rows}
+
+
+def _seasonal(days, level=100.0, slope=2.0):
+    return [round((level + slope * i) * WEEKLY[i % 7]) for i in range(days)]
+
+
+def test_seasonal_spike_is_the_only_anomaly():
+    series = _seasonal(56)
+    series[40] *= 3
+    # Weekend dips are expected by the seasonal baseline, so only the spike stands out
+    result = analyze_report_series(_report({None: series}), z_threshold=3.0)
+    [entry] = result["metrics"]["sessions"]
+    assert [a["date"] for a in entry["anomalies"]] == [(START + timedelta(days=40)).isoformat()]
+    assert entry["anomalies"][0]["direction"] == "spike"
+    assert entry["trend"]["slope_per_day"] > 0
+    assert entry["total"] == sum(series)
+    assert entry["day_over_day"]["delta"] == series[-1] - series[-2]
+    assert entry["period_over_period"]["pct"] > 0
+    assert entry["rolling_mean"]["last"] == round(sum(series[-7:]) / 7, 2)
+
+
+def test_vectorized_statistics_match_per_series_computation():
+    rng = np.random.default_rng(7)
+    matrix = rng.poisson(50, size=(4, 30)).astype(float)
+    stats = analyze_matrix(matrix, window=5)
+    for i, row in enumerate(matrix):
+        assert np.isclose(stats["slope"][i], np.polyfit(np.arange(30), row, 1)[0])
+        assert np.isclose(stats["rolling_last"][i], row[-5:].mean())
+        assert np.isclose(stats["rolling_first"][i], row[:5].mean())
+        assert np.isclose(stats["previous_avg"][i], row[:15].mean())
+
+
+def test_groups_ranked_and_missing_days_filled():
+    report = _report({"desktop": [10] * 14, "mobile": [50] * 14, "tablet": [1] * 14})
+    report["data"] = [row for row in report["data"]
+                      if not (row["deviceCategory"] == "tablet" and row["date"] == "20250510")]
+    result = analyze_report_series(report, max_groups=2)
+    assert result["groups_total"] == 3 and result["groups_analyzed"] == 2
+    assert [e["group"]["deviceCategory"] for e in result["metrics"]["sessions"]] == ["mobile", "desktop"]
+    assert result["days"] == 14
+
+    tablet = analyze_report_series(report, max_groups=3)["metrics"]["sessions"][2]
+    assert tablet["total"] == 13  # the missing day counts as 0
+
+
+def test_non_additive_metrics_have_no_summed_total():
+    result = analyze_report_series(_report({None: [5, 6, 7]}, metric="activeUsers"))
+    entry = result["metrics"]["activeUsers"][0]
+    assert "total" not in entry and entry["mean"] == 6
+
+
+def test_report_handles_through_the_agent():
+    agent = make_agent(reports=ReportStore())
+
+    async def scenario():
+        report = await agent.get_ga4_report("2025-06-01", "2025-06-28", dimensions=["date"], metrics=["sessions"])
+        handle = report["data"]["report_handle"]
+        analysis = await agent.analyze_report(handle, property_id=PROPERTY)
+        assert analysis["success"] and analysis["data"]["days"] == 28
+        assert analysis["data"]["metrics"]["sessions"][0]["total"] == report["data"]["totals"]["sessions"]
+
+        other_tenant = await agent.analyze_report(handle, property_id="properties/456")
+        assert other_tenant["error"] and "Unknown or expired" in other_tenant["message"]
+        missing = await agent.analyze_report("rpt_missing")
+        assert missing["error"]
+
+        flat = await agent.get_ga4_report("2025-06-01", "2025-06-28", dimensions=["country"], metrics=["sessions"])
+        no_dates = await agent.analyze_report(flat["data"]["report_handle"])
+        assert no_dates["error"] and "'date' dimension" in no_dates["message"]
+
+    asyncio.run(scenario())
+    assert agent.reports.get_stats()["reports"] == 2
+
+
+def test_report_store_bounded():
+    store = ReportStore(max_reports=2)
+    handles = [store.put({"n": i}) for i in range(3)]
+    assert store.get(handles[0]) is None
+    assert store.get(handles[2]) == {"n": 2}
+    expired = ReportStore(ttl=0)
+    assert expired.get(expired.put({})) is None
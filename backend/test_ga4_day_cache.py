@@ -0,0 +1,114 @@
+"""
+Tests for the day-partitioned GA4 report cache
+Overlapping ranges fetch only missing days, in as few contiguous requests as possible
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_day_cache import GA4DayCache
+from fake_ga4 import FakeGA4Client, make_agent
+TODAY = date.today()
+
+
+def _agent(**cache_options):
+    return make_agent(FakeGA4Client(today=TODAY),
+                      day_cache=GA4DayCache(**{"final_after_days": 3, "recent_ttl": 300, **cache_options}))
+
+
+def _report(agent, start, end, dimensions=("date", "deviceCategory"), **kwargs):
+    return asyncio.run(agent.get_ga4_report(
+        (TODAY - timedelta(days=start)).isoformat(), (TODAY - timedelta(days=end)).isoformat(),
+        dimensions=list(dimensions), metrics=["sessions", "activeUsers"], **kwargs,
+    ))
+
+
+def _ranges(agent):
+    """Days-ago ranges of the row requests (dimensionless requests only fetch activeUsers totals)"""
+    return [((TODAY - date.fromisoformat(r.date_ranges[0].start_date)).days,
+             (TODAY - date.fromisoformat(r.date_ranges[0].end_date)).days)
+            for r in agent.ga_client.requests if r.dimensions]
+
+
+def test_overlapping_range_fetches_only_new_days():
+    agent = _agent()
+    first = _report(agent, 40, 11)
+    agent.ga_client.requests.clear()
+    second = _report(agent, 39, 10)  # "last 30 days", one day later
+    assert _ranges(agent) == [(10, 10)]
+
+    uncached = _report(agent, 39, 10, use_day_cache=False)
+    assert second["data"]["data"] == uncached["data"]["data"]
+    assert second["data"]["totals"] == uncached["data"]["totals"]
+    assert len(first["data"]["data"]) == len(second["data"]["data"]) == 30 * 2
+
+
+def test_gaps_fetched_in_fewest_contiguous_requests():
+    agent = _agent()
+    _report(agent, 30, 26)
+    _report(agent, 20, 16)
+    agent.ga_client.requests.clear()
+    result = _report(agent, 35, 11)
+    assert sorted(_ranges(agent)) == [(15, 11), (25, 21), (35, 31)]
+    days = [row["date"] for row in result["data"]["data"]]
+    assert days == sorted(days) and len(set(days)) == 25
+
+
+def test_recent_days_refetched_until_final():
+    agent = _agent(recent_ttl=0)
+    _report(agent, 6, 0)
+    agent.ga_client.requests.clear()
+    _report(agent, 6, 0)
+    # Days older than final_after_days stay cached, the last three are fetched again
+    assert _ranges(agent) == [(2, 0)]
+
+
+def test_keyed_by_dimensions_metrics_and_property():
+    agent = _agent()
+    _report(agent, 10, 5)
+    _report(agent, 10, 5, dimensions=("date",))
+    _report(agent, 10, 5, property_id="properties/456")
+    assert len(_ranges(agent)) == 3
+    _report(agent, 10, 5)
+    assert len(_ranges(agent)) == 3
+    assert agent.day_cache.get_stats()["series"] == 3
+
+
+def test_fully_cached_final_range_makes_no_request():
+    agent = _agent()
+    first = _report(agent, 20, 5)
+    agent.ga_client.requests.clear()
+    for _ in range(2):
+        repeat = _report(agent, 20, 5)
+    # Rows from the day cache, activeUsers total (not summable from days) from the range totals
+    assert not agent.ga_client.requests
+    assert repeat["data"]["totals"] == first["data"]["totals"]
+    assert repeat["data"]["totals"]["activeUsers"] == _report(agent, 20, 5, use_day_cache=False)["data"]["totals"]["activeUsers"]
+
+    _report(agent, 20, 0)  # the range ends on a recent day: its totals are fetched every time
+    _report(agent, 20, 0)
+    assert sum(1 for r in agent.ga_client.requests if not r.dimensions) == 2
+
+
+def test_reports_without_date_dimension_bypass_cache():
+    agent = _agent()
+    _report(agent, 10, 5, dimensions=("deviceCategory",))
+    _report(agent, 10, 5, dimensions=("deviceCategory",))
+    assert len(agent.ga_client.requests) == 2
+    assert agent.day_cache.get_stats()["series"] == 0
+
+
+def test_eviction_bounds_cached_days():
+    cache = GA4DayCache(max_days=10)
+    start = date(2025, 1, 1)
+    for i in range(3):
+        cache.store(cache.key(f"p{i}", ["date"], ["sessions"]), start, start + timedelta(days=4), {})
+    stats = cache.get_stats()
+    assert stats["days"] == 10 and stats["series"] == 2
+    cached, missing = cache.lookup(cache.key("p0", ["date"], ["sessions"]), start, start)
+    assert not cached and missing == [(start, start)]
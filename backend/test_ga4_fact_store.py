@@ -0,0 +1,70 @@
+"""
+Tests for the GA4 fact store
+Incremental sync and store-backed get_ga4_report against SQLite and a fake GA4 client
+"""
+
+import asyncio
+import os
+import sys
+from datetime import timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_fact_store import GA4FactStore, SQLiteFactBackend
+from fake_ga4 import TODAY, make_agent
+
+
+def _agent_and_store():
+    agent = make_agent()
+    store = GA4FactStore(SQLiteFactBackend(), final_after_days=3)
+    asyncio.run(store.ensure_schema())
+    return agent, store
+
+
+def test_sync_is_incremental():
+    agent, store = _agent_and_store()
+
+    first = asyncio.run(store.sync(agent, days_back=30, today=TODAY, chunk_days=14))
+    assert first["errors"] == []
+    assert first["days_synced"] == 30 * 4  # every day for each of the 4 dimension sets
+
+    agent.ga_client.requests.clear()
+    second = asyncio.run(store.sync(agent, days_back=30, today=TODAY, chunk_days=14))
+    # Only the two not-yet-final days are fetched again, one request per dimension set
+    assert second["days_synced"] == 2 * 4
+    assert len(agent.ga_client.requests) == 4
+
+
+def test_report_served_from_store_with_remote_tail():
+    agent, store = _agent_and_store()
+    asyncio.run(store.sync(agent, days_back=30, today=TODAY))
+    agent.fact_store = store
+
+    start = (TODAY - timedelta(days=20)).isoformat()
+    end = (TODAY - timedelta(days=1)).isoformat()
+    for dimensions in (["sessionDefaultChannelGroup"], ["date", "deviceCategory"], ["date"]):
+        agent.ga_client.requests.clear()
+        local = asyncio.run(agent.get_ga4_report(start, end, dimensions=dimensions, metrics=["sessions", "newUsers"]))
+        # Only the non-final tail went to GA4
+        assert len(agent.ga_client.requests) == 1
+        tail_range = agent.ga_client.requests[0].date_ranges[0]
+        assert tail_range.start_date == (TODAY - timedelta(days=2)).isoformat()
+
+        remote = asyncio.run(agent.get_ga4_report(start, end, dimensions=dimensions, metrics=["sessions", "newUsers"],
+                                                  use_fact_store=False))
+        key = lambda row: tuple(row[d] for d in dimensions)
+        assert sorted(local["data"]["data"], key=key) == sorted(remote["data"]["data"], key=key)
+        assert local["data"]["totals"] == remote["data"]["totals"]
+
+
+def test_uncovered_shapes_go_remote():
+    agent, store = _agent_and_store()
+    agent.fact_store = store
+    assert not store.can_serve(["pagePath"], ["sessions"])
+    assert not store.can_serve(["country"], ["activeUsers"])  # not additive across days
+    assert store.can_serve(["date", "country"], ["activeUsers"])
+
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-07", dimensions=["country"], metrics=["sessions"]))
+    assert result["success"]
+    assert len(agent.ga_client.requests) == 1
@@ -0,0 +1,111 @@
+"""
+Tests for GA4 report filters, ordering and paging
+Filters are validated locally and sent to GA4, which returns only the matching rows
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_day_cache import GA4DayCache
+from agents.ga4_filters import build_report_options
+from agents.ga4_metadata import GA4ValidationError
+from fake_ga4 import make_agent
+
+
+def _report(agent, **kwargs):
+    return asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-07", **{
+        "dimensions": ["pagePath", "deviceCategory"], "metrics": ["sessions", "screenPageViews"], **kwargs,
+    }))
+
+
+def test_dimension_filter_sent_to_ga4_and_rows_reduced():
+    agent = make_agent(day_cache=GA4DayCache())
+    full = _report(agent)
+    filtered = _report(agent, dimension_filter=[
+        {"field": "deviceCategory", "value": "Mobile"},
+        {"field": "pagePath", "match": "in_list", "values": ["/blog"], "exclude": True},
+    ])
+    assert filtered["success"]
+    assert full["data"]["row_count"] == 6
+    rows = filtered["data"]["data"]
+    assert {(r["pagePath"], r["deviceCategory"]) for r in rows} == {("/", "mobile"), ("/pricing", "mobile")}
+
+    request = agent.ga_client.requests[-1]
+    expressions = request.dimension_filter.and_group.expressions
+    assert expressions[0].filter.string_filter.match_type.name == "EXACT"
+    assert list(expressions[1].not_expression.filter.in_list_filter.values) == ["/blog"]
+
+
+def test_filter_on_dimension_outside_the_breakdown():
+    agent = make_agent(day_cache=GA4DayCache())
+    spain = _report(agent, dimension_filter={"field": "country", "value": "Spain"})
+    everywhere = _report(agent)
+    assert spain["data"]["row_count"] == everywhere["data"]["row_count"]
+    assert spain["data"]["totals"]["sessions"] < everywhere["data"]["totals"]["sessions"]
+
+
+def test_metric_filter_order_limit_and_offset():
+    agent = make_agent(day_cache=GA4DayCache())
+    full = _report(agent)["data"]["data"]
+    ranked = sorted(full, key=lambda r: r["sessions"], reverse=True)
+
+    top = _report(agent, order_bys=[{"field": "sessions", "desc": True}], limit=2)["data"]
+    assert top["data"] == ranked[:2]
+    assert top["total_row_count"] == 6 and top["row_count"] == 2
+
+    page = _report(agent, order_bys=[{"field": "sessions", "desc": True}], limit=2, offset=2)["data"]
+    assert page["data"] == ranked[2:4]
+
+    threshold = ranked[3]["sessions"]
+    above = _report(agent, metric_filter=[{"field": "sessions", "operator": "gt", "value": threshold}])["data"]
+    assert sorted(r["sessions"] for r in above["data"]) == sorted(r["sessions"] for r in ranked[:3])
+
+
+def test_filtered_reports_bypass_local_caches():
+    agent = make_agent(day_cache=GA4DayCache())
+    dimensions = ["date", "deviceCategory"]
+    _report(agent, dimensions=dimensions)
+    _report(agent, dimensions=dimensions, dimension_filter=[{"field": "deviceCategory", "value": "mobile"}])
+    result = _report(agent, dimensions=dimensions, dimension_filter=[{"field": "deviceCategory", "value": "mobile"}])
+    assert len(agent.ga_client.requests) == 3
+    assert {r["deviceCategory"] for r in result["data"]["data"]} == {"mobile"}
+
+
+def test_invalid_options_rejected_without_a_report_request():
+    agent = make_agent(day_cache=GA4DayCache())
+    cases = [
+        {"dimension_filter": [{"field": "contry", "value": "Spain"}]},
+        {"dimension_filter": [{"field": "pagePath", "match": "regex", "value": "(/blog"}]},
+        {"dimension_filter": [{"field": "pagePath", "match": "in_list"}]},
+        {"metric_filter": [{"field": "activeUsers", "operator": "gt", "value": 1}]},
+        {"metric_filter": [{"field": "sessions", "operator": "over", "value": 1}]},
+        {"order_bys": [{"field": "country"}]},
+        {"limit": 0},
+        {"offset": -1},
+    ]
+    for options in cases:
+        result = _report(agent, **options)
+        assert result["error"] and result["validation_error"], options
+    assert _report(agent, dimension_filter=[{"field": "contry", "value": "x"}])["suggestions"]["contry"] == ["country"]
+    assert not agent.ga_client.requests
+
+
+def test_options_accept_aliases_and_numeric_strings():
+    options = build_report_options(
+        ["pagePath"], ["screenPageViews"], lambda name: name,
+        metric_filter=[{"field": "pageviews", "operator": "between", "value": "10", "to": 20.5}],
+        order_bys=[{"field": "PagePath"}], limit=10.0,
+    )
+    between = options["metric_filter"]["filter"]["between_filter"]
+    assert between == {"from_value": {"int64_value": 10}, "to_value": {"double_value": 20.5}}
+    assert options["order_bys"] == [{"dimension": {"dimension_name": "pagePath"}, "desc": False}]
+    assert options["limit"] == 10
+    with pytest.raises(GA4ValidationError, match="value > to"):
+        build_report_options([], ["sessions"], str, metric_filter=[{"field": "sessions", "operator": "between",
+                                                                     "value": 5, "to": 1}])
@@ -0,0 +1,100 @@
+"""
+Tests for the GA4 metadata catalog and pre-flight validation
+Legacy aliases are mapped, invalid or incompatible fields are rejected before any report request
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_metadata import GA4MetadataCatalog, GA4ValidationError
+from fake_ga4 import PROPERTY, make_agent
+
+
+def test_legacy_aliases_are_mapped_before_the_request():
+    agent = make_agent()
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions", "pageviews", "users"]))
+    assert result["success"]
+    assert result["data"]["metrics"] == ["sessions", "screenPageViews", "activeUsers"]
+    assert result["data"]["field_rewrites"] == {"pageviews": "screenPageViews", "users": "activeUsers"}
+    request = agent.ga_client.requests[0]
+    assert [m.name for m in request.metrics] == ["sessions", "screenPageViews", "activeUsers"]
+
+
+def test_invalid_fields_rejected_without_a_report_request():
+    agent = make_agent()
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", dimensions=["date", "sessions"],
+                                              metrics=["sesions"]))
+    assert result["error"] and result["validation_error"]
+    assert result["invalid_fields"] == ["sessions", "sesions"]
+    assert result["suggestions"]["sesions"] == ["sessions"]
+    assert "is a metric" in result["suggestions"]["sessions"][0]
+    assert not agent.ga_client.requests
+
+
+def test_incompatible_scopes_and_limits_rejected_locally():
+    agent = make_agent()
+
+    async def scenario():
+        with pytest.raises(GA4ValidationError, match="incompatible"):
+            await agent.metadata.validate(PROPERTY, ["itemName"], ["sessions"])
+        assert await agent.metadata.validate(PROPERTY, ["itemName"], ["itemRevenue", "itemsViewed"])
+        with pytest.raises(GA4ValidationError, match="At least one metric"):
+            await agent.metadata.validate(PROPERTY, ["date"], [])
+        with pytest.raises(GA4ValidationError, match="at most 10 metrics"):
+            await agent.metadata.validate(PROPERTY, [], ["sessions"] + [f"customEvent:m{i}" for i in range(10)])
+
+    agent.metadata.fetch = lambda property_id: _with_custom_metrics(agent, property_id)
+    asyncio.run(scenario())
+
+
+async def _with_custom_metrics(agent, property_id):
+    metadata = await agent._fetch_metadata(property_id)
+    metadata.metrics += [type(metadata.metrics[0])(api_name=f"customEvent:m{i}", category="Custom",
+                                                    deprecated_api_names=[]) for i in range(10)]
+    return metadata
+
+
+def test_catalog_cached_per_property_and_shared():
+    agent = make_agent()
+
+    async def scenario():
+        await asyncio.gather(*(agent.metadata.validate(PROPERTY, ["date"], ["sessions"]) for _ in range(5)))
+        await agent.metadata.validate("properties/456", ["date"], ["sessions"])
+        await agent.metadata.validate(PROPERTY, ["Date"], ["ga:sessions"])
+
+    asyncio.run(scenario())
+    assert agent.ga_client.metadata_calls == 2
+    assert agent.metadata.get_stats()["properties"] == 2
+
+
+def test_falls_back_to_aliases_when_metadata_unavailable():
+    async def unavailable(property_id):
+        raise RuntimeError("metadata down")
+
+    catalog = GA4MetadataCatalog(unavailable)
+    dimensions, metrics, rewrites = asyncio.run(catalog.validate(PROPERTY, ["date"], ["pageviews", "customMetric"]))
+    assert metrics == ["screenPageViews", "customMetric"]
+    assert rewrites == {"pageviews": "screenPageViews"}
+
+
+def test_failed_catalog_load_is_remembered_briefly():
+    calls = []
+
+    async def unavailable(property_id):
+        calls.append(property_id)
+        raise RuntimeError("metadata down")
+
+    async def scenario(catalog):
+        for _ in range(3):
+            await catalog.validate(PROPERTY, ["date"], ["sessions"])
+
+    asyncio.run(scenario(GA4MetadataCatalog(unavailable, failure_ttl=60)))
+    assert calls == [PROPERTY]  # later requests skip straight to alias-only validation
+    asyncio.run(scenario(GA4MetadataCatalog(unavailable, failure_ttl=0)))
+    assert len(calls) == 4
@@ -0,0 +1,92 @@
+"""
+Tests for GA4 pivot reports
+A multi-way breakdown is one pivot request with per-pivot limits, returned as a compact table
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_metadata import GA4ValidationError
+from agents.ga4_pivot import build_pivots
+from fake_ga4 import make_agent
+
+
+def test_channel_by_device_in_one_request():
+    agent = make_agent()
+    result = asyncio.run(agent.get_pivot_report("2025-06-01", "2025-06-07", pivots=[
+        {"fields": ["sessionDefaultChannelGroup"], "limit": 2},
+        {"fields": ["deviceCategory"]},
+    ], metrics=["sessions"]))
+    assert result["success"]
+    data = result["data"]
+    assert len(agent.ga_client.requests) == 1
+
+    flat = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-07",
+                                            dimensions=["sessionDefaultChannelGroup", "deviceCategory"],
+                                            metrics=["sessions"]))["data"]["data"]
+    by_channel = {}
+    for row in flat:
+        by_channel[row["sessionDefaultChannelGroup"]] = by_channel.get(row["sessionDefaultChannelGroup"], 0) + row["sessions"]
+    top_two = sorted(by_channel, key=by_channel.get, reverse=True)[:2]
+
+    assert data["row_dimensions"] == ["sessionDefaultChannelGroup"]
+    assert data["column_dimensions"] == ["deviceCategory"]
+    assert [row["sessionDefaultChannelGroup"] for row in data["rows"]] == top_two
+    assert data["pivot_value_counts"] == [3, 2]
+    assert data["row_count"] == 4  # 2 channels x 2 devices instead of the 6-row flat report
+    for row in data["rows"]:
+        for column in data["columns"]:
+            expected = next(r["sessions"] for r in flat if r["sessionDefaultChannelGroup"] ==
+                            row["sessionDefaultChannelGroup"] and r["deviceCategory"] == column)
+            assert row["values"][column] == {"sessions": expected}
+
+
+def test_pivot_request_carries_limits_and_ordering():
+    agent = make_agent()
+    asyncio.run(agent.get_pivot_report("2025-06-01", "2025-06-07", pivots=[
+        {"fields": ["date"], "order_by": "date", "limit": 7},
+        {"fields": ["country"], "limit": 1},
+    ], metrics=["pageviews"], dimension_filter=[{"field": "deviceCategory", "value": "mobile"}]))
+    request = agent.ga_client.requests[-1]
+    assert [m.name for m in request.metrics] == ["screenPageViews"]
+    first, second = request.pivots
+    assert first.limit == 7 and first.order_bys[0].dimension.dimension_name == "date" and not first.order_bys[0].desc
+    assert second.limit == 1 and second.order_bys[0].metric.metric_name == "screenPageViews"
+    assert second.order_bys[0].desc
+    assert request.dimension_filter.filter.field_name == "deviceCategory"
+
+
+def test_batch_runs_many_pivots_in_few_requests():
+    agent = make_agent()
+    reports = [{"start_date": f"2025-06-{day:02d}", "end_date": f"2025-06-{day + 6:02d}",
+                "pivots": [{"fields": ["deviceCategory"]}], "metrics": ["sessions"]} for day in range(1, 15, 2)]
+    result = asyncio.run(agent.get_pivot_reports(reports))
+    assert result["success"]
+    assert result["data"]["requests_made"] == 2
+    assert len(agent.ga_client.requests) == 2
+    assert len(result["data"]["reports"]) == 7
+    assert result["data"]["reports"][0]["date_range"] == "2025-06-01 to 2025-06-07"
+    assert result["data"]["reports"][0]["columns"] == ["total"]
+
+
+def test_invalid_pivots_rejected_locally():
+    agent = make_agent()
+    cases = [
+        [],
+        [{"fields": ["deviceCategory"]}, {"fields": ["deviceCategory"]}],
+        [{"fields": ["devise"]}],
+        [{"fields": ["deviceCategory"], "order_by": "country"}],
+        [{"fields": ["date"], "limit": 1000}, {"fields": ["pagePath"], "limit": 1000}],
+    ]
+    for pivots in cases:
+        result = asyncio.run(agent.get_pivot_report("2025-06-01", "2025-06-07", pivots=pivots))
+        assert result["error"] and result["validation_error"], pivots
+    assert not agent.ga_client.requests
+    with pytest.raises(GA4ValidationError, match="limit"):
+        build_pivots([{"fields": ["date"], "limit": 0}], [["date"]], ["sessions"])
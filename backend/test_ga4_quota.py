@@ -0,0 +1,159 @@
+"""
+Tests for GA4 quota-aware scheduling
+Priority ordering, per-property concurrency caps, token tracking, deferral and degradation
+"""
+
+import asyncio
+import os
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_fact_store import GA4FactStore, SQLiteFactBackend
+from agents.ga4_quota import (
+    BACKGROUND, INTERACTIVE, GA4QuotaScheduler, QuotaDeferredError, QuotaExhaustedError,
+)
+from fake_ga4 import PROPERTY, TODAY, FakeGA4Client, make_agent
+
+
+def _quota(day_remaining, hour_remaining=40000):
+    return SimpleNamespace(
+        tokens_per_day=SimpleNamespace(consumed=10, remaining=day_remaining),
+        tokens_per_hour=SimpleNamespace(consumed=10, remaining=hour_remaining),
+        concurrent_requests=SimpleNamespace(consumed=0, remaining=0),  # unset: ignored
+    )
+
+
+def test_concurrency_cap_and_interactive_first():
+    scheduler = GA4QuotaScheduler(max_concurrent=2, background_max=2)
+    order = []
+    peak = {"value": 0}
+
+    async def call(name, priority):
+        async with scheduler.slot(PROPERTY, priority):
+            state = scheduler.properties[PROPERTY]
+            peak["value"] = max(peak["value"], state.in_flight)
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        background = [asyncio.create_task(call(f"bg{i}", BACKGROUND)) for i in range(4)]
+        await asyncio.sleep(0)  # bg0 and bg1 hold both slots, bg2 and bg3 queue
+        interactive = [asyncio.create_task(call(f"ui{i}", INTERACTIVE)) for i in range(2)]
+        await asyncio.gather(*background, *interactive)
+
+    asyncio.run(scenario())
+    assert peak["value"] == 2
+    assert order[:2] == ["bg0", "bg1"]
+    assert order[2:4] == ["ui0", "ui1"]  # queued later, admitted first
+    assert scheduler.get_stats()["properties"][PROPERTY]["calls"] == {INTERACTIVE: 2, BACKGROUND: 4}
+
+
+def test_background_cap_leaves_room_for_interactive():
+    scheduler = GA4QuotaScheduler(max_concurrent=3, background_max=1)
+    started = []
+
+    async def call(name, priority, seconds):
+        async with scheduler.slot(PROPERTY, priority):
+            started.append(name)
+            await asyncio.sleep(seconds)
+
+    async def scenario():
+        tasks = [asyncio.create_task(call(f"bg{i}", BACKGROUND, 0.05)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("ui", INTERACTIVE, 0)))
+        await asyncio.sleep(0.01)
+        assert started == ["bg0", "ui"]  # bg1/bg2 wait on the background cap, not ui
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert started[2:] == ["bg1", "bg2"]
+
+
+def test_low_tokens_defer_background_then_degrade_then_refuse():
+    scheduler = GA4QuotaScheduler(background_reserve=0.2, degrade_below=0.05)
+    scheduler.admit(PROPERTY, BACKGROUND)  # no reading yet: allowed
+
+    scheduler.record(PROPERTY, _quota(day_remaining=30000))  # 15% of the day
+    assert scheduler.token_share(PROPERTY) == pytest.approx(0.15)
+    assert "concurrent_requests" not in scheduler.properties[PROPERTY].quota
+    scheduler.admit(PROPERTY, INTERACTIVE)
+    with pytest.raises(QuotaDeferredError):
+        scheduler.admit(PROPERTY, BACKGROUND)
+    assert not scheduler.should_degrade(PROPERTY)
+
+    scheduler.record(PROPERTY, _quota(day_remaining=100000, hour_remaining=1000))  # hourly is the tightest
+    assert scheduler.should_degrade(PROPERTY)
+
+    scheduler.record(PROPERTY, _quota(day_remaining=0))
+    with pytest.raises(QuotaExhaustedError):
+        scheduler.admit(PROPERTY, INTERACTIVE)
+    stats = scheduler.get_stats()["properties"][PROPERTY]
+    assert (stats["deferred"], stats["degraded"], stats["exhausted"]) == (1, 1, 1)
+
+
+def test_stale_quota_reading_is_ignored():
+    scheduler = GA4QuotaScheduler(state_ttl=0.01)
+    scheduler.record(PROPERTY, _quota(day_remaining=0))
+    scheduler.properties[PROPERTY].updated_at -= 1
+    assert scheduler.token_share(PROPERTY) is None
+    scheduler.admit(PROPERTY, INTERACTIVE)  # window may have reset: probe again
+
+
+def _agent(tokens_per_day):
+    return make_agent(FakeGA4Client(tokens_per_day=tokens_per_day, tokens_per_request=1000),
+                      quota_scheduler=GA4QuotaScheduler(background_reserve=0.2, degrade_below=0.05))
+
+
+def test_agent_records_returned_quota():
+    agent = _agent(tokens_per_day=200000)
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"]))
+    assert result["success"]
+    assert agent.ga_client.requests[0].return_property_quota
+    quota = agent.quota_scheduler.get_stats()["properties"][PROPERTY]["quota"]
+    assert quota["tokens_per_day"]["remaining"] == 199000
+
+
+def test_realtime_quota_does_not_replace_core_reading():
+    agent = _agent(tokens_per_day=1000)  # the realtime poll reports its tokens as used up
+    agent.quota_scheduler.record(PROPERTY, _quota(day_remaining=150000))
+    asyncio.run(agent._fetch_realtime(PROPERTY))
+    assert agent.ga_client.realtime_calls == 1
+    assert agent.quota_scheduler.token_share(PROPERTY) == pytest.approx(0.75)
+    agent.quota_scheduler.admit(PROPERTY, BACKGROUND)
+
+
+def test_sync_defers_when_tokens_run_low():
+    agent = _agent(tokens_per_day=45000)  # 20% reserve is crossed after 6 requests
+    store = GA4FactStore(SQLiteFactBackend(), final_after_days=3)
+    asyncio.run(store.ensure_schema())
+
+    summary = asyncio.run(store.sync(agent, days_back=30, today=TODAY, chunk_days=7))
+    assert summary["deferred"] and summary["errors"] == []
+    assert len(agent.ga_client.requests) == 6
+
+    # Interactive calls still go through on the remaining tokens
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"]))
+    assert result["success"]
+
+
+def test_interactive_report_degrades_to_stored_days():
+    agent = _agent(tokens_per_day=1000000)
+    store = GA4FactStore(SQLiteFactBackend(), final_after_days=3)
+    asyncio.run(store.ensure_schema())
+    asyncio.run(store.sync(agent, days_back=30, today=TODAY))
+    agent.fact_store = store
+    agent.quota_scheduler.record(PROPERTY, _quota(day_remaining=5000))  # 2.5% left
+
+    agent.ga_client.requests.clear()
+    start = (TODAY - timedelta(days=20)).isoformat()
+    end = (TODAY - timedelta(days=1)).isoformat()
+    result = asyncio.run(agent.get_ga4_report(start, end, dimensions=["date"], metrics=["sessions"]))
+    assert result["success"] and result["data"]["degraded"]
+    assert not agent.ga_client.requests
+    assert len(result["data"]["data"]) == 18  # the last two days are not final yet
@@ -0,0 +1,127 @@
+"""
+Tests for shared GA4 realtime polling
+One run_realtime_report per property per interval, shared by concurrent callers and
+fanned out to stream subscribers
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_realtime import RealtimeHub
+from fake_ga4 import PROPERTY, make_agent
+
+
+def _agent(interval=10.0):
+    return make_agent(realtime=lambda agent: RealtimeHub(agent._fetch_realtime, interval=interval))
+
+
+def test_realtime_report_uses_the_realtime_api():
+    agent = _agent()
+    result = asyncio.run(agent.get_real_time_data())
+    assert result["success"]
+    data = result["data"]
+    assert data["active_users"] == 4 + 3 + 2  # totals from the response
+    assert data["top_screens"][0] == {"screen": "/", "active_users": 4, "pageviews": 9}
+    assert "fetched_at" in data
+    request = agent.ga_client.requests[0]
+    assert [m.name for m in request.metrics] == ["activeUsers", "screenPageViews"]
+    assert agent.ga_client.realtime_calls == 1
+
+
+def test_concurrent_callers_share_one_request_per_interval():
+    agent = _agent(interval=0.05)
+
+    async def scenario():
+        first = await asyncio.gather(*(agent.get_real_time_data() for _ in range(100)))
+        again = await agent.get_real_time_data()
+        await asyncio.sleep(0.06)
+        refreshed = await agent.get_real_time_data()
+        return first, again, refreshed
+
+    first, again, refreshed = asyncio.run(scenario())
+    assert all(r["success"] for r in first)
+    assert again["data"] is first[0]["data"]
+    assert refreshed["data"]["active_users"] == first[0]["data"]["active_users"] + 3
+    assert agent.ga_client.realtime_calls == 2
+    assert agent.realtime.get_stats()["properties"][PROPERTY]["served_shared"] == 100
+
+
+def test_subscribers_share_one_poller():
+    agent = _agent(interval=0.02)
+
+    async def viewer(count):
+        seen = []
+        async for snapshot in agent.realtime.subscribe(PROPERTY):
+            seen.append(snapshot["active_users"])
+            if len(seen) == count:
+                break
+        return seen
+
+    async def scenario():
+        views = await asyncio.gather(*(viewer(3) for _ in range(50)))
+        await asyncio.sleep(0.05)
+        return views
+
+    views = asyncio.run(scenario())
+    assert all(view == views[0] for view in views)
+    assert views[0] == sorted(views[0])
+    # 50 viewers, 3 updates each: 3 realtime requests, not 150; the poller stops with its last viewer
+    assert agent.ga_client.realtime_calls == 3
+    assert agent.realtime.get_stats()["properties"][PROPERTY]["polling"] is False
+
+
+def test_poll_errors_reach_subscribers_and_polling_continues():
+    calls = {"count": 0}
+
+    async def flaky(property_id):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("GA4 unavailable")
+        return {"property_id": property_id, "active_users": 7}
+
+    hub = RealtimeHub(flaky, interval=0.01)
+
+    async def scenario():
+        events = []
+        async for event in hub.subscribe(PROPERTY):
+            events.append(event)
+            if len(events) == 2:
+                break
+        return events
+
+    events = asyncio.run(scenario())
+    assert events[0]["error"] == "GA4 unavailable"
+    assert events[1]["active_users"] == 7
+
+
+def test_failed_fetch_raises_for_every_waiting_caller():
+    async def failing(property_id):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    hub = RealtimeHub(failing)
+
+    async def scenario():
+        return await asyncio.gather(*(hub.latest(PROPERTY) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert hub.get_stats()["properties"][PROPERTY]["fetches"] == 1
+
+
+def test_heartbeat_yields_none_when_idle():
+    async def slow(property_id):
+        await asyncio.sleep(1)
+        return {}
+
+    hub = RealtimeHub(slow, interval=10)
+
+    async def scenario():
+        async for event in hub.subscribe(PROPERTY, heartbeat=0.01):
+            return event
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,159 @@
+"""
+Tests for GA4 call resilience
+Classified retries with jittered backoff, per-call deadlines and per-property circuit breakers,
+driven by a fault-injecting fake GA4 client
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_metadata import GA4MetadataCatalog
+from agents.ga4_resilience import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, GA4Resilience, transient_status
+from fake_ga4 import PROPERTY, FaultyGA4Client, make_agent
+
+
+def _agent(faults=None, fail_with=None, **policy):
+    options = {"base_delay": 0.001, "max_delay": 0.01, "attempt_timeout": 5.0, "deadline": 10.0,
+               "failure_threshold": 3, "reset_timeout": 0.05}
+    options.update(policy)
+    return make_agent(FaultyGA4Client(faults=faults, fail_with=fail_with), resilience=GA4Resilience(**options))
+
+
+def _report(agent):
+    return asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"]))
+
+
+def test_classifies_transient_statuses():
+    from google.api_core import exceptions
+
+    assert transient_status(exceptions.ServiceUnavailable("down")) == "UNAVAILABLE"
+    assert transient_status(exceptions.ResourceExhausted("quota")) == "RESOURCE_EXHAUSTED"
+    assert transient_status(exceptions.DeadlineExceeded("slow")) == "DEADLINE_EXCEEDED"
+    assert transient_status(asyncio.TimeoutError()) == "DEADLINE_EXCEEDED"
+    assert transient_status(exceptions.InvalidArgument("bad metric")) is None
+    assert transient_status(ValueError("x")) is None
+
+
+def test_transient_failures_are_retried_with_a_per_call_deadline():
+    agent = _agent(faults=["UNAVAILABLE", "DEADLINE_EXCEEDED"])
+    result = _report(agent)
+    assert result["success"]
+    assert agent.ga_client.calls == 3
+    assert all(timeout is not None and timeout <= 5.0 for timeout in agent.ga_client.timeouts)
+    assert agent.resilience.get_stats()["retries"] == 2
+
+
+def test_non_transient_errors_fail_without_retry():
+    agent = _agent(faults=["INVALID_ARGUMENT"])
+    result = _report(agent)
+    assert result["error"] and "transient" not in result
+    assert agent.ga_client.calls == 1
+    assert agent.resilience.breaker(PROPERTY).failures == 0
+
+
+def test_gives_up_after_max_attempts_and_flags_transient():
+    agent = _agent(fail_with="RESOURCE_EXHAUSTED", max_attempts=3, failure_threshold=10)
+    result = _report(agent)
+    assert result["error"] and result["transient"]
+    assert agent.ga_client.calls == 3
+    assert agent.resilience.get_stats()["gave_up"] == 1
+
+
+def test_backoff_is_exponential_with_full_jitter():
+    policy = GA4Resilience(base_delay=0.5, max_delay=8.0, rng=lambda: 1.0)
+    assert [policy.backoff(n) for n in range(6)] == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+    policy.rng = lambda: 0.25
+    assert policy.backoff(2) == 0.5
+
+
+def test_deadline_stops_retries():
+    agent = _agent(fail_with="UNAVAILABLE", max_attempts=10, base_delay=0.2, max_delay=0.2, deadline=0.3,
+                   failure_threshold=100)
+    agent.resilience.rng = lambda: 1.0
+    _report(agent)
+    assert agent.ga_client.calls == 2  # the third attempt would start past the deadline
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    agent = _agent(fail_with="UNAVAILABLE", max_attempts=1, failure_threshold=3, reset_timeout=0.05)
+    breaker = agent.resilience.breaker(PROPERTY)
+    for _ in range(3):
+        _report(agent)
+    assert breaker.state == OPEN and agent.ga_client.calls == 3
+
+    result = _report(agent)
+    assert result["transient"] and "retry_after_seconds" in result
+    assert agent.ga_client.calls == 3  # failed fast, GA4 not called
+
+    # Half-open probe: a failure reopens, a success closes
+    asyncio.run(asyncio.sleep(0.06))
+    _report(agent)
+    assert breaker.state == OPEN and agent.ga_client.calls == 4
+
+    asyncio.run(asyncio.sleep(0.06))
+    agent.ga_client.fail_with = None
+    assert _report(agent)["success"]
+    assert breaker.state == CLOSED and breaker.times_opened == 2
+    assert breaker.short_circuited == 1
+
+
+def test_half_open_lets_one_probe_through():
+    resilience = GA4Resilience(failure_threshold=1, reset_timeout=0.0)
+    breaker = resilience.breaker(PROPERTY)
+    breaker.record_failure()
+    breaker.before_call(PROPERTY)  # the probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(PROPERTY)
+
+
+def test_cancelled_probe_releases_the_half_open_breaker():
+    resilience = GA4Resilience(failure_threshold=1, reset_timeout=0.0)
+    breaker = resilience.breaker(PROPERTY)
+    breaker.record_failure()
+
+    async def hang(timeout):
+        await asyncio.sleep(10)
+
+    async def ok(timeout):
+        return "ok"
+
+    async def scenario():
+        probe = asyncio.create_task(resilience.call(PROPERTY, "run_report", hang))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await resilience.call(PROPERTY, "run_report", ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_breakers_are_per_property():
+    agent = _agent(fail_with="UNAVAILABLE", max_attempts=1, failure_threshold=1)
+    _report(agent)
+    agent.ga_client.fail_with = None
+    other = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"],
+                                             property_id="properties/456"))
+    assert other["success"]
+    assert agent.resilience.breaker(PROPERTY).state == OPEN
+    assert agent.resilience.breaker("properties/456").state == CLOSED
+
+
+def test_metadata_fails_fast_while_the_breaker_is_open():
+    agent = _agent(fail_with="UNAVAILABLE", max_attempts=1, failure_threshold=1, reset_timeout=60)
+    _report(agent)
+    metadata_calls = agent.ga_client.inner.metadata_calls
+    agent.metadata = GA4MetadataCatalog(agent._fetch_metadata)  # nothing cached
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(agent.metadata.get(PROPERTY))
+    assert agent.ga_client.inner.metadata_calls == metadata_calls
+    assert agent.resilience.breaker(PROPERTY).short_circuited == 1
@@ -0,0 +1,153 @@
+"""
+Tests for GA4 multi-tenancy
+Cached per-user property resolution, client pooling by credential identity and per-tenant limits
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from agents.ga4_fact_store import SQLiteFactBackend
+from agents.ga4_tenancy import (
+    GA4ClientPool, PropertyAccess, PropertyAccessError, PropertyResolver, TenantBusyError, TenantLimiter,
+    credential_identity,
+)
+from fake_ga4 import FakeGA4Client, make_agent
+
+
+class CountingBackend(SQLiteFactBackend):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+        self.connection.execute("""
+            CREATE TABLE user_ga4_properties (
+                user_id TEXT, property_id TEXT, tenant_id TEXT, credentials_ref TEXT,
+                is_default INTEGER, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.connection.executemany(
+            "INSERT INTO user_ga4_properties VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ("u1", "properties/1", "acme", None, 0, "2025-01-01"),
+                ("u1", "properties/2", "acme", None, 1, "2025-01-02"),
+                ("u2", "properties/3", "globex", "/keys/globex.json", 1, "2025-01-01"),
+            ],
+        )
+
+    async def fetch_all(self, query, values=None):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return await super().fetch_all(query, values)
+
+
+def test_resolver_caches_and_checks_access():
+    async def scenario():
+        backend = CountingBackend()
+        resolver = PropertyResolver(backend, ttl=60)
+        # Concurrent first lookups share one query
+        results = await asyncio.gather(*(resolver.resolve("u1") for _ in range(5)))
+        explicit = await resolver.resolve("u1", "properties/1")
+        with pytest.raises(PropertyAccessError):
+            await resolver.resolve("u1", "properties/3")
+        unknown = await resolver.resolve("nobody")
+        return backend, resolver, results, explicit, unknown
+
+    backend, resolver, results, explicit, unknown = asyncio.run(scenario())
+    assert {r.property_id for r in results} == {"properties/2"}  # is_default first
+    assert explicit.tenant_id == "acme"
+    assert unknown is None
+    assert backend.queries == 2  # u1 once, nobody once
+    assert resolver.get_stats()["hits"] == 2
+
+
+def test_resolver_ttl_and_invalidate():
+    async def scenario():
+        backend = CountingBackend()
+        resolver = PropertyResolver(backend, ttl=0.05)
+        await resolver.resolve("u1")
+        await asyncio.sleep(0.06)
+        await resolver.resolve("u1")
+        resolver.invalidate("u1")
+        await resolver.resolve("u1")
+        return backend.queries
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_clients_shared_by_service_account(tmp_path):
+    key = {"type": "service_account", "client_email": "reports@acme.iam.gserviceaccount.com"}
+    path = tmp_path / "acme.json"
+    path.write_text(json.dumps(key))
+
+    assert credential_identity(str(path)) == credential_identity(json.dumps(key)) == key["client_email"]
+    assert credential_identity(None) == "default"
+
+    created = []
+    pool = GA4ClientPool(lambda ref: created.append(ref) or object())
+    assert pool.get(str(path)) is pool.get(json.dumps(key))
+    assert pool.get("/missing/other.json") is not pool.get(str(path))
+    assert len(created) == 2
+
+
+def test_tenant_limit_caps_heavy_tenant_without_starving_others():
+    limiter = TenantLimiter(max_concurrent=2, acquire_timeout=5)
+    finished = {}
+
+    async def call(tenant, seconds):
+        async with limiter.slot(tenant):
+            await asyncio.sleep(seconds)
+        finished.setdefault(tenant, time.perf_counter())
+
+    async def scenario():
+        started = time.perf_counter()
+        heavy = [call("heavy", 0.1) for _ in range(10)]
+        await asyncio.gather(*heavy, call("light", 0.01))
+        return started
+
+    started = asyncio.run(scenario())
+    stats = limiter.get_stats()["tenants"]
+    assert stats["heavy"]["peak"] == 2 and stats["heavy"]["calls"] == 10
+    assert finished["light"] - started < 0.05  # not queued behind the heavy tenant
+
+
+def test_tenant_acquire_timeout():
+    limiter = TenantLimiter(max_concurrent=1, acquire_timeout=0.02)
+
+    async def scenario():
+        async def hold():
+            async with limiter.slot("t"):
+                await asyncio.sleep(0.2)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(TenantBusyError):
+            async with limiter.slot("t"):
+                pass
+        await holder
+
+    asyncio.run(scenario())
+    assert limiter.get_stats()["tenants"]["t"]["rejected"] == 1
+
+
+def test_agent_routes_bound_property_through_tenant_client():
+    tenant_client = FakeGA4Client()
+    agent = make_agent(property_id="properties/default", client_pool=GA4ClientPool(lambda ref: tenant_client),
+                       tenant_limiter=TenantLimiter(max_concurrent=2))
+    agent.bind_property(PropertyAccess("properties/3", "globex", "/keys/globex.json"))
+
+    result = asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"],
+                                              property_id="properties/3"))
+    assert result["success"]
+    assert len(tenant_client.requests) == 1 and not agent.ga_client.requests
+    assert agent.tenant_limiter.get_stats()["tenants"]["globex"]["calls"] == 1
+
+    asyncio.run(agent.get_ga4_report("2025-06-01", "2025-06-02", metrics=["sessions"]))
+    assert len(agent.ga_client.requests) == 1
+    assert agent.tenant_limiter.get_stats()["tenants"]["default"]["calls"] == 1
@@ -0,0 +1,120 @@
+"""
+Tests for the Prometheus /metrics exposition
+Scrapes a local app and parses the text format back into samples
+"""
+
+import os
+import re
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from middleware.metrics import MetricsMiddleware
+from monitoring.metrics import (
+    CACHE_REQUESTS, CONTENT_TYPE, GA4_REQUEST_DURATION, GA4_REQUESTS, REGISTRY, Counter, Registry,
+)
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """Parse exposition text into {(name, frozenset(labels)): value}, checking HELP/TYPE precede samples."""
+    samples = {}
+    typed = set()
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            typed.add(line.split()[2])
+            continue
+        if line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        assert match, f"unparseable line: {line!r}"
+        name, labels, value = match.groups()
+        assert re.sub(r"_(bucket|sum|count)$", "", name) in typed or name in typed, name
+        samples[(name, frozenset(_LABEL.findall(labels or "")))] = float(value)
+    return samples
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    return TestClient(app)
+
+
+def test_scrape_http_metrics_by_route_template():
+    client = _client()
+    for item_id in (1, 2, 3, 0):
+        client.get(f"/items/{item_id}")
+    client.get("/nope")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = parse(response.text)
+
+    ok = frozenset({("method", "GET"), ("route", "/items/{item_id}"), ("status", "200")})
+    assert samples[("aterges_http_requests_total", ok)] >= 3
+    assert samples[("aterges_http_requests_total",
+                    frozenset({("method", "GET"), ("route", "/items/{item_id}"), ("status", "404")}))] >= 1
+    assert samples[("aterges_http_requests_total",
+                    frozenset({("method", "GET"), ("route", "unmatched"), ("status", "404")}))] >= 1
+    # Raw paths never become label values
+    assert not any(("route", "/items/1") in labels for _, labels in samples)
+
+    # The /metrics request itself is in flight while rendering
+    assert samples[("aterges_http_requests_in_flight", frozenset())] == 1
+
+    buckets = sorted(
+        (float("inf") if dict(labels)["le"] == "+Inf" else float(dict(labels)["le"]), value)
+        for (name, labels), value in samples.items()
+        if name == "aterges_http_request_duration_seconds_bucket" and ok <= labels
+    )
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts), "bucket counts must be cumulative"
+    assert counts[-1] == samples[("aterges_http_request_duration_seconds_count", ok)]
+
+
+def test_ga4_and_cache_samples():
+    GA4_REQUEST_DURATION.labels("run_report", "properties/test").observe(0.12)
+    GA4_REQUESTS.labels("run_report", "properties/test", "ok").inc()
+    CACHE_REQUESTS.labels("test_cache", "hit").inc(3)
+    CACHE_REQUESTS.labels("test_cache", "miss").inc()
+
+    samples = parse(REGISTRY.render())
+    labels = frozenset({("method", "run_report"), ("property", "properties/test")})
+    assert samples[("aterges_ga4_request_duration_seconds_count", labels)] >= 1
+    assert samples[("aterges_ga4_requests_total", labels | {("outcome", "ok")})] >= 1
+    assert samples[("aterges_cache_hit_ratio", frozenset({("cache", "test_cache")}))] == 0.75
+
+
+def test_label_escaping_and_failing_collector():
+    registry = Registry()
+    counter = Counter("demo_total", "Demo", ("path",), registry)
+    counter.labels('a"b\\c\nd').inc(2)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.add_collector(broken)
+    text = registry.render()
+    assert 'demo_total{path="a\\"b\\\\c\\nd"} 2' in text
+    assert parse(text)
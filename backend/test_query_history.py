@@ -0,0 +1,142 @@
+"""
+Tests for the write-behind query history log
+Uses an in-memory stand-in for Database.bulk_insert (no server required)
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from database.query_history import COLUMNS, QueryHistoryWriter, build_record
+
+
+class FakeDatabase:
+    """Collects COPY rows; can be switched to fail like an unreachable server."""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+        self.fail = False
+        self.delay = 0
+
+    async def bulk_insert(self, table, columns, records, schema=None, timeout=None):
+        assert table == "query_history"
+        assert tuple(columns) == COLUMNS
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        rows = list(records)
+        self.rows.extend(rows)
+        self.batches += 1
+        return len(rows)
+
+
+def _record(i: int):
+    return build_record(
+        user_id="00000000-0000-0000-0000-000000000001",
+        prompt=f"prompt {i}",
+        response="answer",
+        status="success",
+        latency_ms=12.5,
+        tool_calls=[{"name": "get_ga4_report", "args": {"metrics": ["sessions"]}, "latency_ms": 3.0, "error": False}],
+    )
+
+
+def test_flushes_by_size_and_on_stop():
+    async def scenario():
+        db = FakeDatabase()
+        writer = QueryHistoryWriter(db, batch_size=10, flush_interval=60, max_buffer=100, overflow_policy="drop")
+        writer.start()
+        for i in range(25):
+            writer.record(_record(i))
+        await asyncio.sleep(0.05)  # size trigger fires without waiting for the interval
+        assert len(db.rows) >= 20
+        await writer.stop()
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert len(db.rows) == 25
+    assert writer.get_stats()["buffered"] == 0
+    row = db.rows[0]
+    assert row[1] == "prompt 0"
+    assert row[5] == 1  # tool_call_count
+
+
+def test_stop_waits_for_the_flush_in_progress():
+    async def scenario():
+        db = FakeDatabase()
+        db.delay = 0.1
+        writer = QueryHistoryWriter(db, batch_size=5, flush_interval=60, max_buffer=100, overflow_policy="drop")
+        writer.start()
+        for i in range(7):
+            writer.record(_record(i))
+        await asyncio.sleep(0.02)  # the loop is now inside bulk_insert with the first batch
+        await writer.stop()
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert sorted(row[1] for row in db.rows) == sorted(f"prompt {i}" for i in range(7))
+    assert writer.dropped == 0
+
+
+def test_cancelled_flush_keeps_its_batch():
+    async def scenario():
+        db = FakeDatabase()
+        db.delay = 10
+        writer = QueryHistoryWriter(db, batch_size=3, flush_interval=60, max_buffer=100, overflow_policy="drop")
+        for i in range(5):
+            writer.record(_record(i))
+        task = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [r["prompt"] for r in writer._buffer] == [f"prompt {i}" for i in range(5)]
+
+
+def test_drop_policy_bounds_memory():
+    async def scenario():
+        db = FakeDatabase()
+        writer = QueryHistoryWriter(db, batch_size=1000, flush_interval=60, max_buffer=5, overflow_policy="drop")
+        for i in range(8):
+            writer.record(_record(i))
+        assert writer.get_stats()["buffered"] == 5
+        await writer.flush()
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert writer.dropped == 3
+    assert [row[1] for row in db.rows] == [f"prompt {i}" for i in range(5)]
+
+
+def test_spill_policy_replays_after_outage(tmp_path):
+    spill_path = str(tmp_path / "history.jsonl")
+
+    async def scenario():
+        db = FakeDatabase()
+        writer = QueryHistoryWriter(db, batch_size=4, flush_interval=60, max_buffer=4,
+                                    overflow_policy="spill", spill_path=spill_path)
+        db.fail = True
+        for i in range(6):
+            writer.record(_record(i))
+        await writer.flush()  # fails: the 4 buffered records spill next to the 2 overflowed ones
+        assert writer.spilled == 6 and os.path.exists(spill_path)
+
+        db.fail = False
+        writer.record(_record(6))
+        await writer.flush()
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert sorted(row[1] for row in db.rows) == sorted(f"prompt {i}" for i in range(7))
+    assert writer.spilled == 0 and writer.spilled_total == 6 and writer.dropped == 0
+    assert not os.path.exists(spill_path)
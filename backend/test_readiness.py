@@ -0,0 +1,114 @@
+"""
+Tests for the readiness monitor
+Concurrent checks, timeouts, per-check intervals and staleness
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from monitoring.readiness import ReadinessMonitor
+
+
+def _slow(seconds, value=None, calls=None):
+    async def check():
+        if calls is not None:
+            calls.append(time.monotonic())
+        await asyncio.sleep(seconds)
+        return value if value is not None else {"status": "ok"}
+    return check
+
+
+def test_checks_run_concurrently_with_timeouts():
+    async def scenario():
+        monitor = ReadinessMonitor(timeout=0.5)
+        monitor.add_check("database", _slow(0.2))
+        monitor.add_check("cache", _slow(0.2))
+        monitor.add_check("agent:google_analytics", _slow(5), critical=False)
+        started = time.perf_counter()
+        await monitor.refresh()
+        return monitor, time.perf_counter() - started
+
+    monitor, elapsed = asyncio.run(scenario())
+    assert elapsed < 1.0  # bounded by the timeout, not the sum of the checks
+    snapshot = monitor.snapshot()
+    assert snapshot["status"] == "ready"  # the timed-out check is not critical
+    agent = snapshot["checks"]["agent:google_analytics"]
+    assert agent["status"] == "error" and "timed out" in agent["error"]
+    assert snapshot["checks"]["database"]["stale"] is False
+
+
+def test_not_ready_until_checked_and_on_critical_failure():
+    async def failing():
+        raise ConnectionError("refused")
+
+    async def scenario():
+        monitor = ReadinessMonitor()
+        monitor.add_check("database", failing)
+        before = monitor.snapshot()
+        await monitor.refresh()
+        return before, monitor.snapshot()
+
+    before, after = asyncio.run(scenario())
+    assert before["status"] == "not_ready"
+    assert before["checks"]["database"]["status"] == "pending"
+    assert after["status"] == "not_ready"
+    assert after["checks"]["database"]["error"] == "refused"
+
+
+def test_agent_health_dicts_and_per_check_intervals():
+    calls = []
+
+    async def scenario():
+        monitor = ReadinessMonitor(interval=0.01)
+        monitor.add_check("database", _slow(0, calls=calls))
+        monitor.add_check("agent:ga", _slow(0, {"status": "error", "message": "GA4 down"}), critical=False,
+                          interval=60)
+        await monitor.refresh()
+        first = monitor.results(prefix="agent:")["agent:ga"]["checked_at"]
+        await asyncio.sleep(0.02)
+        await monitor.refresh()
+        return monitor, first
+
+    monitor, first = asyncio.run(scenario())
+    results = monitor.results(prefix="agent:")
+    assert list(results) == ["agent:ga"]
+    assert results["agent:ga"]["status"] == "error"
+    assert results["agent:ga"]["detail"]["message"] == "GA4 down"
+    assert results["agent:ga"]["checked_at"] == first  # not due yet
+    assert len(calls) == 2  # the cheap check ran on both refreshes
+
+
+def test_stale_results_make_service_not_ready():
+    async def scenario():
+        monitor = ReadinessMonitor(interval=0.01, timeout=0.01, stale_after=0.05)
+        monitor.add_check("database", _slow(0))
+        await monitor.refresh()
+        fresh = monitor.snapshot()
+        await asyncio.sleep(0.1)
+        return fresh, monitor.snapshot()
+
+    fresh, stale = asyncio.run(scenario())
+    assert fresh["status"] == "ready"
+    assert stale["status"] == "not_ready"
+    assert stale["checks"]["database"]["stale"] is True
+    assert stale["max_age_seconds"] >= 0.1
+
+
+def test_background_loop_refreshes_and_stops():
+    calls = []
+
+    async def scenario():
+        monitor = ReadinessMonitor(interval=0.02)
+        monitor.add_check("database", _slow(0, calls=calls))
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return len(calls)
+
+    count = asyncio.run(scenario())
+    assert count >= 3
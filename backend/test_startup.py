@@ -0,0 +1,73 @@
+"""
+Tests for startup step orchestration
+Concurrency, per-step timeouts, required vs optional steps and deferred completion
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from startup import StartupError, StartupReport
+
+
+def _step(seconds, value="done"):
+    async def step():
+        await asyncio.sleep(seconds)
+        return value
+    return step
+
+
+def test_independent_steps_run_concurrently():
+    async def scenario():
+        report = StartupReport()
+        started = time.perf_counter()
+        results = await report.run_concurrently({
+            "database": (_step(0.2, "pool"), True),
+            "auth_service": (_step(0.2, "auth"), True),
+        }, timeout=1)
+        return report, results, time.perf_counter() - started
+
+    report, results, elapsed = asyncio.run(scenario())
+    assert results == {"database": "pool", "auth_service": "auth"}
+    assert elapsed < 0.35
+    assert {step["status"] for step in report.steps.values()} == {"ok"}
+    assert all(step["duration_ms"] >= 190 for step in report.steps.values())
+
+
+def test_optional_step_timeout_degrades_and_required_failure_raises():
+    async def broken():
+        raise ConnectionError("refused")
+
+    async def scenario():
+        report = StartupReport()
+        optional = await report.run_step("warmup", _step(1), timeout=0.05)
+        with pytest.raises(StartupError, match="refused"):
+            await report.run_step("database", broken, timeout=1, required=True)
+        return report, optional
+
+    report, optional = asyncio.run(scenario())
+    assert optional is None
+    assert report.steps["warmup"]["status"] == "timeout"
+    assert report.steps["database"]["status"] == "error"
+
+
+def test_shielded_future_completes_after_timeout():
+    async def scenario():
+        report = StartupReport()
+        build = asyncio.ensure_future(_step(0.1, "orchestrator")())
+        result = await report.run_step("ai_orchestrator", build, timeout=0.02)
+        late = await build
+        report.mark_ready()
+        return report, result, late
+
+    report, result, late = asyncio.run(scenario())
+    assert result is None and late == "orchestrator"
+    snapshot = report.snapshot()
+    assert snapshot["steps"]["ai_orchestrator"]["status"] == "timeout"
+    assert snapshot["ready_ms"] is not None
@@ -0,0 +1,118 @@
+"""
+Tests for the client warm-up stage
+Concurrent per-client warm-up with timeouts, status reporting and proactive token refresh
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+from ai.warmup import ClientWarmer, refresh_if_expiring
+
+
+class FakeCredentials:
+    def __init__(self, expires_in: float = None):
+        self.token = "token" if expires_in is not None else None
+        self.expiry = self._utc_in(expires_in) if expires_in is not None else None
+        self.refreshes = 0
+
+    @staticmethod
+    def _utc_in(seconds):
+        return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=seconds)
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = "token"
+        self.expiry = self._utc_in(3600)
+
+
+class FakeAgent:
+    def __init__(self, seconds: float, error: Exception = None):
+        self.seconds = seconds
+        self.error = error
+        self.credentials = FakeCredentials(expires_in=60)
+
+    async def warm_up(self):
+        await asyncio.sleep(self.seconds)
+        if self.error:
+            raise self.error
+        return {"status": "ok"}
+
+
+def _orchestrator(**agents):
+    vertex = FakeCredentials()
+
+    async def warm_up_model():
+        await asyncio.sleep(0.1)
+        return {"status": "ok"}
+
+    return SimpleNamespace(
+        agents=agents,
+        warm_up_model=warm_up_model,
+        get_credentials=lambda: {"vertex": vertex, **{n: a.credentials for n, a in agents.items()}},
+    )
+
+
+def test_refresh_if_expiring():
+    fresh = FakeCredentials(expires_in=3600)
+    expiring = FakeCredentials(expires_in=60)
+    no_token = FakeCredentials()
+    assert refresh_if_expiring(fresh, 300) is False
+    assert refresh_if_expiring(expiring, 300) is True
+    assert refresh_if_expiring(no_token, 300) is True
+    assert refresh_if_expiring(None, 300) is False
+    assert (fresh.refreshes, expiring.refreshes, no_token.refreshes) == (0, 1, 1)
+
+
+def test_components_warm_concurrently_and_report_status():
+    async def scenario():
+        warmer = ClientWarmer(_orchestrator(google_analytics=FakeAgent(0.1)), timeout=1)
+        assert warmer.status()["state"] == "pending"
+        started = time.perf_counter()
+        await warmer.warm_up()
+        return warmer, time.perf_counter() - started
+
+    warmer, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.18
+    status = warmer.status()
+    assert status["status"] == "ok" and status["state"] == "warm"
+    assert set(status["components"]) == {"vertex_model", "agent:google_analytics"}
+
+
+def test_partial_warm_up_on_timeout_or_error():
+    async def scenario():
+        warmer = ClientWarmer(_orchestrator(
+            slow=FakeAgent(5), broken=FakeAgent(0, error=RuntimeError("no channel"))), timeout=0.2)
+        await warmer.warm_up()
+        return warmer
+
+    status = asyncio.run(scenario()).status()
+    assert status["state"] == "partial" and status["status"] == "warning"
+    assert "timed out" in status["components"]["agent:slow"]["error"]
+    assert status["components"]["agent:broken"]["error"] == "no channel"
+    assert status["components"]["vertex_model"]["status"] == "ok"
+
+
+def test_background_loop_refreshes_tokens_before_expiry():
+    orchestrator = _orchestrator(google_analytics=FakeAgent(0))
+
+    async def scenario():
+        warmer = ClientWarmer(orchestrator, refresh_interval=0.02, refresh_margin=300)
+        warmer.start()
+        await asyncio.sleep(0.3)
+        await warmer.stop()
+        return warmer
+
+    warmer = asyncio.run(scenario())
+    credentials = orchestrator.get_credentials()
+    assert warmer.state == "warm"
+    # Both started without a usable token; each is refreshed once, then left alone
+    assert credentials["vertex"].refreshes == 1
+    assert credentials["google_analytics"].refreshes == 1
+    assert warmer.token_refreshes == 2
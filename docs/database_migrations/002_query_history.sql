@@ -0,0 +1,56 @@
+-- =====================================================
+-- Aterges Backend Database Schema
+-- Migration 002: Query History
+-- =====================================================
+
+-- =====================================================
+-- Table: query_history
+-- Purpose: Write-behind log of /api/query prompts, tool calls and latencies
+-- Written in batches by the backend (database/query_history.py)
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS query_history (
+    -- Primary identifier
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+
+    -- User (Supabase auth.users id; no FK so batched COPY never blocks on deletes)
+    user_id UUID,
+
+    -- Request and answer
+    prompt TEXT NOT NULL,
+    response TEXT,
+    status VARCHAR(32) NOT NULL,
+
+    -- Tool calls executed by the orchestrator: [{name, args, latency_ms, error}]
+    tool_calls JSONB DEFAULT '[]',
+    tool_call_count INTEGER DEFAULT 0,
+
+    -- End-to-end latency of the request
+    latency_ms DOUBLE PRECISION,
+
+    -- Timestamps
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- =====================================================
+-- Indexes for Performance
+-- =====================================================
+
+-- Per-user history
+CREATE INDEX IF NOT EXISTS idx_query_history_user_id
+    ON query_history(user_id, created_at DESC);
+
+-- Slow query investigation
+CREATE INDEX IF NOT EXISTS idx_query_history_latency
+    ON query_history(created_at DESC, latency_ms DESC);
+
+-- =====================================================
+-- Row Level Security (RLS) Policies
+-- =====================================================
+
+ALTER TABLE query_history ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Users can view their own query history
+CREATE POLICY IF NOT EXISTS "Users can view own query history"
+    ON query_history FOR SELECT
+    USING (auth.uid() = user_id);
@@ -0,0 +1,52 @@
+-- =====================================================
+-- Aterges Backend Database Schema
+-- Migration 003: GA4 Fact Store
+-- =====================================================
+
+-- =====================================================
+-- Table: ga4_daily_facts
+-- Purpose: Per-property daily GA4 metrics for common breakdowns
+-- Filled by sync_ga4_facts.py, read by GoogleAnalyticsAgent.get_ga4_report
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS ga4_daily_facts (
+    -- GA4 property ("properties/123456")
+    property_id TEXT NOT NULL,
+
+    -- Sorted, comma-separated breakdown ('' for property totals)
+    dimension_set TEXT NOT NULL,
+    day DATE NOT NULL,
+
+    -- JSON array of dimension values in dimension_set order
+    dimension_values TEXT NOT NULL,
+
+    -- Metrics
+    sessions DOUBLE PRECISION,
+    screen_page_views DOUBLE PRECISION,
+    engaged_sessions DOUBLE PRECISION,
+    event_count DOUBLE PRECISION,
+    new_users DOUBLE PRECISION,
+    active_users DOUBLE PRECISION,
+
+    -- Serves range scans on (property, breakdown, day)
+    PRIMARY KEY (property_id, dimension_set, day, dimension_values)
+);
+
+-- =====================================================
+-- Table: ga4_fact_sync
+-- Purpose: Which days are synced per breakdown and whether GA4 data was final
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS ga4_fact_sync (
+    property_id TEXT NOT NULL,
+    dimension_set TEXT NOT NULL,
+    day DATE NOT NULL,
+    is_final BOOLEAN NOT NULL,
+    synced_at TIMESTAMP WITH TIME ZONE NOT NULL,
+
+    PRIMARY KEY (property_id, dimension_set, day)
+);
+
+-- Backend-only tables: no client access
+ALTER TABLE ga4_daily_facts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ga4_fact_sync ENABLE ROW LEVEL SECURITY;
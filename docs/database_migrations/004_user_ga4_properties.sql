@@ -0,0 +1,59 @@
+-- =====================================================
+-- Aterges Backend Database Schema
+-- Migration 004: Per-user GA4 properties
+-- =====================================================
+
+-- =====================================================
+-- Table: user_ga4_properties
+-- Purpose: Which GA4 properties each user may query, and with which credentials
+-- Read (and cached) by agents/ga4_tenancy.py PropertyResolver
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS user_ga4_properties (
+    -- Primary identifier
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+
+    -- User relationship (references Supabase auth.users)
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    -- GA4 property ("properties/123456")
+    property_id TEXT NOT NULL,
+
+    -- Customer/organization the property belongs to; GA4 concurrency is limited per tenant
+    tenant_id TEXT NOT NULL DEFAULT 'default',
+
+    -- Service account key (file path or inline JSON) when the tenant uses its own;
+    -- NULL uses the backend's service account. Refs to the same account share one client.
+    credentials_ref TEXT,
+
+    -- Property used when the user does not name one
+    is_default BOOLEAN DEFAULT FALSE,
+
+    -- Timestamps
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    UNIQUE (user_id, property_id)
+);
+
+-- =====================================================
+-- Indexes for Performance
+-- =====================================================
+
+-- One lookup per query (PropertyResolver cache miss)
+CREATE INDEX IF NOT EXISTS idx_user_ga4_properties_user_id
+    ON user_ga4_properties(user_id, is_default DESC, created_at);
+
+-- At most one default property per user
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_ga4_properties_default
+    ON user_ga4_properties(user_id) WHERE is_default;
+
+-- =====================================================
+-- Row Level Security (RLS) Policies
+-- =====================================================
+
+ALTER TABLE user_ga4_properties ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Users can view their own property links
+CREATE POLICY IF NOT EXISTS "Users can view own GA4 properties"
+    ON user_ga4_properties FOR SELECT
+    USING (auth.uid() = user_id);
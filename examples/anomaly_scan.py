@@ -0,0 +1,175 @@
+"""
+Batch GA4 Anomaly Scan
+Pulls a daily series for every client's GA4 property with bounded concurrency, stacks them into
+one properties x days matrix and flags unusual recent days for all properties at once
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
+
+logger = logging.getLogger("anomaly-scan")
+
+SEASON_LENGTH = 7  # weekday seasonality
+
+
+def detect_anomalies(matrix: np.ndarray, recent_days: int = 3, z_threshold: float = 3.0,
+                     min_expected: float = 10.0) -> Dict[str, np.ndarray]:
+    """
+    Score the last recent_days of every row (property) against its own history in one pass.
+
+    The expected value for a recent day is the mean of the same weekday over the baseline
+    (all earlier days); z is the deviation from it in units of the baseline's spread around
+    its weekday means (at least the Poisson noise of the expected count). Rows whose expected
+    value is below min_expected are too small to judge.
+    """
+    properties, days = matrix.shape
+    if days - recent_days < 2 * SEASON_LENGTH:
+        raise ValueError(f"Need at least {2 * SEASON_LENGTH} baseline days before the {recent_days} recent days")
+    baseline, recent = matrix[:, :days - recent_days], matrix[:, days - recent_days:]
+    positions = np.arange(days) % SEASON_LENGTH
+
+    # Weekday means over the baseline: (properties, SEASON_LENGTH)
+    weekday_sum = np.zeros((properties, SEASON_LENGTH))
+    weekday_count = np.bincount(positions[:days - recent_days], minlength=SEASON_LENGTH)
+    np.add.at(weekday_sum.T, positions[:days - recent_days], baseline.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weekday_mean = np.where(weekday_count > 0, weekday_sum / weekday_count, baseline.mean(axis=1)[:, None])
+
+    residual = baseline - weekday_mean[:, positions[:days - recent_days]]
+    expected = weekday_mean[:, positions[days - recent_days:]]
+    # Counts vary at least by Poisson noise, even when the history happens to be very regular
+    spread = np.maximum(residual.std(axis=1, ddof=1)[:, None], np.sqrt(np.maximum(expected, 1.0)))
+    z = (recent - expected) / spread
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(expected > 0, (recent - expected) / expected * 100, np.nan)
+    flagged = (np.abs(z) >= z_threshold) & (expected >= min_expected)
+    return {"z": z, "expected": expected, "recent": recent, "pct": pct, "flagged": flagged}
+
+
+class AnomalyResultStore:
+    """Completed scans in a JSON file (newest first), like clients.json for client configurations"""
+
+    def __init__(self, path: str = "anomaly_scans.json", max_scans: int = 20):
+        self.path = path
+        self.max_scans = max_scans
+
+    def load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get("scans", [])
+        except Exception as e:
+            logger.error(f"Error loading anomaly scans: {e}")
+            return []
+
+    def save(self, scan: Dict[str, Any]):
+        scans = [scan] + self.load()
+        with open(self.path, "w") as f:
+            json.dump({"scans": scans[:self.max_scans], "last_updated": datetime.now().isoformat()}, f, indent=2)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        scans = self.load()
+        return scans[0] if scans else None
+
+
+class AnomalyScanner:
+    """Runs one scan over the clients of a ClientManager with a GA4 Data API client"""
+
+    def __init__(self, client_manager, ga_client, max_concurrency: int = 8):
+        self.client_manager = client_manager
+        self.ga_client = ga_client
+        self.max_concurrency = max_concurrency
+
+    def _fetch_series(self, property_id: str, metric: str, start: date, days: int) -> np.ndarray:
+        request = RunReportRequest(
+            property=property_id,
+            dimensions=[Dimension(name="date")],
+            metrics=[Metric(name=metric)],
+            date_ranges=[DateRange(start_date=start.isoformat(),
+                                   end_date=(start + timedelta(days=days - 1)).isoformat())],
+        )
+        response = self.ga_client.run_report(request=request)
+        # GA4 leaves out days without data; they stay 0
+        series = np.zeros(days)
+        for row in response.rows:
+            day = datetime.strptime(row.dimension_values[0].value, "%Y%m%d").date()
+            series[(day - start).days] = float(row.metric_values[0].value)
+        return series
+
+    async def run(self, client_ids: List[str] = None, metric: str = "sessions", days: int = 56,
+                  recent_days: int = 3, z_threshold: float = 3.0, min_expected: float = 10.0,
+                  end_date: date = None) -> Dict[str, Any]:
+        """Scan every client with a GA4 property (or only client_ids); returns the ranked scan result"""
+        if days - recent_days < 2 * SEASON_LENGTH:
+            raise ValueError(f"Need at least {2 * SEASON_LENGTH} baseline days before the {recent_days} recent days")
+        end = end_date or date.today() - timedelta(days=1)
+        start = end - timedelta(days=days - 1)
+        targets = []
+        for client_id in client_ids or list(self.client_manager.clients):
+            config = self.client_manager.get_client_config(client_id)
+            if config and config.get("ga4_property_id"):
+                targets.append(config)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(config):
+            async with semaphore:
+                return await asyncio.to_thread(self._fetch_series, config["ga4_property_id"], metric, start, days)
+
+        started = datetime.now()
+        results = await asyncio.gather(*(fetch(config) for config in targets), return_exceptions=True)
+
+        scanned, series, errors = [], [], []
+        for config, result in zip(targets, results):
+            if isinstance(result, Exception):
+                errors.append({"client_id": config["client_id"], "property_id": config["ga4_property_id"],
+                               "error": str(result)})
+            else:
+                scanned.append(config)
+                series.append(result)
+
+        anomalies = []
+        if series:
+            detected = detect_anomalies(np.vstack(series), recent_days, z_threshold, min_expected)
+            recent_dates = [end - timedelta(days=recent_days - 1 - i) for i in range(recent_days)]
+            for row, column in zip(*np.nonzero(detected["flagged"])):
+                config = scanned[row]
+                z = float(detected["z"][row, column])
+                pct = float(detected["pct"][row, column])
+                anomalies.append({
+                    "client_id": config["client_id"],
+                    "client_name": config.get("name"),
+                    "property_id": config["ga4_property_id"],
+                    "date": recent_dates[column].isoformat(),
+                    "value": float(detected["recent"][row, column]),
+                    "expected": round(float(detected["expected"][row, column]), 2),
+                    "z": round(z, 2),
+                    "pct_change": None if np.isnan(pct) else round(pct, 1),
+                    "direction": "drop" if z < 0 else "spike",
+                })
+            # Largest deviations first; drops before spikes of the same size
+            anomalies.sort(key=lambda a: (-abs(a["z"]), a["direction"] != "drop"))
+            for rank, anomaly in enumerate(anomalies, 1):
+                anomaly["rank"] = rank
+
+        return {
+            "scan_id": uuid.uuid4().hex[:12],
+            "started_at": started.isoformat(),
+            "duration_seconds": round((datetime.now() - started).total_seconds(), 2),
+            "metric": metric,
+            "date_range": f"{start.isoformat()} to {end.isoformat()}",
+            "recent_days": recent_days,
+            "z_threshold": z_threshold,
+            "properties_scanned": len(scanned),
+            "anomalies": anomalies,
+            "errors": errors,
+        }
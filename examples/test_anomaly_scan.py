@@ -0,0 +1,58 @@
+"""
+Tests for the batch anomaly scan
+Recent days of every property are scored against that property's weekday baseline in one pass
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from anomaly_scan import AnomalyScanner, detect_anomalies
+
+WEEKLY = np.array([1.2, 1.1, 1.0, 1.0, 0.9, 0.4, 0.4])
+
+
+def _matrix(levels, days=35, seed=3):
+    # Weekly pattern starting mid-week, so columns don't line up with weekday 0
+    rng = np.random.default_rng(seed)
+    pattern = WEEKLY[(np.arange(days) + 3) % 7]
+    return np.vstack([rng.poisson(level * pattern).astype(float) for level in levels])
+
+
+def test_planted_drop_and_spike_are_flagged():
+    matrix = _matrix([1000, 500, 2000, 5])
+    matrix[0, -1] *= 0.3  # drop on the last day
+    matrix[1, -2] *= 2.5  # spike two days ago
+    matrix[3, -1] = 40  # an 8x jump on a tiny property
+
+    detected = detect_anomalies(matrix, recent_days=3, z_threshold=4.0, min_expected=10.0)
+    flagged = {(int(row), int(column)) for row, column in zip(*np.nonzero(detected["flagged"]))}
+    assert flagged == {(0, 2), (1, 1)}
+    assert detected["z"][0, 2] < 0 and detected["pct"][0, 2] == pytest.approx(-70, abs=5)
+    assert detected["z"][1, 1] > 0
+    assert detected["expected"][3, 2] < 10  # below min_expected: too small to judge
+    assert detected["expected"][2, 0] == pytest.approx(2000 * WEEKLY[(32 + 3) % 7], rel=0.05)
+
+
+def test_flat_history_still_scores_deviations():
+    # No variation around the weekday means: the Poisson floor keeps z finite and meaningful
+    matrix = np.tile(100 * WEEKLY, 5)[None, :]
+    matrix[0, -1] = 10  # expected 40
+    detected = detect_anomalies(matrix, recent_days=1)
+    assert detected["flagged"][0, 0]
+    assert detected["z"][0, 0] == pytest.approx(-30 / np.sqrt(40))
+
+
+def test_short_history_is_rejected():
+    with pytest.raises(ValueError, match="14 baseline days"):
+        detect_anomalies(np.ones((2, 16)), recent_days=3)
+
+    client_manager = SimpleNamespace(clients={})
+    with pytest.raises(ValueError, match="14 baseline days"):
+        asyncio.run(AnomalyScanner(client_manager, ga_client=None).run(days=16, recent_days=3))